@@ -1,53 +1,151 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
 import json
 import time
+import copy
+import hashlib
+import itertools
 import re
 import os
-from typing import Dict, Optional, Any
+import sys
+import gzip
+import glob
+import sqlite3
+import tempfile
+import types
+import threading
+import queue
+import importlib.util
+import numpy as np
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from typing import Dict, Optional, Any, Literal
+
+# CPU gasto por esta execução do script (comparado com as reexecuções parciais dos fragmentos)
+SCRIPT_CPU_START = time.thread_time()
 
 # Inicializar session state para controle do spaCy
 if 'use_spacy' not in st.session_state:
     st.session_state.use_spacy = True  # Ativado por padrão
 
+@st.cache_resource(show_spinner=False)
+def load_environment():
+    """Lê o .env uma vez por processo"""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+load_environment()
+
+# Cliente HTTP da OpenAI: conexões no pool, tempo de keep-alive, timeouts (segundos) e retries
+OPENAI_POOL_SIZE = int(os.getenv("OPENAI_POOL_SIZE", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_READ_TIMEOUT = float(os.getenv("OPENAI_READ_TIMEOUT", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+@st.cache_resource(show_spinner=False)
+def get_openai_client(api_key: str):
+    """
+    Cliente da OpenAI único por processo (e por chave), criado na primeira chamada.
+    As reexecuções do script reaproveitam o mesmo pool de conexões já aquecidas (TLS + keep-alive);
+    HTTP/2 é usado quando o pacote h2 está instalado. Chamadas com prazo (limited_openai_call)
+    usam estes timeouts como teto de cada tentativa e OPENAI_MAX_RETRIES como limite de retries.
+    """
+    import httpx
+    from openai import OpenAI
+    
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=OPENAI_POOL_SIZE,
+            max_keepalive_connections=OPENAI_POOL_SIZE,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(OPENAI_READ_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+        http2=importlib.util.find_spec("h2") is not None
+    )
+    return OpenAI(
+        api_key=api_key,
+        http_client=http_client,
+        timeout=httpx.Timeout(OPENAI_READ_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+        max_retries=OPENAI_MAX_RETRIES
+    )
+
 # Tentar importar OpenAI
 try:
-    from openai import OpenAI
-    from dotenv import load_dotenv
-    load_dotenv()
     openai_key = st.secrets.get("OPENAI_API_KEY", os.getenv("OPENAI_API_KEY"))
-    OPENAI_AVAILABLE = bool(openai_key)
-    if OPENAI_AVAILABLE:
-        client = OpenAI(api_key=openai_key)
+    OPENAI_AVAILABLE = bool(openai_key) and importlib.util.find_spec("openai") is not None
+    client = get_openai_client(openai_key) if OPENAI_AVAILABLE else None
 
 except:
     OPENAI_AVAILABLE = False
     client = None
 
-# Tentar importar spaCy APENAS se estiver ativado
-SPACY_AVAILABLE = False
-nlp = None
+# Respostas da OpenAI renderizadas token a token (KICKSTARTER_STREAM_RESPONSES=0 desativa)
+STREAM_RESPONSES = os.getenv("KICKSTARTER_STREAM_RESPONSES", "1") != "0"
 
-if st.session_state.use_spacy:
-    try:
-        import spacy
-        # Tentar carregar modelo em português ou inglês
-        try:
-            nlp = spacy.load("pt_core_news_sm")
-        except:
+# spaCy é carregado sob demanda (uma única vez por processo) em get_spacy_pipeline
+SPACY_AVAILABLE = importlib.util.find_spec("spacy") is not None
+
+# Modelos tentados em ordem; se nenhum estiver instalado usa spacy.blank("pt")
+SPACY_MODELS = ["pt_core_news_sm", "en_core_web_sm"]
+
+# Componentes que a extração não usa - não são nem carregados
+SPACY_EXCLUDED_COMPONENTS = [
+    "parser", "lemmatizer", "trainable_lemmatizer", "morphologizer",
+    "tagger", "attribute_ruler", "senter"
+]
+
+@st.cache_resource(show_spinner=False)
+def _spacy_state():
+    """Estado do pipeline spaCy compartilhado entre todas as sessões do processo"""
+    return {"nlp": None, "model": None, "load_ms": None, "lock": threading.Lock()}
+
+def get_spacy_pipeline():
+    """Retorna o pipeline spaCy, carregando-o na primeira chamada do processo"""
+    state = _spacy_state()
+    if state["nlp"] is not None or not SPACY_AVAILABLE:
+        return state["nlp"]
+    
+    with state["lock"]:
+        # Outra sessão pode ter carregado enquanto esperávamos o lock
+        if state["nlp"] is None:
+            start = time.perf_counter()
             try:
-                nlp = spacy.load("en_core_web_sm")
-            except:
-                # Se não tiver modelo, criar pipeline básico
-                nlp = spacy.blank("pt")
-        SPACY_AVAILABLE = True
-    except:
-        SPACY_AVAILABLE = False
-        nlp = None
+                import spacy
+                nlp, model_name = None, "blank:pt"
+                for candidate in SPACY_MODELS:
+                    try:
+                        nlp = spacy.load(candidate, exclude=SPACY_EXCLUDED_COMPONENTS)
+                        model_name = candidate
+                        break
+                    except Exception:
+                        continue
+                if nlp is None:
+                    # Se não tiver modelo, criar pipeline básico
+                    nlp = spacy.blank("pt")
+            except Exception as e:
+                print(f"Erro ao carregar spaCy: {e}")
+                return None
+            state["model"] = model_name
+            state["load_ms"] = (time.perf_counter() - start) * 1000
+            state["nlp"] = nlp
+    return state["nlp"]
+
+def get_spacy_status() -> Dict[str, Any]:
+    """Informações do pipeline para o painel de status (não dispara o carregamento)"""
+    state = _spacy_state()
+    return {"loaded": state["nlp"] is not None, "model": state["model"], "load_ms": state["load_ms"]}
 
 # Configuração da página
 st.set_page_config(
@@ -66,6 +164,19 @@ def get_api_url():
 # Configurações
 API_URL = get_api_url()
 
+# Modos de predição disponíveis
+PREDICTION_MODES = {
+    "remote": "🌐 API remota",
+    "local": "💻 Modelo local"
+}
+
+def get_prediction_mode() -> str:
+    """Modo de predição: 'remote' (API HTTP) ou 'local' (modelo empacotado)"""
+    if 'prediction_mode' in st.session_state:
+        return st.session_state.prediction_mode
+    mode = os.getenv("KICKSTARTER_PREDICTION_MODE", "remote").lower()
+    return mode if mode in PREDICTION_MODES else "remote"
+
 # Base de dados de usuários (requisito do case)
 USERS_DATABASE = {
     "joao@example.com": {
@@ -215,26 +326,141 @@ if 'user_email' not in st.session_state:
     st.session_state.user_email = None
 if 'extraction_method' not in st.session_state:
     st.session_state.extraction_method = None
+if 'extraction_trace' not in st.session_state:
+    st.session_state.extraction_trace = []
+if 'chat_turn_stats' not in st.session_state:
+    st.session_state.chat_turn_stats = []
+if 'run_cpu_ms' not in st.session_state:
+    st.session_state.run_cpu_ms = {}
+if 'pending_chat_summary' not in st.session_state:
+    st.session_state.pending_chat_summary = None
+if 'last_prompt_tokens' not in st.session_state:
+    st.session_state.last_prompt_tokens = None
+if 'last_llm_usage' not in st.session_state:
+    st.session_state.last_llm_usage = None
+if 'prediction_mode' not in st.session_state:
+    st.session_state.prediction_mode = get_prediction_mode()
+
+# Cliente HTTP da API: timeouts (segundos), retry e tamanho do pool de conexões
+API_CONNECT_TIMEOUT = float(os.getenv("KICKSTARTER_API_CONNECT_TIMEOUT", "3.05"))
+API_READ_TIMEOUT = float(os.getenv("KICKSTARTER_API_READ_TIMEOUT", "15"))
+API_MAX_RETRIES = int(os.getenv("KICKSTARTER_API_MAX_RETRIES", "2"))
+API_POOL_SIZE = int(os.getenv("KICKSTARTER_API_POOL_SIZE", "20"))
+
+class APIClient:
+    """Cliente da API de predição com pool de conexões keep-alive, timeouts e retry"""
+    
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+        
+        # GETs são repetidos em falhas de conexão/leitura e 502/503/504 com backoff.
+        # POSTs só são repetidos quando a conexão nem chegou a ser aberta.
+        retry = Retry(
+            total=API_MAX_RETRIES,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=API_POOL_SIZE, max_retries=retry)
+        
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    
+    def get(self, path: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(f"{self.base_url}{path}", **kwargs)
+    
+    def post(self, path: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.post(f"{self.base_url}{path}", **kwargs)
 
-# Verificar se API está online
+@st.cache_resource(show_spinner=False)
+def get_api_client(base_url: str) -> APIClient:
+    """Um cliente (e um pool de conexões) por URL base, compartilhado entre sessões"""
+    return APIClient(base_url)
 
-@st.cache_data(ttl=60)
-def check_api_health():
-    """Verifica se a API está online"""
+# Verificar se API está online (monitor em segundo plano)
+API_HEALTH_INTERVAL = float(os.getenv("KICKSTARTER_API_HEALTH_INTERVAL", "15"))
+API_HEALTH_IDLE_STOP = 600  # para de consultar se ninguém ler o status por 10 minutos
+
+def probe_api_health(url: str, api_client: Optional[APIClient] = None) -> Dict[str, Any]:
+    """Uma consulta ao /health; sem api_client usa uma conexão avulsa (URLs ainda não salvas)"""
+    start = time.perf_counter()
     try:
-        # Usar a URL configurada dinamicamente
-        url = st.session_state.get('api_url', API_URL)
-        response = requests.get(f"{url}/health", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
+        if api_client is not None:
+            response = api_client.get("/health", timeout=(API_CONNECT_TIMEOUT, 5))
+        else:
+            response = requests.get(f"{url.rstrip('/')}/health", timeout=(API_CONNECT_TIMEOUT, 5))
+        online = response.status_code == 200
+        error = None if online else f"HTTP {response.status_code}"
+    except Exception as e:
+        online, error = False, type(e).__name__
+    return {
+        "online": online,
+        "latency_ms": (time.perf_counter() - start) * 1000,
+        "checked_at": time.time(),
+        "error": error
+    }
+
+class ApiHealthMonitor:
+    """
+    Thread que consulta /health de uma URL a cada intervalo e publica o último resultado.
+    A renderização só lê o snapshot em memória, nunca espera pela rede.
+    """
+    
+    def __init__(self, url: str, interval: float):
+        self.url = url
+        self.interval = interval
+        self._client = get_api_client(url)
+        self._lock = threading.Lock()
+        self._state = {"online": None, "latency_ms": None, "checked_at": None, "error": None, "probes": 0}
+        self._last_read = time.monotonic()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._ensure_running()
+    
+    def _ensure_running(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="api-health", daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        while time.monotonic() - self._last_read < API_HEALTH_IDLE_STOP:
+            self.probe()
+            time.sleep(self.interval)
+    
+    def probe(self):
+        """Uma consulta ao /health (roda na thread do monitor)"""
+        result = probe_api_health(self.url, self._client)
+        with self._lock:
+            self._state = {**result, "probes": self._state["probes"] + 1}
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Último status publicado (online é None enquanto a primeira consulta não termina)"""
+        self._last_read = time.monotonic()
+        self._ensure_running()
+        with self._lock:
+            return dict(self._state)
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def get_api_health_monitor(url: str) -> ApiHealthMonitor:
+    """Um monitor por URL de API configurada, compartilhado entre sessões"""
+    return ApiHealthMonitor(url, API_HEALTH_INTERVAL)
 
 # Carregar categorias
-@st.cache_data(ttl=300)
 def load_categories():
+    """Carrega categorias disponíveis da API configurada"""
+    return fetch_categories(API_URL)
+
+@st.cache_data(ttl=300)
+def fetch_categories(base_url: str):
     """Carrega categorias disponíveis da API"""
     try:
-        response = requests.get(f"{API_URL}/info/categories")
+        response = get_api_client(base_url).get("/info/categories")
         if response.status_code == 200:
             data = response.json()
             return {cat['value']: cat for cat in data['categories']}
@@ -260,6 +486,70 @@ def load_categories():
         'Crafts': {'description': 'Artesanato, DIY, kits', 'avg_success': '27%'}
     }
 
+def categories_hash(categories: Dict[str, Any]) -> str:
+    """Hash do payload de categorias, chave dos gráficos que dependem dele"""
+    payload = json.dumps(categories, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_category_success_figure(categories_key: str, _categories: Dict[str, Any], title: str,
+                                  range_x: Optional[list] = None, height: Optional[int] = None) -> go.Figure:
+    """Barras de taxa de sucesso por categoria (refeito só quando o payload de categorias muda)"""
+    cat_names = list(_categories.keys())
+    cat_success_rates = [float(_categories[cat]['avg_success'].rstrip('%')) for cat in cat_names]
+    
+    df_categories = pd.DataFrame({
+        'Categoria': cat_names,
+        'Taxa de Sucesso (%)': cat_success_rates
+    }).sort_values('Taxa de Sucesso (%)', ascending=True)
+    
+    fig = px.bar(
+        df_categories,
+        x='Taxa de Sucesso (%)',
+        y='Categoria',
+        orientation='h',
+        title=title,
+        color='Taxa de Sucesso (%)',
+        color_continuous_scale='RdYlGn',
+        range_x=range_x
+    )
+    if height:
+        fig.update_layout(height=height)
+    return fig
+
+# Simulação de dados de distribuição de metas (dashboard e análise offline de meta)
+GOAL_RANGES = ['< $1k', '$1k-5k', '$5k-10k', '$10k-25k', '$25k-50k', '> $50k']
+GOAL_RANGE_LIMITS = [1000, 5000, 10000, 25000, 50000]
+SUCCESS_BY_GOAL = [45, 42, 38, 28, 18, 12]
+
+@st.cache_data(show_spinner=False)
+def build_goal_success_figure() -> go.Figure:
+    """Taxa de sucesso por faixa de meta (dados fixos do dashboard)"""
+    return px.bar(
+        x=GOAL_RANGES,
+        y=SUCCESS_BY_GOAL,
+        title='Taxa de Sucesso por Faixa de Meta',
+        labels={'x': 'Faixa de Meta', 'y': 'Taxa de Sucesso (%)'},
+        color=SUCCESS_BY_GOAL,
+        color_continuous_scale='RdYlGn'
+    )
+
+@st.cache_data(show_spinner=False)
+def build_duration_success_figure() -> go.Figure:
+    """Taxa de sucesso por duração da campanha (dados fixos do dashboard)"""
+    # Simulação de dados de duração
+    duration_ranges = ['< 20 dias', '20-30 dias', '30-40 dias', '40-50 dias', '> 50 dias']
+    success_by_duration = [25, 42, 38, 28, 15]
+    
+    return px.bar(
+        x=duration_ranges,
+        y=success_by_duration,
+        title='Taxa de Sucesso por Duração da Campanha',
+        labels={'x': 'Duração', 'y': 'Taxa de Sucesso (%)'},
+        color=success_by_duration,
+        color_continuous_scale='RdYlGn'
+    )
+
 # Países disponíveis
 COUNTRIES = {
     'US': 'Estados Unidos',
@@ -315,346 +605,1640 @@ CATEGORY_MAPPING = {
     'artesanato': 'Crafts'
 }
 
-# Adicionar estas funções ao código do app_streamlit_hybrid_completo.py
+# Motor de predição local (mesmo artefato usado pela API)
+MODEL_PATH = os.getenv(
+    "KICKSTARTER_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "kickstarter_model_v1.pkl")
+)
 
-def preprocess_message(message: str) -> str:
+# Campos do payload enviado para /predict
+PREDICTION_FIELDS = ["name", "main_category", "country", "usd_goal_real", "launched", "deadline"]
+
+# Rótulo espúrio do dataset de treino (linhas com o país corrompido); não representa
+# "país desconhecido" e tem taxa de sucesso própria (0.494), então nunca é usado na predição
+UNKNOWN_COUNTRY_LABEL = 'N,0"'
+
+# Limites da meta aceitos pelo formulário (também usados pelo otimizador)
+GOAL_MIN_USD = 100
+GOAL_MAX_USD = 1000000
+
+class PredictionAPIError(Exception):
+    """Erro retornado pela API de predição (status diferente de 200)"""
+    def __init__(self, status_code: int, detail: Any = None):
+        super().__init__(f"API retornou status {status_code}")
+        self.status_code = status_code
+        self.detail = detail
+
+@st.cache_resource(show_spinner="Carregando modelo local...")
+def load_local_model() -> Dict[str, Any]:
+    """Carrega kickstarter_model_v1.pkl uma única vez por processo"""
+    import joblib
+    
+    # O pré-processador foi serializado a partir do módulo ml_classes da API.
+    # Só usamos os atributos dele (estatísticas, encoders e scaler), então
+    # basta uma classe vazia quando o módulo não está instalado.
+    if importlib.util.find_spec("ml_classes") is None and "ml_classes" not in sys.modules:
+        stub = types.ModuleType("ml_classes")
+        stub.KickstarterPreprocessor = type("KickstarterPreprocessor", (), {})
+        sys.modules["ml_classes"] = stub
+    
+    return joblib.load(MODEL_PATH)
+
+def _encode_labels(values: pd.Series, encoder, fallback: str) -> pd.Series:
+    """Aplica um LabelEncoder treinado, mapeando valores desconhecidos para fallback"""
+    codes = {label: code for code, label in enumerate(encoder.classes_)}
+    return values.map(codes).fillna(codes.get(fallback, 0)).astype(float)
+
+def build_model_features(projects: pd.DataFrame) -> pd.DataFrame:
     """
-    Pré-processa a mensagem para corrigir erros comuns
+    Calcula as features do modelo para vários projetos de uma vez.
+    Espera as colunas de PREDICTION_FIELDS e devolve as features já escalonadas.
     """
-    # Converter para lowercase para comparações
-    message_lower = message.lower()
+    artifact = load_local_model()
+    preprocessor = artifact['preprocessor']
+    cat_stats = preprocessor.category_stats
+    country_stats = preprocessor.country_stats
     
-    # Dicionário de correções comuns
-    corrections = {
-        # Erros de digitação comuns
-        'categria': 'categoria',
-        'categorai': 'categoria',
-        'catgoria': 'categoria',
-        'categora': 'categoria',
-        
-        # Variações de palavras
-        'dolar': 'dollar',
-        'dolares': 'dollars',
-        'reais': 'dollars',  # Assumir conversão
-        
-        # Abreviações de valores
-        'k ': '000 ',
-        'mil ': '000 ',
-        
-        # Países
-        'brasil': 'BR',
-        'estados unidos': 'US',
-        'eua': 'US',
-        'usa': 'US',
-        
-        # Categorias em português
-        'tecnologia': 'Technology',
-        'jogos': 'Games',
-        'música': 'Music',
-        'musica': 'Music',
-        'arte': 'Art',
-        'filmes': 'Film & Video',
-        'filme': 'Film & Video',
-        'video': 'Film & Video',
-        'vídeo': 'Film & Video',
-        'design': 'Design',
-        'comida': 'Food',
-        'teatro': 'Theater',
-        'dança': 'Dance',
-        'danca': 'Dance',
-        'fotografia': 'Photography',
-        'moda': 'Fashion',
-        'artesanato': 'Crafts',
-        'publicação': 'Publishing',
-        'publicacao': 'Publishing',
-        'quadrinhos': 'Comics',
-        'jornalismo': 'Journalism'
+    goal = projects['usd_goal_real'].astype(float)
+    launched = pd.to_datetime(projects['launched'])
+    deadline = pd.to_datetime(projects['deadline'])
+    names = projects['name'].fillna('').astype(str)
+    # Features do nome calculadas uma vez por nome distinto (simulações repetem o mesmo nome)
+    distinct_names = names.unique()
+    name_word_counts = names.map(dict(zip(distinct_names, (len(n.split()) for n in distinct_names))))
+    category = projects['main_category'].astype(str)
+    country = projects['country'].astype(str).str.upper()
+    
+    # Países fora do treino (ex.: BR) recebem valores neutros: a taxa média dos países reais
+    # e, no código do país, a média do treino (feature escalonada = 0)
+    scaler = preprocessor.scaler
+    country_rates = country_stats['country_success_rate'].drop(UNKNOWN_COUNTRY_LABEL, errors='ignore')
+    country_codes = {
+        label: code for code, label in enumerate(preprocessor.label_encoders['country'].classes_)
+        if label != UNKNOWN_COUNTRY_LABEL
     }
+    country_rate = country.map(country_rates).fillna(country_rates.mean())
+    country_code = country.map(country_codes).fillna(scaler.mean_[list(scaler.feature_names_in_).index('country')])
+    cat_info = cat_stats.reindex(category).fillna(cat_stats.mean())
+    campaign_days = (deadline - launched).dt.days.clip(lower=1).astype(float)
     
-    # Aplicar correções
-    result = message
-    for wrong, correct in corrections.items():
-        # Usar regex para substituir palavras completas
-        import re
-        pattern = r'\b' + re.escape(wrong) + r'\b'
-        result = re.sub(pattern, correct, result, flags=re.IGNORECASE)
+    features = pd.DataFrame({
+        'cat_success_rate': cat_info['cat_success_rate'].to_numpy(),
+        'usd_goal_real': goal.to_numpy(),
+        'campaign_days': campaign_days.to_numpy(),
+        'goal_magnitude': np.log10(goal.clip(lower=1)).to_numpy(),
+        'cat_mean_goal': cat_info['cat_mean_goal'].to_numpy(),
+        'name_word_count': name_word_counts.to_numpy(),
+        'cat_median_goal': cat_info['cat_median_goal'].to_numpy(),
+        'goal_per_day': (goal / campaign_days).to_numpy(),
+        'country_success_rate': country_rate.to_numpy(),
+        'launch_year': launched.dt.year.to_numpy(),
+        'main_category': _encode_labels(category, preprocessor.label_encoders['main_category'], 'Technology').to_numpy(),
+        'name_length': names.str.len().to_numpy(),
+        'goal_category_ratio': (goal / cat_info['cat_median_goal'].to_numpy()).to_numpy(),
+        'country': country_code.astype(float).to_numpy(),
+        'goal_rounded': (goal % 1000 == 0).astype(float).to_numpy()
+    }, index=projects.index).astype(float)
     
-    return result
+    scaled = pd.DataFrame(
+        scaler.transform(features[list(scaler.feature_names_in_)]),
+        columns=scaler.feature_names_in_,
+        index=projects.index
+    )
+    return scaled[artifact['feature_names']]
+
+def predict_local_proba(projects: pd.DataFrame) -> np.ndarray:
+    """Probabilidade de sucesso para vários projetos (uma chamada vetorizada ao modelo)"""
+    artifact = load_local_model()
+    features = build_model_features(projects)
+    return artifact['model'].predict_proba(features.to_numpy())[:, 1]
+
+def _local_confidence(probability: float, threshold: float) -> str:
+    """Confiança a partir da distância até o threshold"""
+    distance = abs(probability - threshold)
+    if distance >= 0.2:
+        return "Alta"
+    if distance >= 0.1:
+        return "Média"
+    return "Baixa"
+
+def _local_recommendations(project: Dict[str, Any], probability: float, threshold: float) -> list:
+    """Recomendações baseadas nas mesmas estatísticas usadas como features"""
+    preprocessor = load_local_model()['preprocessor']
+    cat_stats = preprocessor.category_stats
+    category = project['main_category']
+    goal = float(project['usd_goal_real'])
+    days = (pd.to_datetime(project['deadline']) - pd.to_datetime(project['launched'])).days
+    words = len(str(project['name']).split())
+    recommendations = []
+    
+    if category in cat_stats.index:
+        cat_rate = cat_stats.loc[category, 'cat_success_rate']
+        median_goal = cat_stats.loc[category, 'cat_median_goal']
+        if cat_rate >= 0.45:
+            recommendations.append(f"✅ {category} tem taxa histórica de sucesso de {cat_rate:.0%}")
+        elif cat_rate < 0.3:
+            recommendations.append(f"⚠️ {category} tem taxa histórica de apenas {cat_rate:.0%} - capriche na apresentação")
+        if goal > 2 * median_goal:
+            recommendations.append(f"⚠️ Meta ${goal:,.0f} bem acima da mediana de {category} (${median_goal:,.0f}) - considere reduzir")
+        elif goal <= median_goal:
+            recommendations.append(f"✅ Meta abaixo da mediana da categoria (${median_goal:,.0f})")
+    
+    if days < 20:
+        recommendations.append(f"⚠️ Campanha curta ({days} dias) - o ideal é entre 25 e 35 dias")
+    elif days > 45:
+        recommendations.append(f"⚠️ Campanha longa ({days} dias) - campanhas longas perdem momentum")
+    else:
+        recommendations.append(f"✅ Duração de {days} dias está em uma boa faixa")
+    
+    if not 4 <= words <= 7:
+        recommendations.append("💡 Use um título de 4 a 7 palavras descrevendo claramente o projeto")
+    
+    if probability < threshold:
+        recommendations.append("🔴 Probabilidade abaixo do threshold - revise meta e duração antes de lançar")
+    
+    return recommendations
+
+def predict_local_batch(projects: list) -> list:
+    """Predições com o modelo local para vários projetos (uma chamada vetorizada), no formato de /predict"""
+    artifact = load_local_model()
+    threshold = float(artifact['optimal_threshold'])
+    payloads = [{field: project_data[field] for field in PREDICTION_FIELDS} for project_data in projects]
+    probabilities = predict_local_proba(pd.DataFrame(payloads))
+    
+    return [
+        {
+            "success_probability": float(probability),
+            "prediction": "Sucesso" if probability >= threshold else "Fracasso",
+            "confidence": _local_confidence(float(probability), threshold),
+            "threshold_used": threshold,
+            "recommendations": _local_recommendations(payload, float(probability), threshold)
+        }
+        for payload, probability in zip(payloads, probabilities)
+    ]
+
+def predict_local(project_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Predição com o modelo local, no mesmo formato de resposta de /predict"""
+    return predict_local_batch([project_data])[0]
+
+# Cache de predições compartilhado entre sessões
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "2048"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+
+class PredictionCache:
+    """Cache LRU com expiração (TTL) e contadores, seguro para uso entre threads"""
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+    
+    def put(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+                "max_size": self.max_size
+            }
 
-def extract_with_spacy_improved(message: str) -> Optional[Dict[str, Any]]:
+@st.cache_resource(show_spinner=False)
+def get_prediction_cache() -> PredictionCache:
+    """Cache de predições único por processo"""
+    return PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+
+def prediction_cache_key(project_data: Dict[str, Any], source: str) -> str:
+    """Chave canônica do payload: mesmos valores com tipos/formatos diferentes geram a mesma chave"""
+    normalized = {
+        "name": str(project_data["name"]),
+        "main_category": str(project_data["main_category"]),
+        "country": str(project_data["country"]).strip().upper(),
+        "usd_goal_real": round(float(project_data["usd_goal_real"]), 2),
+        "launched": str(project_data["launched"])[:10],
+        "deadline": str(project_data["deadline"])[:10]
+    }
+    return json.dumps([source, normalized], sort_keys=True, ensure_ascii=False)
+
+class SingleFlight:
     """
-    Versão melhorada do extrator spaCy com pré-processamento
+    Junta chamadas idênticas em andamento: a primeira com uma chave executa, as que chegam
+    enquanto ela não terminou esperam e recebem o mesmo resultado (ou a mesma exceção).
     """
-    if not SPACY_AVAILABLE or not st.session_state.use_spacy:
-        return None
     
-    try:
-        # Pré-processar mensagem
-        processed_message = preprocess_message(message)
-        print(f"Mensagem original: {message}")
-        print(f"Mensagem processada: {processed_message}")
-        
-        # Padrões regex expandidos
-        patterns = {
-            'nome': [
-                # Padrões estruturados
-                r'nome:\s*([^\n,]+?)(?=\s+categoria:|$)',
-                r'projeto:\s*([^\n,]+?)(?=\s+categoria:|$)',
-                r'título:\s*([^\n,]+?)(?=\s+categoria:|$)',
-                
-                # Padrões mais flexíveis
-                r'meu projeto (?:é|e|se chama)\s+([^\n,]+?)(?=\s+categoria|$)',
-                r'projeto\s+([^\n,]+?)\s+(?:categoria|da categoria)',
-                r'analise?\s+(?:o\s+)?(?:meu\s+)?projeto\s+([^\n,]+?)\s+categoria',
-                
-                # Padrão mais genérico (última tentativa)
-                r'(?:projeto|nome)\s*:?\s*([a-zA-Z0-9\s\-\_]+?)(?=\s*(?:categoria|tipo|meta|$))'
-            ],
-            'categoria': [
-                # Padrões estruturados
-                r'categoria:\s*([^\n,]+?)(?=\s+meta:|$)',
-                r'tipo:\s*([^\n,]+?)(?=\s+meta:|$)',
-                r'category:\s*([^\n,]+?)(?=\s+meta:|$)',
-                
-                # Padrões flexíveis
-                r'(?:da\s+)?categoria\s+([^\n,]+?)(?=\s+meta|$)',
-                r'é\s+(?:um|uma)\s+([^\n,]+?)(?=\s+meta|com|$)',
-                
-                # Categorias entre aspas ou parênteses
-                r'categoria[:\s]+["\']([^"\']+)["\']',
-                r'categoria[:\s]+\(([^)]+)\)',
-                
-                # Padrão genérico
-                r'categoria\s*:?\s*([a-zA-Z\s&]+?)(?=\s*(?:meta|valor|$))'
-            ],
-            'meta': [
-                # Valores monetários estruturados
-                r'meta:\s*\$?\s*([\d,]+(?:\.\d{2})?)',
-                r'objetivo:\s*\$?\s*([\d,]+(?:\.\d{2})?)',
-                r'goal:\s*\$?\s*([\d,]+(?:\.\d{2})?)',
-                r'valor:\s*\$?\s*([\d,]+(?:\.\d{2})?)',
-                
-                # Valores com k/mil
-                r'meta\s*:?\s*(\d+)\s*(?:k|mil)',
-                r'(\d+)\s*(?:k|mil)\s*(?:dólares|dolares|reais|dollars)',
-                
-                # Valores entre símbolos
-                r'\$\s*([\d,]+(?:\.\d{2})?)',
-                r'R\$\s*([\d,]+(?:\.\d{2})?)',
-                
-                # Padrão genérico
-                r'meta\s*:?\s*(?:de\s+)?\$?\s*([\d,\.]+)'
-            ],
-            'pais': [
-                r'país:\s*([A-Za-z]{2})',
-                r'pais:\s*([A-Za-z]{2})',
-                r'country:\s*([A-Za-z]{2})',
-                r'local:\s*([A-Za-z]{2})',
-                r'de\s+([A-Za-z]{2})(?:\s|$)'
-            ],
-            'inicio': [
-                r'início:\s*(\d{4}-\d{2}-\d{2})',
-                r'inicio:\s*(\d{4}-\d{2}-\d{2})',
-                r'começa:\s*(\d{4}-\d{2}-\d{2})',
-                r'lançamento:\s*(\d{4}-\d{2}-\d{2})',
-                r'start:\s*(\d{4}-\d{2}-\d{2})',
-                r'data\s+(?:de\s+)?início:\s*(\d{4}-\d{2}-\d{2})'
-            ],
-            'fim': [
-                r'fim:\s*(\d{4}-\d{2}-\d{2})',
-                r'término:\s*(\d{4}-\d{2}-\d{2})',
-                r'termino:\s*(\d{4}-\d{2}-\d{2})',
-                r'deadline:\s*(\d{4}-\d{2}-\d{2})',
-                r'end:\s*(\d{4}-\d{2}-\d{2})',
-                r'data\s+(?:de\s+)?fim:\s*(\d{4}-\d{2}-\d{2})',
-                r'até:\s*(\d{4}-\d{2}-\d{2})'
-            ]
-        }
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
+    
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.executed += 1
+            else:
+                self.shared += 1
         
-        # Extrair dados usando regex
-        extracted_data = {}
+        if not leader:
+            # Cópia para que quem recebeu o resultado compartilhado não altere o dos outros
+            return copy.deepcopy(future.result())
         
-        for field, pattern_list in patterns.items():
-            for pattern in pattern_list:
-                match = re.search(pattern, processed_message, re.IGNORECASE)
-                if match:
-                    extracted_data[field] = match.group(1).strip()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"executed": self.executed, "shared": self.shared, "in_flight": len(self._calls)}
+
+@st.cache_resource(show_spinner=False)
+def get_singleflight() -> SingleFlight:
+    """Coalescência única por processo (predições e chamadas à OpenAI, com chaves separadas)"""
+    return SingleFlight()
+
+# Micro-batching das predições: janela de espera (ms) e tamanho máximo do lote
+PREDICTION_BATCH_WINDOW_MS = float(os.getenv("KICKSTARTER_PREDICTION_BATCH_WINDOW_MS", "5"))
+PREDICTION_BATCH_MAX_SIZE = int(os.getenv("KICKSTARTER_PREDICTION_BATCH_MAX_SIZE", "64"))
+PREDICTION_BATCH_MAX_FAILURES = 3   # lotes seguidos sem nenhuma predição até desistir de /predict/batch
+PREDICTION_BATCHER_IDLE_STOP = 60   # threads do batcher param após 60s sem predições
+
+def _post_predict(base_url: str, project_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Uma chamada a /predict; status diferente de 200 vira PredictionAPIError"""
+    response = get_api_client(base_url).post("/predict", json=project_data)
+    if response.status_code != 200:
+        try:
+            detail = response.json()
+        except ValueError:
+            detail = response.text
+        raise PredictionAPIError(response.status_code, detail)
+    return response.json()
+
+class PredictionBatcher:
+    """
+    Junta as predições que chegam (de qualquer sessão) dentro de uma janela de poucos
+    milissegundos e resolve o lote com uma chamada só: predict_proba vetorizado no modo
+    local ou POST /predict/batch na API. Cada chamador recebe o próprio resultado ou erro.
+    
+    Se a API não tiver /predict/batch (404/405) ou ele falhar PREDICTION_BATCH_MAX_FAILURES
+    vezes seguidas, o batcher passa a mandar as predições do lote em paralelo para /predict
+    e não tenta o endpoint de novo. As threads param quando ficam ociosas e voltam sozinhas
+    na próxima predição.
+    """
+    
+    def __init__(self, mode: str, base_url: str, window_ms: float, max_size: int):
+        self.mode = mode
+        self.base_url = base_url
+        self.window = window_ms / 1000
+        self.max_size = max_size
+        self.batch_endpoint = True if mode == "local" else None  # None = ainda não testado
+        self._batch_failures = 0
+        self._queue = queue.Queue()
+        self._executor = None
+        self._thread = None
+        self._pending = 0
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._latencies_ms = deque(maxlen=512)
+        self._counts = {"requests": 0, "batches": 0, "upstream_calls": 0, "largest_batch": 0}
+    
+    def submit(self, project_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Enfileira a predição e espera o lote dela ser resolvido"""
+        future = Future()
+        start = time.perf_counter()
+        with self._start_lock:
+            if self._thread is None:
+                self._executor = ThreadPoolExecutor(max_workers=API_POOL_SIZE, thread_name_prefix="predict-batch")
+                self._thread = threading.Thread(target=self._collect, name="predict-batcher", daemon=True)
+                self._thread.start()
+            self._pending += 1
+            self._queue.put((project_data, future))
+        try:
+            return future.result()
+        finally:
+            with self._start_lock:
+                self._pending -= 1
+            with self._lock:
+                self._latencies_ms.append((time.perf_counter() - start) * 1000)
+    
+    def _collect(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=PREDICTION_BATCHER_IDLE_STOP)]
+            except queue.Empty:
+                # Ocioso e sem predições pendentes: liberar as threads (o próximo submit recria)
+                with self._start_lock:
+                    if self._pending:
+                        continue
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+                    self._thread = None
+                    return
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
                     break
+            # O próximo lote já começa a ser coletado enquanto este é resolvido
+            self._executor.submit(self._dispatch, batch)
+    
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self._counts[name] += value
+    
+    def _dispatch(self, batch: list):
+        with self._lock:
+            self._counts["requests"] += len(batch)
+            self._counts["batches"] += 1
+            self._counts["largest_batch"] = max(self._counts["largest_batch"], len(batch))
         
-        # Processar valores especiais
-        if 'meta' in extracted_data:
-            meta_str = extracted_data['meta']
-            
-            # Verificar se tem 'k' ou 'mil'
-            if 'k' in message.lower() or 'mil' in message.lower():
-                # Extrair apenas números
-                numbers = re.findall(r'(\d+)', meta_str)
-                if numbers:
-                    extracted_data['meta'] = str(int(numbers[0]) * 1000)
+        projects = [project_data for project_data, _ in batch]
+        results = None
+        try:
+            if self.mode == "local":
+                self._count(upstream_calls=1)
+                results = predict_local_batch(projects)
+            elif len(batch) > 1 and self.batch_endpoint is not False:
+                results = self._post_batch(projects)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            print(f"Lote de {len(batch)} predições falhou ({e}); resolvendo individualmente")
         
-        # Validar se temos dados mínimos
-        if not all(key in extracted_data for key in ['nome', 'categoria', 'meta']):
-            print(f"Dados incompletos. Extraídos: {extracted_data}")
-            return None
+        if results is not None:
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            return
         
-        # Converter e validar dados
+        # Sem lote (um item, endpoint ausente ou erro no lote): cada predição sozinha, em paralelo
+        for project_data, future in batch:
+            self._executor.submit(self._resolve_single, project_data, future)
+    
+    def _resolve_single(self, project_data: Dict[str, Any], future: Future):
+        self._count(upstream_calls=1)
         try:
-            # Limpar e converter meta
-            meta_str = extracted_data['meta'].replace(',', '')
-            if '.' in meta_str and len(meta_str.split('.')[-1]) == 2:
-                meta = float(meta_str)
+            if self.mode == "local":
+                future.set_result(predict_local(project_data))
             else:
-                meta_str = meta_str.replace('.', '')
-                meta = float(meta_str)
-            
-            # Normalizar categoria
-            categoria = normalize_category(extracted_data['categoria'])
-            
-            # Preparar dados finais
-            project_data = {
-                "name": extracted_data['nome'],
-                "main_category": categoria,
-                "country": extracted_data.get('pais', 'US').upper(),
-                "usd_goal_real": meta,
-                "launched": extracted_data.get('inicio', datetime.now().strftime("%Y-%m-%d")),
-                "deadline": extracted_data.get('fim', (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d"))
-            }
-            
-            # Validar datas
-            launched_date = datetime.strptime(project_data['launched'], "%Y-%m-%d")
-            deadline_date = datetime.strptime(project_data['deadline'], "%Y-%m-%d")
-            
-            if deadline_date <= launched_date:
-                project_data['deadline'] = (launched_date + timedelta(days=30)).strftime("%Y-%m-%d")
-            
-            return project_data
-            
+                future.set_result(_post_predict(self.base_url, project_data))
         except Exception as e:
-            print(f"Erro na conversão: {e}")
+            future.set_exception(e)
+    
+    def _post_batch(self, projects: list) -> Optional[list]:
+        """POST /predict/batch; None quando o lote não pôde ser resolvido por inteiro"""
+        self._count(upstream_calls=1)
+        response = get_api_client(self.base_url).post("/predict/batch", json={"projects": projects})
+        if response.status_code in (404, 405):
+            self.batch_endpoint = False
             return None
-            
-    except Exception as e:
-        print(f"Erro geral: {e}")
-        return None
+        predictions = response.json().get("predictions", []) if response.status_code == 200 else []
+        if len(predictions) != len(projects):
+            # Ex.: 422 por um projeto inválido - os individuais devolvem o erro só para quem o causou.
+            # Falhas seguidas sem nenhuma predição indicam um endpoint quebrado, não dados ruins.
+            with self._lock:
+                self._batch_failures += 1
+                if self._batch_failures >= PREDICTION_BATCH_MAX_FAILURES:
+                    self.batch_endpoint = False
+            return None
+        with self._lock:
+            self._batch_failures = 0
+        self.batch_endpoint = True
+        return predictions
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+            latencies = np.array(self._latencies_ms)
+        counts["avg_batch"] = counts["requests"] / counts["batches"] if counts["batches"] else 0.0
+        counts["p95_ms"] = float(np.percentile(latencies, 95)) if latencies.size else None
+        counts["batch_endpoint"] = self.batch_endpoint
+        return counts
 
-# Modificar a função extract_project_info_from_message para usar a versão melhorada
-def extract_project_info_from_message(message):
-    """Extrai informações do projeto da mensagem do usuário"""
-    # Primeiro tenta com spaCy melhorado SE ESTIVER ATIVADO
-    if SPACY_AVAILABLE and st.session_state.use_spacy:
-        project_data = extract_with_spacy_improved(message)
-        if project_data:
-            st.session_state.extraction_method = "spaCy (local/gratuito)"
-            return project_data 
-    
-    # Se spaCy falhar ou estiver desativado e OpenAI estiver disponível
-    if OPENAI_AVAILABLE and client:
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_prediction_batcher(mode: str, base_url: str) -> PredictionBatcher:
+    """Um batcher por modo/URL, compartilhado entre sessões (os descartados param quando ociosos)"""
+    return PredictionBatcher(mode, base_url, PREDICTION_BATCH_WINDOW_MS, PREDICTION_BATCH_MAX_SIZE)
+
+def predict_project(project_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Faz a predição no modo configurado (API remota ou modelo local), usando o cache compartilhado"""
+    mode = get_prediction_mode()
+    source = "local" if mode == "local" else f"remote:{API_URL}"
+    cache = get_prediction_cache()
+    cache_key = prediction_cache_key(project_data, source)
+    
+    result = cache.get(cache_key)
+    if result is not None:
+        return result
+    
+    # Pedidos iguais em andamento (duplo clique, várias sessões) compartilham uma predição
+    def predict_and_cache():
+        batcher = get_prediction_batcher(mode, "" if mode == "local" else API_URL)
+        prediction = batcher.submit(project_data)
+        cache.put(cache_key, prediction)
+        return prediction
+    
+    return get_singleflight().do(("predict", cache_key), predict_and_cache)
+
+# Predição em lote (arquivos CSV/Parquet)
+BATCH_CHUNK_ROWS = int(os.getenv("BATCH_CHUNK_ROWS", "20000"))
+BATCH_OUTPUT_PREFIX = "kickstarter_batch_"
+BATCH_OUTPUT_TTL_S = float(os.getenv("BATCH_OUTPUT_TTL_S", "3600"))
+
+def cleanup_batch_outputs(max_age_s: float = BATCH_OUTPUT_TTL_S) -> int:
+    """Remove resultados em lote antigos do diretório temporário (sessões encerradas não limpam os seus)"""
+    removed = 0
+    cutoff = time.time() - max_age_s
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), f"{BATCH_OUTPUT_PREFIX}*.csv.gz")):
         try:
-            prompt = f"""
-            Extraia as informações do projeto Kickstarter desta mensagem.
-            Retorne APENAS um JSON válido com os campos:
-            - name: nome do projeto
-            - main_category: categoria (deve ser uma das válidas: Technology, Games, Art, Music, Film & Video, Design, Comics, Theater, Food, Photography, Fashion, Dance, Journalism, Crafts, Publishing)
-            - country: código do país (2 letras)
-            - usd_goal_real: meta em dólares (número)
-            - launched: data de início (YYYY-MM-DD)
-            - deadline: data fim (YYYY-MM-DD)
-            
-            Se algum campo não for mencionado, use valores padrão razoáveis.
-            
-            Mensagem: {message}
-            """
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "system", "content": prompt}],
-                temperature=0.1
-            )
-            
-            json_text = response.choices[0].message.content
-            json_match = re.search(r'\{.*\}', json_text, re.DOTALL)
-            if json_match:
-                extracted_data = json.loads(json_match.group())
-                st.session_state.extraction_method = "OpenAI GPT-3.5 (principal)" if not st.session_state.use_spacy else "OpenAI GPT-3.5 (fallback)"
-                return extracted_data
-        except Exception as e:
-            print(f"Erro com OpenAI: {e}")
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+def iter_project_chunks(uploaded_file, chunk_rows: int = BATCH_CHUNK_ROWS):
+    """Lê o arquivo enviado em blocos de chunk_rows linhas (CSV ou Parquet)"""
+    if uploaded_file.name.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(uploaded_file)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(uploaded_file, chunksize=chunk_rows)
+
+def count_uploaded_rows(uploaded_file) -> int:
+    """Número (aproximado, para CSV) de projetos no arquivo, usado na barra de progresso"""
+    if uploaded_file.name.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        rows = pq.ParquetFile(uploaded_file).metadata.num_rows
+    else:
+        rows = max(uploaded_file.getvalue().count(b"\n") - 1, 1)
+    uploaded_file.seek(0)
+    return rows
+
+def _parse_batch_dates(values: pd.Series) -> pd.Series:
+    """
+    Datas ISO 8601 em qualquer layout (só data, data e hora, com fuso) -> datetime sem fuso.
+    Sem format o pandas deduz o layout pelo primeiro valor do bloco e anula os demais layouts.
+    """
+    return pd.to_datetime(values, errors='coerce', format='ISO8601', utc=True).dt.tz_localize(None)
+
+def score_projects_chunk(chunk: pd.DataFrame, threshold: float) -> pd.DataFrame:
+    """Pontua um bloco de projetos com o modelo local em uma única chamada vetorizada"""
+    missing = [field for field in PREDICTION_FIELDS if field not in chunk.columns]
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
     
-    return None
+    # Normalizar apenas os valores distintos de categoria (poucos por arquivo)
+    categories = chunk['main_category'].astype(str)
+    category_map = {cat: normalize_category(cat) for cat in categories.unique()}
+    projects = pd.DataFrame({
+        'name': chunk['name'].fillna('').astype(str),
+        'main_category': categories.map(category_map),
+        'country': chunk['country'].fillna('US').astype(str).str.strip().str.upper(),
+        'usd_goal_real': pd.to_numeric(chunk['usd_goal_real'], errors='coerce'),
+        'launched': _parse_batch_dates(chunk['launched']),
+        'deadline': _parse_batch_dates(chunk['deadline'])
+    }, index=chunk.index)
+    
+    valid = (
+        projects['usd_goal_real'].gt(0)
+        & projects['launched'].notna()
+        & projects['deadline'].gt(projects['launched'])
+    )
+    
+    probabilities = pd.Series(np.nan, index=chunk.index)
+    if valid.any():
+        probabilities[valid] = predict_local_proba(projects[valid])
+    
+    scored = chunk.copy()
+    scored['main_category'] = projects['main_category']
+    scored['success_probability'] = probabilities.round(4)
+    scored['prediction'] = np.where(
+        ~valid, "Inválido", np.where(probabilities >= threshold, "Sucesso", "Fracasso")
+    )
+    return scored
 
-# Adicione este código ANTES do container do chat (após o CSS customizado e antes de "# Layout com Chat no Topo")
+# Simulação "e se?" de meta × duração
+WHATIF_GOAL_POINTS = 50
+WHATIF_DURATION_POINTS = 40
+WHATIF_MAX_DAYS = 60
 
-# Seção de Boas-Vindas e Instruções
-st.markdown("""
-<div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; border-radius: 15px; margin-bottom: 20px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
-    <h1 style="text-align: center; margin-bottom: 20px;">🎯 Bem-vindo ao Kickstarter Success Predictor!</h1>
-    <p style="text-align: center; font-size: 1.1em; margin-bottom: 30px;">
-        Sou seu assistente de IA especializado em prever o sucesso de projetos no Kickstarter.<br>
-        Posso analisar seu projeto e dar recomendações personalizadas!
-    </p>
-</div>
-""", unsafe_allow_html=True)
+def score_goal_duration(name: str, main_category: str, country: str, launched: str,
+                        goals: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """Probabilidades do mesmo projeto para vários pares (meta, duração) em uma chamada ao modelo"""
+    launch = pd.Timestamp(launched)
+    projects = pd.DataFrame({
+        'name': name,
+        'main_category': main_category,
+        'country': country,
+        'usd_goal_real': np.asarray(goals, dtype=float),
+        'launched': launch,
+        'deadline': launch + pd.to_timedelta(np.asarray(days), unit='D')
+    })
+    return predict_local_proba(projects)
 
-if not st.session_state.user_email or st.session_state.user_email == "default":
-    # Container para login rápido
-    st.markdown("""
-    <div style="background: #f8f9fa; border: 2px dashed #dee2e6; padding: 20px; border-radius: 10px; margin: 20px 0;">
-        <h3 style="text-align: center; color: #495057;">🚀 Experimente com um Usuário Demo</h3>
-        <p style="text-align: center; color: #6c757d;">Clique em um dos perfis abaixo para testar o sistema com histórico real</p>
-    </div>
-    """, unsafe_allow_html=True)
+@st.cache_data(show_spinner=False, max_entries=64)
+def compute_whatif_grid(name: str, main_category: str, country: str, launched: str,
+                        usd_goal_real: float) -> Dict[str, np.ndarray]:
+    """
+    Probabilidade de sucesso para uma grade de metas (escala log, de 1/10 a 10x a meta atual)
+    por durações de 1 a WHATIF_MAX_DAYS dias, pontuada em uma única chamada ao modelo local.
+    """
+    low = max(usd_goal_real / 10, 100.0)
+    goals = np.geomspace(low, max(usd_goal_real * 10, low * 10), WHATIF_GOAL_POINTS).round(2)
+    durations = np.unique(np.linspace(1, WHATIF_MAX_DAYS, WHATIF_DURATION_POINTS).round().astype(int))
     
-    # Três colunas para os botões
-    demo_col1, demo_col2, demo_col3 = st.columns(3)
+    # Linhas = durações, colunas = metas (formato esperado pelo go.Heatmap)
+    goal_grid, duration_grid = np.meshgrid(goals, durations)
+    probabilities = score_goal_duration(
+        name, main_category, country, launched, goal_grid.ravel(), duration_grid.ravel()
+    ).reshape(duration_grid.shape)
+    return {"goals": goals, "durations": durations, "probabilities": probabilities}
+
+def build_whatif_figure(grid: Dict[str, np.ndarray], threshold: float, goal: float, days: int) -> go.Figure:
+    """Heatmap da grade "e se?" com a curva do threshold e o ponto do projeto atual"""
+    z = grid["probabilities"] * 100
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(
+        x=grid["goals"], y=grid["durations"], z=z,
+        zmin=0, zmax=100, colorscale='RdYlGn',
+        colorbar={'title': 'Prob. (%)'},
+        hovertemplate="Meta: $%{x:,.0f}<br>Duração: %{y} dias<br>Probabilidade: %{z:.1f}%<extra></extra>"
+    ))
+    fig.add_trace(go.Contour(
+        x=grid["goals"], y=grid["durations"], z=z,
+        contours={'start': threshold * 100, 'end': threshold * 100, 'size': 1, 'coloring': 'lines'},
+        line={'color': 'black', 'width': 2, 'dash': 'dash'},
+        showscale=False, hoverinfo='skip', name='Threshold'
+    ))
+    fig.add_trace(go.Scatter(
+        x=[goal], y=[days], mode='markers',
+        marker={'symbol': 'x', 'size': 12, 'color': 'black'},
+        name='Seu projeto', hovertemplate="Seu projeto: $%{x:,.0f} em %{y} dias<extra></extra>"
+    ))
+    fig.update_layout(
+        title=f'E se...? Probabilidade por meta × duração (tracejado = threshold {threshold:.0%})',
+        xaxis={'title': 'Meta (USD)', 'type': 'log'},
+        yaxis={'title': 'Duração (dias)'},
+        showlegend=False,
+        height=400
+    )
+    return fig
+
+# Otimizador de meta/duração
+OPTIMIZER_COARSE_POINTS = 48   # metas em escala log somadas aos pontos de corte do modelo
+OPTIMIZER_SECTIONS = 8         # pontos internos avaliados por intervalo a cada iteração
+OPTIMIZER_ITERATIONS = 4       # cada iteração reduz o intervalo 9x
+OPTIMIZER_WAVE_DAYS = 10       # durações avaliadas por chamada ao modelo na segunda fase
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def model_goal_breakpoints(main_category: str) -> Dict[str, np.ndarray]:
+    """
+    Metas (USD) onde alguma árvore do modelo muda de lado, extraídas dos splits das features
+    derivadas da meta. Entre dois cortes consecutivos a probabilidade é constante (exceto
+    pela feature goal_rounded). 'per_day' está em USD/dia e deve ser multiplicado pela duração.
+    """
+    artifact = load_local_model()
+    preprocessor = artifact['preprocessor']
+    scaler = preprocessor.scaler
+    scaled_names = list(scaler.feature_names_in_)
     
-    with demo_col1:
-        st.markdown("""
-        <div style="text-align: center; padding: 10px;">
-            <h4>👨‍💼 João Silva</h4>
-            <p style="font-size: 0.9em; color: #666;">
-                Gerente de Projetos<br>
-                5 anos experiência<br>
-                Taxa sucesso: 80%<br>
-                <span style="color: #28a745;">✓ Technology ✓ Design</span>
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        if st.button("Entrar como João", key="btn_joao", use_container_width=True, type="primary"):
-            st.session_state.user_email = "joao@example.com"
-            st.session_state.user_data = USERS_DATABASE["joao@example.com"]
-            st.success("✅ Logado como João Silva!")
-            time.sleep(1)
-            st.rerun()
+    thresholds = {}
+    for tree in np.ravel(getattr(artifact['model'], 'estimators_', [])):
+        nodes = tree.tree_.feature >= 0
+        for feature, threshold in zip(tree.tree_.feature[nodes], tree.tree_.threshold[nodes]):
+            thresholds.setdefault(artifact['feature_names'][feature], []).append(threshold)
     
-    with demo_col2:
-        st.markdown("""
-        <div style="text-align: center; padding: 10px;">
-            <h4>👩‍💻 Maria Santos</h4>
-            <p style="font-size: 0.9em; color: #666;">
-                Analista de Projetos<br>
-                3 anos experiência<br>
-                Taxa sucesso: 65%<br>
-                <span style="color: #17a2b8;">✓ Games ✓ Art</span>
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        if st.button("Entrar como Maria", key="btn_maria", use_container_width=True):
-            st.session_state.user_email = "maria@example.com"
-            st.session_state.user_data = USERS_DATABASE["maria@example.com"]
-            st.success("✅ Logada como Maria Santos!")
-            time.sleep(1)
-            st.rerun()
+    def unscaled(feature):
+        if feature not in thresholds:
+            return np.empty(0)
+        i = scaled_names.index(feature)
+        return np.asarray(thresholds[feature]) * scaler.scale_[i] + scaler.mean_[i]
     
-    with demo_col3:
-        st.markdown("""
-        <div style="text-align: center; padding: 10px;">
-            <h4>👨‍🎨 Pedro Oliveira</h4>
-            <p style="font-size: 0.9em; color: #666;">
-                Coordenador<br>
-                8 anos experiência<br>
-                Taxa sucesso: 90%<br>
+    cat_stats = preprocessor.category_stats
+    median_goal = cat_stats['cat_median_goal'].get(main_category, cat_stats['cat_median_goal'].mean())
+    return {
+        "static": np.unique(np.concatenate([
+            unscaled('usd_goal_real'),
+            10 ** unscaled('goal_magnitude'),
+            unscaled('goal_category_ratio') * median_goal
+        ])),
+        "per_day": np.unique(unscaled('goal_per_day'))
+    }
+
+def _goal_lattice(goals: np.ndarray, rounded) -> np.ndarray:
+    """
+    Ajusta metas para dólares inteiros dentro dos limites do formulário. Múltiplos de $1000
+    ativam a feature goal_rounded, então metas redondas e não redondas são buscadas separadamente.
+    """
+    goals = np.clip(goals, GOAL_MIN_USD, GOAL_MAX_USD)
+    round_goals = np.clip(np.round(goals / 1000) * 1000, 1000, GOAL_MAX_USD)
+    plain_goals = np.round(goals)
+    plain_goals = np.where(
+        plain_goals % 1000 == 0,
+        np.where(plain_goals < GOAL_MAX_USD, plain_goals + 1, plain_goals - 1),
+        plain_goals
+    )
+    return np.where(rounded, round_goals, plain_goals)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def optimize_goal_duration(name: str, main_category: str, country: str, launched: str,
+                           usd_goal_real: float, campaign_days: int, threshold: float) -> Dict[str, Any]:
+    """
+    Menor ajuste de meta e/ou duração que leva a probabilidade ao threshold.
+    A mudança é medida em escala log: |ln(meta/meta atual)| + |ln(dias/dias atuais)|.
+    
+    Para cada duração de 1 a WHATIF_MAX_DAYS, a grade de metas tem um ponto em cada intervalo
+    entre cortes do modelo (redondo e não redondo), então nenhuma faixa viável fica de fora.
+    A duração atual e a meta atual em todas as durações são avaliadas primeiro; a melhor mudança
+    encontrada limita quais metas das demais durações ainda precisam ser avaliadas. Cada mudança
+    de viabilidade entre pontos vizinhos vira um intervalo refinado por busca k-section, e
+    vence o candidato com a menor mudança.
+    """
+    score = lambda goals, days: score_goal_duration(name, main_category, country, launched, goals, days)
+    days = np.arange(1, WHATIF_MAX_DAYS + 1)
+    log_goal = np.log(usd_goal_real)
+    day_change = np.abs(np.log(days / campaign_days))
+    breakpoints = model_goal_breakpoints(main_category)
+    log_grid = np.exp(np.linspace(np.log(GOAL_MIN_USD), np.log(GOAL_MAX_USD), OPTIMIZER_COARSE_POINTS))
+    
+    def grid_for(day):
+        # Um ponto (média geométrica) por intervalo entre cortes, nos dois lattices, mais a meta atual
+        cuts = np.concatenate([breakpoints["static"], breakpoints["per_day"] * day, log_grid])
+        cuts = np.concatenate([[GOAL_MIN_USD], np.unique(cuts[(cuts > GOAL_MIN_USD) & (cuts < GOAL_MAX_USD)]), [GOAL_MAX_USD]])
+        middles = np.sqrt(cuts[1:] * cuts[:-1])
+        return np.unique(np.concatenate([_goal_lattice(middles, False), _goal_lattice(middles, True), [usd_goal_real]]))
+    
+    # Fase 1: todas as metas na duração atual e a meta atual em todas as durações
+    grids = {campaign_days: grid_for(campaign_days)}
+    current_size = grids[campaign_days].size
+    probabilities = score(
+        np.concatenate([grids[campaign_days], np.full(days.size, usd_goal_real)]),
+        np.concatenate([np.full(current_size, campaign_days), days])
+    )
+    evaluations = probabilities.size
+    feasible = {campaign_days: probabilities[:current_size] >= threshold}
+    duration_ok = probabilities[current_size:] >= threshold
+    
+    bound = np.inf
+    if feasible[campaign_days].any():
+        bound = np.abs(np.log(grids[campaign_days][feasible[campaign_days]]) - log_goal).min()
+    if duration_ok.any():
+        bound = min(bound, day_change[duration_ok].min())
+    
+    # Fase 2: demais durações, das mais próximas para as mais distantes, só onde a mudança < bound
+    others = [day for day in days[np.argsort(day_change, kind="stable")] if day != campaign_days]
+    for i in range(0, len(others), OPTIMIZER_WAVE_DAYS):
+        wave = [day for day in others[i:i + OPTIMIZER_WAVE_DAYS] if day_change[day - 1] < bound]
+        if not wave:
+            break
+        for day in wave:
+            goals = grid_for(day)
+            grids[day] = goals[np.abs(np.log(goals) - log_goal) + day_change[day - 1] < bound]
+        wave_goals = np.concatenate([grids[day] for day in wave])
+        # O bound pode filtrar todas as metas da onda; o scaler não aceita lote vazio
+        wave_ok = np.zeros(0, dtype=bool)
+        if wave_goals.size:
+            wave_ok = score(wave_goals, np.concatenate([np.full(grids[day].size, day) for day in wave])) >= threshold
+        evaluations += wave_ok.size
+        for day, ok in zip(wave, np.split(wave_ok, np.cumsum([grids[day].size for day in wave])[:-1])):
+            feasible[day] = ok
+            if ok.any():
+                bound = min(bound, np.abs(np.log(grids[day][ok]) - log_goal).min() + day_change[day - 1])
+    
+    # Candidatos: pontos viáveis da grade e intervalos (inviável, viável) em cada mudança de sinal
+    cand_goals = [np.full(duration_ok.sum(), usd_goal_real)]
+    cand_days = [days[duration_ok]]
+    bracket_days, inner, outer, rounded = [], [], [], []
+    for day, goals in grids.items():
+        ok = feasible[day]
+        cand_goals.append(goals[ok])
+        cand_days.append(np.full(ok.sum(), day))
+        for is_round in (False, True):
+            lattice = (goals % 1000 == 0) == is_round
+            lattice_goals, lattice_ok = goals[lattice], ok[lattice]
+            flips = np.flatnonzero(lattice_ok[1:] != lattice_ok[:-1])
+            inner.append(np.where(lattice_ok[flips], lattice_goals[flips + 1], lattice_goals[flips]))
+            outer.append(np.where(lattice_ok[flips], lattice_goals[flips], lattice_goals[flips + 1]))
+            bracket_days.append(np.full(flips.size, day))
+            rounded.append(np.full(flips.size, is_round))
+    cand_goals, cand_days = np.concatenate(cand_goals), np.concatenate(cand_days)
+    inner, outer = np.log(np.concatenate(inner)), np.log(np.concatenate(outer))
+    bracket_days, rounded = np.concatenate(bracket_days), np.concatenate(rounded)
+    
+    # Só vale refinar quando o lado inviável está mais perto da meta atual e ainda pode vencer
+    change = lambda goals, days: np.abs(np.log(goals) - log_goal) + np.abs(np.log(days / campaign_days))
+    cand_change = change(cand_goals, cand_days)
+    best_any = cand_change.min() if cand_change.size else np.inf
+    at_current = cand_days == campaign_days
+    best_goal_only = cand_change[at_current].min() if at_current.any() else np.inf
+    inner_change = change(np.exp(inner), bracket_days)
+    useful = (np.abs(inner - log_goal) < np.abs(outer - log_goal)) & (
+        (inner_change < best_any) | ((bracket_days == campaign_days) & (inner_change < best_goal_only))
+    )
+    bracket_days, inner, outer, rounded = bracket_days[useful], inner[useful], outer[useful], rounded[useful]
+    
+    fractions = np.arange(1, OPTIMIZER_SECTIONS + 1) / (OPTIMIZER_SECTIONS + 1)
+    for _ in range(OPTIMIZER_ITERATIONS):
+        if not bracket_days.size:
+            break
+        # Pontuar as metas já ajustadas (exp(log(x)) perderia os múltiplos exatos de $1000)
+        section_goals = _goal_lattice(np.exp(inner[:, None] + (outer - inner)[:, None] * fractions), rounded[:, None])
+        points = np.log(section_goals)
+        ok = score(section_goals.ravel(), np.repeat(bracket_days, OPTIMIZER_SECTIONS))
+        ok = ok.reshape(points.shape) >= threshold
+        evaluations += ok.size
+        # Primeiro ponto viável a partir do lado inviável; sem nenhum, o intervalo encolhe até o último ponto
+        first = np.where(ok.any(axis=1), ok.argmax(axis=1), OPTIMIZER_SECTIONS)
+        rows = np.arange(bracket_days.size)
+        outer = np.where(first < OPTIMIZER_SECTIONS, points[rows, np.minimum(first, OPTIMIZER_SECTIONS - 1)], outer)
+        inner = np.where(first > 0, points[rows, np.maximum(first - 1, 0)], inner)
+    
+    # Confirmar todos os candidatos com uma última avaliação
+    goals = np.concatenate([cand_goals, np.round(np.exp(outer))])
+    goal_days = np.concatenate([cand_days, bracket_days])
+    if not goals.size:
+        # Nenhuma combinação viável nem intervalo a refinar: nada a sugerir
+        return {"goal_only": None, "duration_only": None, "combined": None, "evaluations": evaluations}
+    probabilities = score(goals, goal_days)
+    evaluations += probabilities.size
+    valid = probabilities >= threshold
+    total_change = change(goals, goal_days)
+    
+    def best(mask):
+        if not mask.any():
+            return None
+        i = np.flatnonzero(mask)[np.argmin(total_change[mask])]
+        return {
+            "usd_goal_real": float(goals[i]),
+            "campaign_days": int(goal_days[i]),
+            "success_probability": float(probabilities[i]),
+            "change": float(total_change[i])
+        }
+    
+    return {
+        "goal_only": best(valid & (goal_days == campaign_days)),
+        "duration_only": best(valid & (goals == usd_goal_real)),
+        "combined": best(valid),
+        "evaluations": evaluations
+    }
+
+# Adicionar estas funções ao código do app_streamlit_hybrid_completo.py
+
+# Dicionário de correções comuns aplicadas por preprocess_message
+TEXT_CORRECTIONS = {
+    # Erros de digitação comuns
+    'categria': 'categoria',
+    'categorai': 'categoria',
+    'catgoria': 'categoria',
+    'categora': 'categoria',
+    
+    # Variações de palavras
+    'dolar': 'dollar',
+    'dolares': 'dollars',
+    'reais': 'dollars',  # Assumir conversão
+    
+    # Abreviações de valores
+    'k ': '000 ',
+    'mil ': '000 ',
+    
+    # Países
+    'brasil': 'BR',
+    'estados unidos': 'US',
+    'eua': 'US',
+    'usa': 'US',
+    
+    # Categorias em português
+    'tecnologia': 'Technology',
+    'jogos': 'Games',
+    'música': 'Music',
+    'musica': 'Music',
+    'arte': 'Art',
+    'filmes': 'Film & Video',
+    'filme': 'Film & Video',
+    'video': 'Film & Video',
+    'vídeo': 'Film & Video',
+    'design': 'Design',
+    'comida': 'Food',
+    'teatro': 'Theater',
+    'dança': 'Dance',
+    'danca': 'Dance',
+    'fotografia': 'Photography',
+    'moda': 'Fashion',
+    'artesanato': 'Crafts',
+    'publicação': 'Publishing',
+    'publicacao': 'Publishing',
+    'quadrinhos': 'Comics',
+    'jornalismo': 'Journalism'
+}
+
+# Todas as correções em uma única expressão, compilada uma vez. As mais longas vêm
+# primeiro para que, na mesma posição, a alternativa mais específica ganhe.
+TEXT_CORRECTIONS_PATTERN = re.compile(
+    "|".join(
+        r'\b' + re.escape(wrong) + r'\b'
+        for wrong in sorted(TEXT_CORRECTIONS, key=len, reverse=True)
+    ),
+    re.IGNORECASE
+)
+
+def _apply_correction(match: re.Match) -> str:
+    return TEXT_CORRECTIONS[match.group(0).lower()]
+
+def preprocess_message(message: str) -> str:
+    """
+    Pré-processa a mensagem para corrigir erros comuns.
+    Aplica todas as correções em uma única passada linear pelo texto.
+    """
+    return TEXT_CORRECTIONS_PATTERN.sub(_apply_correction, message)
+
+def _preprocess_message_sequential(message: str) -> str:
+    """Implementação anterior (uma re.sub por correção), mantida como referência do benchmark"""
+    result = message
+    for wrong, correct in TEXT_CORRECTIONS.items():
+        pattern = r'\b' + re.escape(wrong) + r'\b'
+        result = re.sub(pattern, correct, result, flags=re.IGNORECASE)
+    return result
+
+def benchmark_preprocess_message(message: str, repeats: int = 50) -> Dict[str, Any]:
+    """Compara o normalizador de passada única com a implementação sequencial"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        sequential_output = _preprocess_message_sequential(message)
+    sequential_ms = (time.perf_counter() - start) * 1000 / repeats
+    
+    start = time.perf_counter()
+    for _ in range(repeats):
+        single_pass_output = preprocess_message(message)
+    single_pass_ms = (time.perf_counter() - start) * 1000 / repeats
+    
+    return {
+        "chars": len(message),
+        "sequential_ms": sequential_ms,
+        "single_pass_ms": single_pass_ms,
+        "speedup": sequential_ms / single_pass_ms if single_pass_ms else float("inf"),
+        "same_output": sequential_output == single_pass_output
+    }
+
+# Pipeline de extração em camadas: parser chave/valor → regex → spaCy → LLM.
+# A extração para na primeira camada que completar os campos obrigatórios.
+EXTRACTION_REQUIRED_FIELDS = ('nome', 'categoria', 'meta')
+
+# Orçamento de tempo de cada camada (ms). spaCy e LLM rodam em threads e são
+# abandonados quando estouram o orçamento; as camadas locais rápidas rodam direto
+# e o estouro fica registrado no trace da extração.
+EXTRACTION_TIER_BUDGETS_MS = {
+    "keyvalue": float(os.getenv("EXTRACTION_BUDGET_KEYVALUE_MS", "5")),
+    "regex": float(os.getenv("EXTRACTION_BUDGET_REGEX_MS", "50")),
+    "spacy": float(os.getenv("EXTRACTION_BUDGET_SPACY_MS", "500")),
+    "llm": float(os.getenv("EXTRACTION_BUDGET_LLM_MS", "10000"))
+}
+
+# Rótulos aceitos no formato recomendado "Nome: … Categoria: … Meta: …"
+KEYVALUE_LABELS = {
+    'nome': 'nome', 'name': 'nome', 'título': 'nome', 'titulo': 'nome', 'projeto': 'nome',
+    'categoria': 'categoria', 'category': 'categoria', 'tipo': 'categoria',
+    'meta': 'meta', 'goal': 'meta', 'objetivo': 'meta', 'valor': 'meta',
+    'país': 'pais', 'pais': 'pais', 'country': 'pais', 'local': 'pais',
+    'início': 'inicio', 'inicio': 'inicio', 'começa': 'inicio', 'lançamento': 'inicio', 'start': 'inicio',
+    'fim': 'fim', 'término': 'fim', 'termino': 'fim', 'deadline': 'fim', 'end': 'fim', 'até': 'fim'
+}
+
+KEYVALUE_LABEL_PATTERN = re.compile(
+    r'(?<!\w)(' + '|'.join(re.escape(label) for label in sorted(KEYVALUE_LABELS, key=len, reverse=True)) + r')\s*:',
+    re.IGNORECASE
+)
+DATE_VALUE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+COUNTRY_VALUE_PATTERN = re.compile(r'\b([A-Za-z]{2})\b')
+GOAL_VALUE_PATTERN = re.compile(r'(\d[\d.,]*)\s*(k|mil)?(?!\w)', re.IGNORECASE)
+
+def _parse_goal_value(value: str) -> Optional[float]:
+    """Converte textos como '$10,000', '10.000', '15k' ou '5 mil' em número"""
+    match = GOAL_VALUE_PATTERN.search(value)
+    if not match:
+        return None
+    number = match.group(1).rstrip('.,')
+    if re.fullmatch(r'\d{1,3}(?:[.,]\d{3})+', number):
+        # Separador de milhar (10,000 ou 10.000)
+        number = re.sub(r'[.,]', '', number)
+    elif ',' in number and '.' in number:
+        # O último separador é o decimal (10,000.50 ou 10.000,50)
+        decimal_sep = ',' if number.rfind(',') > number.rfind('.') else '.'
+        thousands_sep = '.' if decimal_sep == ',' else ','
+        number = number.replace(thousands_sep, '').replace(decimal_sep, '.')
+    else:
+        number = number.replace(',', '.')
+    try:
+        goal = float(number)
+    except ValueError:
+        return None
+    if match.group(2):
+        goal *= 1000
+    return goal
+
+def extract_fields_keyvalue(message: str) -> Dict[str, str]:
+    """
+    Parser linear do formato recomendado: uma única varredura encontra os rótulos
+    e o valor de cada um vai até o próximo rótulo.
+    """
+    labels = list(KEYVALUE_LABEL_PATTERN.finditer(message))
+    fields = {}
+    
+    for index, label in enumerate(labels):
+        field = KEYVALUE_LABELS[label.group(1).lower()]
+        if field in fields:
+            continue
+        value_end = labels[index + 1].start() if index + 1 < len(labels) else len(message)
+        value = message[label.end():value_end].strip().strip(',;')
+        if not value:
+            continue
+        
+        if field in ('inicio', 'fim'):
+            date_match = DATE_VALUE_PATTERN.search(value)
+            if date_match:
+                fields[field] = date_match.group(0)
+        elif field == 'pais':
+            country_match = COUNTRY_VALUE_PATTERN.search(value)
+            if country_match:
+                fields[field] = country_match.group(1)
+        elif field == 'meta':
+            goal = _parse_goal_value(value)
+            if goal:
+                fields[field] = f"{goal:.2f}"
+        else:
+            fields[field] = value.splitlines()[0].strip().rstrip('.')
+    
+    return fields
+
+def extract_fields_regex(message: str) -> Dict[str, str]:
+    """
+    Cascata de regex com pré-processamento (tolerante a texto livre)
+    """
+    # Pré-processar mensagem
+    processed_message = preprocess_message(message)
+    print(f"Mensagem original: {message}")
+    print(f"Mensagem processada: {processed_message}")
+    
+    # Padrões regex expandidos
+    patterns = {
+        'nome': [
+            # Padrões estruturados
+            r'nome:\s*([^\n,]+?)(?=\s+categoria:|$)',
+            r'projeto:\s*([^\n,]+?)(?=\s+categoria:|$)',
+            r'título:\s*([^\n,]+?)(?=\s+categoria:|$)',
+            
+            # Padrões mais flexíveis
+            r'meu projeto (?:é|e|se chama)\s+([^\n,]+?)(?=\s+categoria|$)',
+            r'projeto\s+([^\n,]+?)\s+(?:categoria|da categoria)',
+            r'analise?\s+(?:o\s+)?(?:meu\s+)?projeto\s+([^\n,]+?)\s+categoria',
+            
+            # Padrão mais genérico (última tentativa)
+            r'(?:projeto|nome)\s*:?\s*([a-zA-Z0-9\s\-\_]+?)(?=\s*(?:categoria|tipo|meta|$))'
+        ],
+        'categoria': [
+            # Padrões estruturados
+            r'categoria:\s*([^\n,]+?)(?=\s+meta:|$)',
+            r'tipo:\s*([^\n,]+?)(?=\s+meta:|$)',
+            r'category:\s*([^\n,]+?)(?=\s+meta:|$)',
+            
+            # Padrões flexíveis
+            r'(?:da\s+)?categoria\s+([^\n,]+?)(?=\s+meta|$)',
+            r'é\s+(?:um|uma)\s+([^\n,]+?)(?=\s+meta|com|$)',
+            
+            # Categorias entre aspas ou parênteses
+            r'categoria[:\s]+["\']([^"\']+)["\']',
+            r'categoria[:\s]+\(([^)]+)\)',
+            
+            # Padrão genérico
+            r'categoria\s*:?\s*([a-zA-Z\s&]+?)(?=\s*(?:meta|valor|$))'
+        ],
+        'meta': [
+            # Valores monetários estruturados
+            r'meta:\s*\$?\s*([\d,]+(?:\.\d{2})?)',
+            r'objetivo:\s*\$?\s*([\d,]+(?:\.\d{2})?)',
+            r'goal:\s*\$?\s*([\d,]+(?:\.\d{2})?)',
+            r'valor:\s*\$?\s*([\d,]+(?:\.\d{2})?)',
+            
+            # Valores com k/mil
+            r'meta\s*:?\s*(\d+)\s*(?:k|mil)',
+            r'(\d+)\s*(?:k|mil)\s*(?:dólares|dolares|reais|dollars)',
+            
+            # Valores entre símbolos
+            r'\$\s*([\d,]+(?:\.\d{2})?)',
+            r'R\$\s*([\d,]+(?:\.\d{2})?)',
+            
+            # Padrão genérico
+            r'meta\s*:?\s*(?:de\s+)?\$?\s*([\d,\.]+)'
+        ],
+        'pais': [
+            r'país:\s*([A-Za-z]{2})',
+            r'pais:\s*([A-Za-z]{2})',
+            r'country:\s*([A-Za-z]{2})',
+            r'local:\s*([A-Za-z]{2})',
+            r'de\s+([A-Za-z]{2})(?:\s|$)'
+        ],
+        'inicio': [
+            r'início:\s*(\d{4}-\d{2}-\d{2})',
+            r'inicio:\s*(\d{4}-\d{2}-\d{2})',
+            r'começa:\s*(\d{4}-\d{2}-\d{2})',
+            r'lançamento:\s*(\d{4}-\d{2}-\d{2})',
+            r'start:\s*(\d{4}-\d{2}-\d{2})',
+            r'data\s+(?:de\s+)?início:\s*(\d{4}-\d{2}-\d{2})'
+        ],
+        'fim': [
+            r'fim:\s*(\d{4}-\d{2}-\d{2})',
+            r'término:\s*(\d{4}-\d{2}-\d{2})',
+            r'termino:\s*(\d{4}-\d{2}-\d{2})',
+            r'deadline:\s*(\d{4}-\d{2}-\d{2})',
+            r'end:\s*(\d{4}-\d{2}-\d{2})',
+            r'data\s+(?:de\s+)?fim:\s*(\d{4}-\d{2}-\d{2})',
+            r'até:\s*(\d{4}-\d{2}-\d{2})'
+        ]
+    }
+    
+    # Extrair dados usando regex
+    extracted_data = {}
+    
+    for field, pattern_list in patterns.items():
+        for pattern in pattern_list:
+            match = re.search(pattern, processed_message, re.IGNORECASE)
+            if match:
+                extracted_data[field] = match.group(1).strip()
+                break
+    
+    # Processar valores especiais
+    if 'meta' in extracted_data:
+        meta_str = extracted_data['meta']
+        
+        # Verificar se tem 'k' ou 'mil'
+        if 'k' in message.lower() or 'mil' in message.lower():
+            # Extrair apenas números
+            numbers = re.findall(r'(\d+)', meta_str)
+            if numbers:
+                extracted_data['meta'] = str(int(numbers[0]) * 1000)
+    
+    return extracted_data
+
+def build_project_payload(fields: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Converte os campos extraídos (qualquer camada) no payload da API"""
+    if not all(key in fields for key in EXTRACTION_REQUIRED_FIELDS):
+        print(f"Dados incompletos. Extraídos: {fields}")
+        return None
+    
+    # Converter e validar dados
+    try:
+        # Limpar e converter meta
+        meta_str = fields['meta'].replace(',', '')
+        if '.' in meta_str and len(meta_str.split('.')[-1]) == 2:
+            meta = float(meta_str)
+        else:
+            meta_str = meta_str.replace('.', '')
+            meta = float(meta_str)
+        
+        # Normalizar categoria
+        categoria = normalize_category(fields['categoria'])
+        
+        # Preparar dados finais
+        project_data = {
+            "name": fields['nome'],
+            "main_category": categoria,
+            "country": fields.get('pais', 'US').upper(),
+            "usd_goal_real": meta,
+            "launched": fields.get('inicio', datetime.now().strftime("%Y-%m-%d")),
+            "deadline": fields.get('fim', (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d"))
+        }
+        
+        # Validar datas
+        launched_date = datetime.strptime(project_data['launched'], "%Y-%m-%d")
+        deadline_date = datetime.strptime(project_data['deadline'], "%Y-%m-%d")
+        
+        if deadline_date <= launched_date:
+            project_data['deadline'] = (launched_date + timedelta(days=30)).strftime("%Y-%m-%d")
+        
+        return project_data
+        
+    except Exception as e:
+        print(f"Erro na conversão: {e}")
+        return None
+
+# Vocabulário dos matchers do spaCy
+MONEY_SYMBOLS = ["$", "R$", "US$"]
+CURRENCY_WORDS = ["dólar", "dólares", "dolar", "dolares", "dollar", "dollars", "usd", "reais"]
+GOAL_CUES = ["meta", "goal", "objetivo", "valor"]
+NAME_CUES = {"projeto", "nome", "chamado", "chama", "título", "titulo", "name"}
+CATEGORY_CUES = {"categoria", "category", "tipo"}
+START_DATE_CUES = {"início", "inicio", "começa", "lançamento", "start"}
+END_DATE_CUES = {"fim", "término", "termino", "deadline", "end", "até", "ate"}
+NAME_STOP_WORDS = {"categoria", "category", "tipo", "meta", "goal", "da", "do", "na", "no", "com", "em", "para", "e", "é"}
+COUNTRY_ALIASES = {"brasil": "BR", "eua": "US", "usa": "US", "estados unidos": "US", "inglaterra": "GB"}
+SHORTHAND_THOUSANDS = r"^\d+(?:[.,]\d+)?[kK]$"
+
+@st.cache_resource(show_spinner=False)
+def get_spacy_matchers(_nlp, model_name: str) -> Dict[str, Any]:
+    """PhraseMatcher/Matcher do extrator, construídos uma vez por pipeline carregado"""
+    from spacy.matcher import Matcher, PhraseMatcher
+    
+    categories = PhraseMatcher(_nlp.vocab, attr="LOWER")
+    for category in VALID_CATEGORIES:
+        categories.add(category, [_nlp.make_doc(category)])
+    for term, category in CATEGORY_MAPPING.items():
+        categories.add(category, [_nlp.make_doc(term)])
+    
+    # Códigos só em maiúsculas (evita que "de" vire DE); nomes sem diferenciar caixa
+    country_codes = PhraseMatcher(_nlp.vocab, attr="ORTH")
+    for code in COUNTRIES:
+        country_codes.add(code, [_nlp.make_doc(code)])
+    country_names = PhraseMatcher(_nlp.vocab, attr="LOWER")
+    for code, name in COUNTRIES.items():
+        country_names.add(code, [_nlp.make_doc(name)])
+    for alias, code in COUNTRY_ALIASES.items():
+        country_names.add(code, [_nlp.make_doc(alias)])
+    
+    patterns = Matcher(_nlp.vocab)
+    amount = {"LIKE_NUM": True, "OP": "+"}
+    patterns.add("GOAL_CUE", [
+        [{"LOWER": {"IN": GOAL_CUES}}, {"ORTH": ":", "OP": "?"}, {"LOWER": "de", "OP": "?"},
+         {"ORTH": {"IN": MONEY_SYMBOLS}, "OP": "?"}, amount],
+        [{"LOWER": {"IN": GOAL_CUES}}, {"ORTH": ":", "OP": "?"}, {"LOWER": "de", "OP": "?"},
+         {"TEXT": {"REGEX": SHORTHAND_THOUSANDS}}]
+    ], greedy="LONGEST")
+    patterns.add("MONEY", [
+        [{"ORTH": {"IN": MONEY_SYMBOLS}}, amount],
+        [amount, {"LOWER": {"IN": CURRENCY_WORDS}}],
+        [{"TEXT": {"REGEX": SHORTHAND_THOUSANDS}}]
+    ], greedy="LONGEST")
+    patterns.add("DATE", [[{"TEXT": {"REGEX": r"^\d{4}-\d{2}-\d{2}$"}}]])
+    
+    return {
+        "categories": categories,
+        "country_codes": country_codes,
+        "country_names": country_names,
+        "patterns": patterns
+    }
+
+def _money_span_value(span) -> Optional[float]:
+    """Valor de um trecho monetário ("$ 10,000", "15 mil", "10k", "10 000 dólares")"""
+    amount = " ".join(
+        token.text for token in span
+        if token.like_num or re.match(SHORTHAND_THOUSANDS, token.text)
+    )
+    # Milhares separados por espaço ("10 000") viram um único número
+    amount = re.sub(r'(?<=\d) (?=\d{3}(?!\d))', '', amount)
+    return _parse_goal_value(amount)
+
+def _fields_from_doc(doc, matchers: Dict[str, Any]) -> Dict[str, str]:
+    """Campos do projeto a partir de um Doc já processado"""
+    fields = {}
+    nlp_vocab = doc.vocab
+    matched_tokens = set()
+    
+    # Categoria: prefere a que vem logo depois de "categoria"/"tipo"
+    category_matches = sorted(matchers["categories"](doc), key=lambda m: m[1])
+    if category_matches:
+        cued = [
+            m for m in category_matches
+            if any(token.lower_ in CATEGORY_CUES for token in doc[max(m[1] - 3, 0):m[1]])
+        ]
+        match_id, start, end = (cued or category_matches)[0]
+        fields['categoria'] = nlp_vocab.strings[match_id]
+    for _, start, end in category_matches:
+        matched_tokens.update(range(start, end))
+    
+    # País: códigos exatos ou nomes
+    country_matches = sorted(
+        list(matchers["country_codes"](doc)) + list(matchers["country_names"](doc)),
+        key=lambda m: m[1]
+    )
+    if country_matches:
+        fields['pais'] = nlp_vocab.strings[country_matches[0][0]]
+    for _, start, end in country_matches:
+        matched_tokens.update(range(start, end))
+    
+    # Meta e datas
+    goal_spans, dates = [], []
+    for match_id, start, end in sorted(matchers["patterns"](doc), key=lambda m: m[1]):
+        label = nlp_vocab.strings[match_id]
+        matched_tokens.update(range(start, end))
+        if label == "DATE":
+            dates.append((start, doc[start].text))
+        else:
+            goal_spans.append((label != "GOAL_CUE", start, doc[start:end]))
+    for _, _, span in sorted(goal_spans, key=lambda g: (g[0], g[1])):
+        goal = _money_span_value(span)
+        if goal:
+            fields['meta'] = f"{goal:.2f}"
+            break
+    
+    for start, date in dates:
+        context = {token.lower_ for token in doc[max(start - 3, 0):start]}
+        if context & END_DATE_CUES and 'fim' not in fields:
+            fields['fim'] = date
+        elif context & START_DATE_CUES and 'inicio' not in fields:
+            fields['inicio'] = date
+        elif 'inicio' not in fields:
+            fields['inicio'] = date
+        elif 'fim' not in fields:
+            fields['fim'] = date
+    
+    # Nome: tokens depois de "projeto"/"nome"/"chamado" até o próximo campo reconhecido
+    for token in doc:
+        if token.lower_ not in NAME_CUES:
+            continue
+        name_tokens = []
+        for candidate in doc[token.i + 1:]:
+            if not name_tokens and (candidate.is_punct or candidate.lower_ in ("é", "e", "o", "se", "chama", "meu")):
+                continue
+            if (candidate.i in matched_tokens or candidate.is_punct or candidate.is_space
+                    or candidate.lower_ in NAME_STOP_WORDS or candidate.lower_ in NAME_CUES):
+                break
+            name_tokens.append(candidate.text)
+        if name_tokens:
+            fields['nome'] = " ".join(name_tokens)
+            break
+    
+    # Sem pista explícita, usa as entidades do modelo (quando houver NER)
+    if 'nome' not in fields:
+        for ent in doc.ents:
+            if (ent.label_ in ('ORG', 'MISC', 'PER', 'PERSON', 'PRODUCT', 'WORK_OF_ART')
+                    and not matched_tokens.intersection(range(ent.start, ent.end))):
+                fields['nome'] = ent.text
+                break
+    
+    return fields
+
+def extract_fields_spacy(message: str) -> Dict[str, str]:
+    """
+    Extração com spaCy: PhraseMatcher para categorias e países,
+    Matcher para valores monetários e datas
+    """
+    nlp = get_spacy_pipeline()
+    if nlp is None:
+        return {}
+    matchers = get_spacy_matchers(nlp, get_spacy_status()["model"])
+    return _fields_from_doc(nlp(message), matchers)
+
+def warm_spacy_extraction():
+    """Carrega o pipeline e os matchers do spaCy (uma vez por processo) antes da camada ser cronometrada"""
+    nlp = get_spacy_pipeline()
+    if nlp is not None:
+        get_spacy_matchers(nlp, get_spacy_status()["model"])
+
+def extract_projects_batch(messages: list, batch_size: int = 256, n_process: int = 1) -> list:
+    """
+    Extrai projetos de muitas mensagens de uma vez com nlp.pipe.
+    Retorna, para cada mensagem, os campos encontrados e o payload (ou None).
+    """
+    nlp = get_spacy_pipeline()
+    if nlp is None:
+        raise RuntimeError("spaCy não está instalado")
+    matchers = get_spacy_matchers(nlp, get_spacy_status()["model"])
+    texts = ["" if message is None else str(message) for message in messages]
+    
+    results = []
+    for text, doc in zip(texts, nlp.pipe(texts, batch_size=batch_size, n_process=n_process)):
+        # O parser chave/valor é barato e mais preciso no formato recomendado
+        fields = extract_fields_keyvalue(text)
+        for field, value in _fields_from_doc(doc, matchers).items():
+            fields.setdefault(field, value)
+        complete = all(field in fields for field in EXTRACTION_REQUIRED_FIELDS)
+        results.append({
+            "fields": fields,
+            "project": build_project_payload(fields) if complete else None
+        })
+    return results
+
+# Modelo da camada OpenAI da extração (precisa suportar structured outputs)
+EXTRACTION_LLM_MODEL = os.getenv("EXTRACTION_LLM_MODEL", "gpt-4o-mini")
+EXTRACTION_LLM_MAX_TOKENS = 150
+
+try:
+    from pydantic import BaseModel, Field
+    
+    class ProjectExtraction(BaseModel):
+        """Esquema da resposta da OpenAI na extração: a resposta sempre chega nesse formato"""
+        name: str = Field(description="nome do projeto")
+        main_category: Literal[tuple(sorted(VALID_CATEGORIES))]
+        usd_goal_real: float = Field(description="meta em dólares")
+        country: Optional[str] = Field(description="código ISO de 2 letras")
+        launched: Optional[str] = Field(description="início, YYYY-MM-DD")
+        deadline: Optional[str] = Field(description="fim, YYYY-MM-DD")
+except ImportError:
+    ProjectExtraction = None
+
+EXTRACTION_LLM_PROMPT = (
+    "Extraia o projeto Kickstarter da mensagem do usuário. "
+    "Se nome, categoria ou meta não forem informados, deduza valores plausíveis; "
+    "país e datas não informados ficam null."
+)
+
+def extract_fields_llm(message: str) -> Dict[str, str]:
+    """
+    Extração via OpenAI (última camada, usada quando as locais não bastam).
+    Usa structured outputs com o esquema ProjectExtraction: uma chamada curta, sem parsing de texto livre.
+    """
+    if not (OPENAI_AVAILABLE and client) or ProjectExtraction is None:
+        return {}
+    
+    # A mesma mensagem sendo extraída em outra sessão reaproveita a chamada em andamento
+    messages = [
+        {"role": "system", "content": EXTRACTION_LLM_PROMPT},
+        {"role": "user", "content": message}
+    ]
+    completion = get_singleflight().do(
+        ("extract", EXTRACTION_LLM_MODEL, message),
+        lambda: limited_openai_call(
+            lambda openai_client: openai_client.beta.chat.completions.parse(
+                model=EXTRACTION_LLM_MODEL,
+                messages=messages,
+                response_format=ProjectExtraction,
+                temperature=0,
+                max_tokens=EXTRACTION_LLM_MAX_TOKENS
+            ),
+            messages, EXTRACTION_LLM_MAX_TOKENS,
+            # O orçamento da camada vale para a fila e para a requisição
+            deadline=time.monotonic() + EXTRACTION_TIER_BUDGETS_MS["llm"] / 1000
+        )
+    )
+    
+    extraction = completion.choices[0].message.parsed
+    if extraction is None:
+        # Recusa do modelo
+        return {}
+    
+    fields = {
+        'nome': extraction.name.strip(),
+        'categoria': extraction.main_category,
+        'meta': f"{extraction.usd_goal_real:.2f}"
+    }
+    if extraction.country:
+        fields['pais'] = extraction.country.strip().upper()[:2]
+    for key, field in (('launched', 'inicio'), ('deadline', 'fim')):
+        value = getattr(extraction, key)
+        if value and DATE_VALUE_PATTERN.fullmatch(value.strip()):
+            fields[field] = value.strip()
+    return fields
+
+# Camadas na ordem em que são tentadas: (id, rótulo exibido, extrator, roda em thread)
+EXTRACTION_TIERS = [
+    ("keyvalue", "Parser chave/valor (local/gratuito)", extract_fields_keyvalue, False),
+    ("regex", "Regex (local/gratuito)", extract_fields_regex, False),
+    ("spacy", "spaCy (local/gratuito)", extract_fields_spacy, True),
+    ("llm", f"OpenAI {EXTRACTION_LLM_MODEL}", extract_fields_llm, True)
+]
+
+# Camadas tolerantes cujos campos são provisórios: uma camada seguinte mais precisa os substitui
+# (ex.: a regex pega "EcoBottle Design 5000 dollars" como nome onde o spaCy acha "EcoBottle")
+EXTRACTION_PROVISIONAL_TIERS = {"regex"}
+
+# Preparação única por processo de cada camada, feita fora do orçamento dela
+# (senão a primeira extração após o start sempre estoura e cai na OpenAI)
+EXTRACTION_TIER_WARMUPS = {
+    "spacy": warm_spacy_extraction
+}
+
+@st.cache_resource(show_spinner=False)
+def get_extraction_executor() -> ThreadPoolExecutor:
+    """Threads compartilhadas pelas camadas lentas da extração"""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="extraction")
+
+def run_extraction_pipeline(message: str, tiers: list):
+    """
+    Executa as camadas em ordem, acumulando os campos encontrados. Campos de camadas
+    anteriores têm prioridade, exceto os provisórios (EXTRACTION_PROVISIONAL_TIERS).
+    Retorna (campos brutos, rótulo da camada que completou, trace por camada);
+    os campos são None se nenhuma camada completar os obrigatórios.
+    """
+    fields = {}
+    sources = {}
+    trace = []
+    
+    for tier_id, label, extractor, threaded in tiers:
+        budget_ms = EXTRACTION_TIER_BUDGETS_MS[tier_id]
+        if tier_id in EXTRACTION_TIER_WARMUPS:
+            try:
+                EXTRACTION_TIER_WARMUPS[tier_id]()
+            except Exception as e:
+                print(f"Erro ao preparar a camada {tier_id}: {e}")
+        start = time.perf_counter()
+        try:
+            if threaded:
+                future = get_extraction_executor().submit(extractor, message)
+                tier_fields = future.result(timeout=budget_ms / 1000)
+            else:
+                tier_fields = extractor(message)
+            status = "ok"
+        except FutureTimeoutError:
+            future.cancel()
+            tier_fields, status = {}, "timeout"
+        except Exception as e:
+            print(f"Erro na camada {tier_id}: {e}")
+            tier_fields, status = {}, "erro"
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if status == "ok" and elapsed_ms > budget_ms:
+            status = "acima do orçamento"
+        
+        # Camadas anteriores têm prioridade; as seguintes completam lacunas e corrigem provisórios
+        for field, value in tier_fields.items():
+            if not value:
+                continue
+            if field not in fields or (
+                sources[field] in EXTRACTION_PROVISIONAL_TIERS and tier_id not in EXTRACTION_PROVISIONAL_TIERS
+            ):
+                fields[field] = value
+                sources[field] = tier_id
+        
+        complete = all(field in fields for field in EXTRACTION_REQUIRED_FIELDS)
+        trace.append({"tier": tier_id, "ms": elapsed_ms, "status": status, "complete": complete})
+        if complete:
+            return fields, label, trace
+    
+    return None, None, trace
+
+# Cache de extrações compartilhado entre sessões (mensagem normalizada -> campos e camada)
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "1024"))
+EXTRACTION_CACHE_TTL = float(os.getenv("EXTRACTION_CACHE_TTL", str(24 * 3600)))
+
+@st.cache_resource(show_spinner=False)
+def get_extraction_cache() -> PredictionCache:
+    """Cache de extrações único por processo (mesma estrutura LRU/TTL do cache de predições)"""
+    return PredictionCache(EXTRACTION_CACHE_SIZE, EXTRACTION_CACHE_TTL)
+
+def extraction_cache_key(message: str, tier_ids: list) -> str:
+    """
+    Mensagens que só diferem em espaços e maiúsculas/minúsculas têm a mesma chave.
+    As camadas ativas entram na chave: sessões "só OpenAI" e com camadas locais não compartilham resultados.
+    """
+    return "+".join(tier_ids) + "|" + " ".join(message.split()).casefold()
+
+def extract_project_info_from_message(message):
+    """
+    Extrai informações do projeto da mensagem do usuário.
+    Resultados ficam no cache de extrações: a mesma mensagem não passa de novo pelas camadas (nem pela OpenAI).
+    """
+    tiers = []
+    # Camadas locais SE ESTIVEREM ATIVADAS
+    if st.session_state.use_spacy:
+        tiers += [tier for tier in EXTRACTION_TIERS if tier[0] in ("keyvalue", "regex")]
+        if SPACY_AVAILABLE:
+            tiers += [tier for tier in EXTRACTION_TIERS if tier[0] == "spacy"]
+    # Se as locais falharem ou estiverem desativadas e OpenAI estiver disponível
+    if OPENAI_AVAILABLE and client:
+        tiers += [tier for tier in EXTRACTION_TIERS if tier[0] == "llm"]
+    
+    cache = get_extraction_cache()
+    cache_key = extraction_cache_key(message, [tier[0] for tier in tiers])
+    start = time.perf_counter()
+    cached = cache.get(cache_key)
+    if cached is not None:
+        st.session_state.extraction_trace = [{
+            "tier": f"cache ({cached['tier']})" if cached['tier'] else "cache",
+            "ms": (time.perf_counter() - start) * 1000,
+            "status": "ok",
+            "complete": cached['fields'] is not None
+        }]
+        if cached['fields'] is None:
+            return None
+        st.session_state.extraction_method = f"{cached['method']} · cache"
+        # Os campos brutos são guardados para que datas padrão sejam recalculadas a cada uso
+        return build_project_payload(cached['fields'])
+    
+    fields, method, trace = run_extraction_pipeline(message, tiers)
+    st.session_state.extraction_trace = trace
+    
+    if fields:
+        if trace[-1]["tier"] == "llm":
+            method = f"{method} (principal)" if not st.session_state.use_spacy else f"{method} (fallback)"
+        st.session_state.extraction_method = method
+        cache.put(cache_key, {"fields": fields, "tier": trace[-1]["tier"], "method": method})
+        return build_project_payload(fields)
+    
+    # Falha só é lembrada se a OpenAI respondeu normalmente (timeouts e erros podem ser tentados de novo)
+    if trace and trace[-1]["tier"] == "llm" and trace[-1]["status"] == "ok":
+        cache.put(cache_key, {"fields": None, "tier": "llm", "method": None})
+    return None
+
+# Adicione este código ANTES do container do chat (após o CSS customizado e antes de "# Layout com Chat no Topo")
+
+# Seção de Boas-Vindas e Instruções
+st.markdown("""
+<div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; border-radius: 15px; margin-bottom: 20px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
+    <h1 style="text-align: center; margin-bottom: 20px;">🎯 Bem-vindo ao Kickstarter Success Predictor!</h1>
+    <p style="text-align: center; font-size: 1.1em; margin-bottom: 30px;">
+        Sou seu assistente de IA especializado em prever o sucesso de projetos no Kickstarter.<br>
+        Posso analisar seu projeto e dar recomendações personalizadas!
+    </p>
+</div>
+""", unsafe_allow_html=True)
+
+if not st.session_state.user_email or st.session_state.user_email == "default":
+    # Container para login rápido
+    st.markdown("""
+    <div style="background: #f8f9fa; border: 2px dashed #dee2e6; padding: 20px; border-radius: 10px; margin: 20px 0;">
+        <h3 style="text-align: center; color: #495057;">🚀 Experimente com um Usuário Demo</h3>
+        <p style="text-align: center; color: #6c757d;">Clique em um dos perfis abaixo para testar o sistema com histórico real</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Três colunas para os botões
+    demo_col1, demo_col2, demo_col3 = st.columns(3)
+    
+    with demo_col1:
+        st.markdown("""
+        <div style="text-align: center; padding: 10px;">
+            <h4>👨‍💼 João Silva</h4>
+            <p style="font-size: 0.9em; color: #666;">
+                Gerente de Projetos<br>
+                5 anos experiência<br>
+                Taxa sucesso: 80%<br>
+                <span style="color: #28a745;">✓ Technology ✓ Design</span>
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        if st.button("Entrar como João", key="btn_joao", use_container_width=True, type="primary"):
+            st.session_state.user_email = "joao@example.com"
+            st.session_state.user_data = USERS_DATABASE["joao@example.com"]
+            st.success("✅ Logado como João Silva!")
+            time.sleep(1)
+            st.rerun()
+    
+    with demo_col2:
+        st.markdown("""
+        <div style="text-align: center; padding: 10px;">
+            <h4>👩‍💻 Maria Santos</h4>
+            <p style="font-size: 0.9em; color: #666;">
+                Analista de Projetos<br>
+                3 anos experiência<br>
+                Taxa sucesso: 65%<br>
+                <span style="color: #17a2b8;">✓ Games ✓ Art</span>
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        if st.button("Entrar como Maria", key="btn_maria", use_container_width=True):
+            st.session_state.user_email = "maria@example.com"
+            st.session_state.user_data = USERS_DATABASE["maria@example.com"]
+            st.success("✅ Logada como Maria Santos!")
+            time.sleep(1)
+            st.rerun()
+    
+    with demo_col3:
+        st.markdown("""
+        <div style="text-align: center; padding: 10px;">
+            <h4>👨‍🎨 Pedro Oliveira</h4>
+            <p style="font-size: 0.9em; color: #666;">
+                Coordenador<br>
+                8 anos experiência<br>
+                Taxa sucesso: 90%<br>
                 <span style="color: #6610f2;">✓ Film ✓ Music ✓ Publishing</span>
             </p>
         </div>
@@ -780,182 +2364,795 @@ Nome: [projeto] Categoria: [categoria] Meta: $[valor]
 - **Design**: Design
 - **Outras**: Comics, Theater, Food, Photography, Fashion, Dance, Journalism, Crafts, Publishing
 
-💡 **Dicas:**
-- Escreva valores sem vírgulas: $10000 (não $10,000)
-- Use códigos de país: US, BR, GB, etc.
-- Posso entender português: "jogos" → Games
+💡 **Dicas:**
+- Escreva valores sem vírgulas: $10000 (não $10,000)
+- Use códigos de país: US, BR, GB, etc.
+- Posso entender português: "jogos" → Games
+
+Tente novamente! Estou aqui para ajudar 😊
+"""
+
+def normalize_category(category: str) -> str:
+    """Normaliza categoria para formato válido"""
+    # Primeiro tenta match direto
+    if category in VALID_CATEGORIES:
+        return category
+    
+    # Tenta mapear do português
+    category_lower = category.lower().strip()
+    if category_lower in CATEGORY_MAPPING:
+        return CATEGORY_MAPPING[category_lower]
+    
+    # Tenta match parcial
+    for key, value in CATEGORY_MAPPING.items():
+        if key in category_lower or category_lower in key:
+            return value
+    
+    # Se não encontrar, retorna Technology como padrão
+    return "Technology"
+
+# Funções do Chatbot
+def make_prediction_from_chat(project_info):
+    """Faz predição através do chat"""
+    try:
+        # Preparar dados para API
+        project_data = {
+            "name": project_info.get('name', 'My Kickstarter Project'),
+            "main_category": project_info.get('category', 'Technology'),
+            "country": project_info.get('country', 'US'),
+            "usd_goal_real": float(project_info.get('goal', 10000)),
+            "launched": project_info.get('launched', datetime.now().strftime("%Y-%m-%d")),
+            "deadline": project_info.get('deadline', (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d"))
+        }
+        
+        # Fazer predição (API ou modelo local, conforme configurado)
+        return predict_project(project_data)
+    except PredictionAPIError as e:
+        return {"error": f"API error: {e.status_code}"}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+
+# Modelo e temperatura do consultor (também fazem parte da chave do cache de respostas)
+CONSULTANT_MODEL = "gpt-3.5-turbo"
+CONSULTANT_TEMPERATURE = 0.7
+
+# Cache persistente das respostas das ferramentas AI
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite3")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+LLM_CACHE_MAX_AGE = float(os.getenv("LLM_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+LLM_CACHE_MEMORY_SIZE = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "128"))
+
+class LLMResponseCache:
+    """
+    Respostas da OpenAI em memória (LRU) e em SQLite, com limite de itens e de idade.
+    Se o arquivo não puder ser aberto, funciona só em memória.
+    """
+    
+    def __init__(self, path: str, max_entries: int, max_age: float, memory_size: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db = None
+        try:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT, "
+                "created_at REAL, last_access REAL)"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Cache de respostas AI só em memória ({path}): {e}")
+            self._db = None
+    
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT created_at, response FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+            
+            if entry is None or now - entry[0] > self.max_age:
+                self.misses += 1
+                return None
+            
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: str, model: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, (now, response))
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now)
+            )
+            # Remove o que passou da idade e, acima do limite, os menos acessados
+            expired = self._db.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.max_age,)
+            ).rowcount
+            overflow = self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            self.evictions += expired + overflow
+            self._db.commit()
+    
+    def _remember(self, key: str, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stored = len(self._memory)
+            if self._db is not None:
+                stored = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": stored,
+                "max_size": self.max_entries,
+                "persistent": self._db is not None
+            }
+
+@st.cache_resource(show_spinner=False)
+def get_llm_cache() -> LLMResponseCache:
+    """Cache de respostas AI único por processo"""
+    return LLMResponseCache(LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_AGE, LLM_CACHE_MEMORY_SIZE)
+
+def llm_cache_key(messages, model: str = CONSULTANT_MODEL, temperature: float = CONSULTANT_TEMPERATURE) -> str:
+    """Hash do modelo, temperatura e mensagens exatas enviadas"""
+    payload = json.dumps(
+        {"model": model, "temperature": temperature, "messages": messages},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# Limites de uso da OpenAI por processo (requisições e tokens por minuto) e fila de espera
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "60"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "60000"))
+OPENAI_QUEUE_SIZE = int(os.getenv("OPENAI_QUEUE_SIZE", "20"))
+OPENAI_QUEUE_MAX_WAIT = float(os.getenv("OPENAI_QUEUE_MAX_WAIT", "30"))
+OPENAI_429_COOLDOWN = 5.0  # segundos sem liberar chamadas depois de um 429
+
+class LLMOverloadedError(Exception):
+    """Chamada à OpenAI recusada pelo limitador (fila cheia ou espera longa demais)"""
+
+class OpenAIRateLimiter:
+    """
+    Dois token buckets (requisições/min e tokens/min) na frente de todas as chamadas à OpenAI.
+    Quem não cabe no orçamento espera numa fila FIFO limitada; com a fila cheia, ou quando
+    a espera estimada passa de max_wait, a chamada é recusada com LLMOverloadedError.
+    """
+    
+    def __init__(self, rpm: int, tpm: int, queue_size: int, max_wait: float):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = deque()
+        self._cond = threading.Condition()
+        self._changes = 0  # incrementa a cada saída da fila, para não perder avisos fora do lock
+        self.admitted = 0
+        self.shed = 0
+    
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+    
+    def _wait_for_head(self, tokens: float) -> float:
+        """Segundos até o primeiro da fila caber nos dois buckets"""
+        request_wait = max(0.0, 1 - self._requests) * 60 / self.rpm
+        token_wait = max(0.0, tokens - self._tokens) * 60 / self.tpm
+        return max(request_wait, token_wait, self._paused_until - time.monotonic())
+    
+    def acquire(self, tokens: int, on_wait=None, max_wait: Optional[float] = None) -> float:
+        """
+        Reserva 1 requisição e `tokens` tokens, esperando a vez na fila se preciso.
+        on_wait(posição, espera_estimada) é chamado enquanto a chamada aguarda, fora do lock;
+        max_wait substitui o limite de espera padrão do limitador.
+        Devolve quantos segundos a chamada esperou.
+        """
+        tokens = min(tokens, self.tpm)
+        max_wait = self.max_wait if max_wait is None else max_wait
+        start = time.monotonic()
+        ticket = object()
+        with self._cond:
+            if len(self._waiting) >= self.queue_size:
+                self.shed += 1
+                raise LLMOverloadedError("Fila da OpenAI cheia - tente novamente em alguns segundos")
+            self._waiting.append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    self._refill()
+                    position = self._waiting.index(ticket)
+                    head_wait = self._wait_for_head(tokens)
+                    if position == 0 and head_wait <= 0:
+                        self._requests -= 1
+                        self._tokens -= tokens
+                        self.admitted += 1
+                        return time.monotonic() - start
+                    
+                    # Estimativa: vez do primeiro + um intervalo médio entre requisições por posição
+                    eta = head_wait + position * 60 / self.rpm
+                    if time.monotonic() - start + eta > max_wait:
+                        self.shed += 1
+                        raise LLMOverloadedError(
+                            f"OpenAI ocupada (espera estimada de {eta:.0f}s) - tente novamente em instantes"
+                        )
+                    changes = self._changes
+                
+                # O callback (UI da sessão) roda sem segurar o lock do processo inteiro
+                if on_wait:
+                    on_wait(position + 1, eta)
+                with self._cond:
+                    self._cond.wait_for(lambda: self._changes != changes, timeout=min(max(head_wait, 0.05), 0.5))
+        finally:
+            with self._cond:
+                self._waiting.remove(ticket)
+                self._changes += 1
+                self._cond.notify_all()
+    
+    def pause(self, seconds: float):
+        """Depois de um 429 da OpenAI, segura a fila em vez de insistir"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            self._refill()
+            return {
+                "admitted": self.admitted,
+                "shed": self.shed,
+                "queued": len(self._waiting),
+                "requests_available": int(self._requests),
+                "tokens_available": int(self._tokens)
+            }
+
+@st.cache_resource(show_spinner=False)
+def get_openai_limiter() -> OpenAIRateLimiter:
+    """Limitador único por processo, compartilhado por todas as sessões"""
+    return OpenAIRateLimiter(OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT, OPENAI_QUEUE_SIZE, OPENAI_QUEUE_MAX_WAIT)
+
+def _queue_feedback():
+    """
+    Callback de espera que mostra a posição na fila (só na thread do script, onde há UI)
+    e a função que apaga o aviso. O aviso só é criado se a chamada realmente esperar.
+    """
+    if get_script_run_ctx() is None:
+        return None, lambda: None
+    placeholder = []
+    
+    def on_wait(position, eta):
+        if not placeholder:
+            placeholder.append(st.empty())
+        placeholder[0].info(f"⏳ Muitas consultas à OpenAI agora: posição {position} na fila · ~{eta:.0f}s de espera")
+    
+    def clear():
+        if placeholder:
+            placeholder[0].empty()
+    
+    return on_wait, clear
+
+# Prazo (segundos) de cada uso da OpenAI; passado o prazo, a resposta offline é usada
+LLM_DEADLINES_S = {
+    "chat": float(os.getenv("OPENAI_DEADLINE_CHAT_S", "20")),
+    "analysis": float(os.getenv("OPENAI_DEADLINE_ANALYSIS_S", "25")),
+    "titles": float(os.getenv("OPENAI_DEADLINE_TITLES_S", "12")),
+    "goal": float(os.getenv("OPENAI_DEADLINE_GOAL_S", "15")),
+    "strategy": float(os.getenv("OPENAI_DEADLINE_STRATEGY_S", "25")),
+    "rewards": float(os.getenv("OPENAI_DEADLINE_REWARDS_S", "20"))
+}
+
+class LLMDeadlineExceeded(Exception):
+    """A OpenAI não respondeu dentro do prazo da chamada"""
+
+# Falhas que trocam a resposta da OpenAI pela resposta offline
+LLM_DEGRADED_ERRORS = (LLMOverloadedError, LLMDeadlineExceeded)
+
+def llm_deadline(use: str) -> float:
+    """Instante (time.monotonic) em que a chamada para este uso deixa de valer a pena"""
+    return time.monotonic() + LLM_DEADLINES_S[use]
+
+def offline_fallback(fallback, error) -> str:
+    """Resposta offline marcada, para quando a OpenAI não respondeu a tempo"""
+    if fallback is None:
+        return f"⏳ {error}"
+    return f"⏱️ *Resposta offline ({error}).*\n\n{fallback()}"
+
+class LLMUsageStats:
+    """Tokens de entrada informados pela OpenAI, com quantos vieram do cache de prefixo de prompt"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+    
+    def record(self, usage: Dict[str, int]):
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += usage["prompt_tokens"]
+            self.cached_tokens += usage["cached_tokens"]
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "cached_ratio": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+            }
+
+@st.cache_resource(show_spinner=False)
+def get_llm_usage_stats() -> LLMUsageStats:
+    """Uso de tokens da OpenAI somado por processo"""
+    return LLMUsageStats()
+
+def usage_summary(usage) -> Optional[Dict[str, int]]:
+    """Tokens de entrada e tokens em cache (prompt_tokens_details.cached_tokens) de uma resposta"""
+    if usage is None:
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "cached_tokens": getattr(details, "cached_tokens", None) or 0
+    }
+
+OPENAI_RETRY_MIN_BUDGET_S = 1.0  # não vale tentar de novo com menos que isso de prazo
+
+def _is_retryable_openai_error(error: Exception) -> bool:
+    """Mesmas falhas que o SDK repetiria: conexão/timeout, 408, 409, 429 e 5xx"""
+    import openai
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status in (408, 409, 429) or status >= 500)
+
+def limited_openai_call(create, messages, max_tokens: int, deadline: Optional[float] = None):
+    """
+    Executa create(cliente) depois de passar pelo limitador.
+    O custo estimado é o mesmo que a OpenAI desconta: tokens do prompt (tiktoken) + max_tokens.
+    Com deadline, os retries são feitos aqui em vez de no SDK: cada tentativa passa de novo
+    pelo limitador e recebe só o que sobra do prazo, então a espera na fila, as tentativas
+    e o backoff terminam até esse instante.
+    """
+    limiter = get_openai_limiter()
+    tokens = count_message_tokens(messages) + max_tokens
+    attempt = 0
+    while True:
+        on_wait, clear_feedback = _queue_feedback()
+        max_wait = None if deadline is None else deadline - time.monotonic()
+        try:
+            limiter.acquire(tokens, on_wait=on_wait, max_wait=max_wait)
+        finally:
+            clear_feedback()
+        
+        openai_client = client
+        if deadline is not None:
+            # Mesmo pool; a tentativa usa os timeouts do cliente, encurtados ao que sobra do prazo
+            import httpx
+            remaining = max(deadline - time.monotonic(), 0.1)
+            openai_client = client.with_options(
+                timeout=httpx.Timeout(min(remaining, OPENAI_READ_TIMEOUT), connect=min(remaining, OPENAI_CONNECT_TIMEOUT)),
+                max_retries=0
+            )
+        try:
+            result = create(openai_client)
+            # Respostas completas trazem o uso; nos streams ele chega no último pedaço
+            usage = usage_summary(getattr(result, "usage", None))
+            if usage:
+                get_llm_usage_stats().record(usage)
+            return result
+        except Exception as e:
+            if getattr(e, "status_code", None) == 429:
+                limiter.pause(OPENAI_429_COOLDOWN)
+            if deadline is None:
+                raise
+            backoff = 0.5 * 2 ** attempt
+            if (attempt < OPENAI_MAX_RETRIES and _is_retryable_openai_error(e)
+                    and deadline - time.monotonic() - backoff >= OPENAI_RETRY_MIN_BUDGET_S):
+                attempt += 1
+                print(f"OpenAI falhou ({type(e).__name__}); tentativa {attempt + 1} em {backoff:.1f}s")
+                time.sleep(backoff)
+                continue
+            if time.monotonic() >= deadline:
+                raise LLMDeadlineExceeded("a OpenAI não respondeu dentro do prazo") from e
+            raise
+
+def _stream_completion(messages, on_complete=None, deadline=None, fallback=None, on_usage=None):
+    """
+    Gera os pedaços de texto da resposta conforme a OpenAI os envia.
+    on_complete(texto) recebe a resposta inteira quando o stream termina sem erro;
+    on_usage(uso) recebe os tokens de entrada, os em cache e o tempo até o primeiro pedaço (ttft_ms).
+    Se o prazo acabar antes do primeiro pedaço, entrega fallback() com o aviso de resposta offline;
+    se acabar no meio, interrompe o stream.
+    """
+    parts = []
+    start = time.perf_counter()
+    ttft_ms = None
+    try:
+        response = limited_openai_call(
+            lambda openai_client: openai_client.chat.completions.create(
+                model=CONSULTANT_MODEL,
+                messages=messages,
+                temperature=CONSULTANT_TEMPERATURE,
+                max_tokens=1000,
+                stream=True,
+                stream_options={"include_usage": True}
+            ),
+            messages, 1000, deadline
+        )
+        usage = None
+        for chunk in response:
+            if chunk.usage:
+                usage = usage_summary(chunk.usage)
+                get_llm_usage_stats().record(usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - start) * 1000
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+            if deadline is not None and time.monotonic() > deadline:
+                response.close()
+                yield "\n\n⏱️ *Resposta interrompida: prazo da OpenAI esgotado.*"
+                return
+        if on_usage and usage:
+            on_usage({**usage, "ttft_ms": ttft_ms})
+        if on_complete:
+            on_complete("".join(parts))
+    except LLM_DEGRADED_ERRORS as e:
+        yield offline_fallback(fallback, e)
+    except Exception as e:
+        if not parts and deadline is not None and time.monotonic() >= deadline:
+            yield offline_fallback(fallback, LLMDeadlineExceeded("a OpenAI não respondeu dentro do prazo"))
+        else:
+            yield f"\n\nDesculpe, houve um erro ao processar sua mensagem: {str(e)}"
+
+def _complete(messages, deadline=None, on_usage=None):
+    """
+    Chamada bloqueante à OpenAI; não usa session_state, pode rodar em outra thread.
+    Chamadas com as mesmas mensagens em andamento compartilham uma única requisição
+    (o prazo e o on_usage que valem são os de quem a iniciou).
+    """
+    def request():
+        start = time.perf_counter()
+        response = limited_openai_call(
+            lambda openai_client: openai_client.chat.completions.create(
+                model=CONSULTANT_MODEL,
+                messages=messages,
+                temperature=CONSULTANT_TEMPERATURE,
+                max_tokens=1000
+            ),
+            messages, 1000, deadline
+        )
+        usage = usage_summary(response.usage)
+        if on_usage and usage:
+            on_usage({**usage, "ttft_ms": (time.perf_counter() - start) * 1000})
+        return response.choices[0].message.content
+    
+    return get_singleflight().do(("llm", llm_cache_key(messages)), request)
+
+def _cached_complete(messages, refresh=False, deadline=None):
+    """_complete passando pelo cache de respostas; refresh=True ignora o que estiver salvo"""
+    cache = get_llm_cache()
+    key = llm_cache_key(messages)
+    if not refresh:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    text = _complete(messages, deadline)
+    cache.put(key, CONSULTANT_MODEL, text)
+    return text
+
+# Orçamento de tokens de entrada do chat e quantas mensagens recentes vão sem compactar
+CHAT_INPUT_TOKEN_BUDGET = int(os.getenv("CHAT_INPUT_TOKEN_BUDGET", "3000"))
+CHAT_RECENT_MESSAGES = int(os.getenv("CHAT_RECENT_MESSAGES", "4"))
+CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_SUMMARY_TOKEN_BUDGET", "400"))
+CHAT_SUMMARY_LINE_CHARS = 160
+
+@st.cache_resource(show_spinner=False)
+def get_token_encoder():
+    """Encoder do tiktoken para o modelo do consultor (None se não estiver disponível)"""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(CONSULTANT_MODEL)
+    except Exception as e:
+        print(f"tiktoken indisponível, estimando tokens por caracteres: {e}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """Tokens de um texto; sem tiktoken, estima ~4 caracteres por token"""
+    encoder = get_token_encoder()
+    if encoder is None:
+        return len(text) // 4 + 1
+    return len(encoder.encode(text))
+
+def count_message_tokens(messages) -> int:
+    """Tokens de uma lista de mensagens, com o custo fixo de cada mensagem do formato de chat"""
+    return sum(count_tokens(message["content"]) + 4 for message in messages) + 2
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Corta o texto para caber em max_tokens"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoder = get_token_encoder()
+    if encoder is None:
+        return text[:max(max_tokens, 0) * 4] + "…"
+    return encoder.decode(encoder.encode(text)[:max(max_tokens, 0)]) + "…"
+
+def summarize_prediction_report(project_data, prediction_result) -> str:
+    """Versão de uma linha de um relatório de predição, usada no histórico do chat"""
+    duration = (pd.to_datetime(project_data['deadline']) - pd.to_datetime(project_data['launched'])).days
+    return (
+        f"[Predição feita] {project_data['name']} ({project_data['main_category']}, {project_data['country']}, "
+        f"meta ${float(project_data['usd_goal_real']):,.0f}, {duration} dias): "
+        f"{prediction_result['success_probability']:.1%} de chance, {prediction_result['prediction']} "
+        f"(threshold {prediction_result['threshold_used']:.1%}, confiança {prediction_result['confidence']})"
+    )
+
+def _history_line(message) -> str:
+    """Uma linha do resumo das mensagens antigas"""
+    speaker = "Usuário" if message["role"] == "user" else "Assistente"
+    text = message.get("summary") or " ".join(message["content"].split())
+    if len(text) > CHAT_SUMMARY_LINE_CHARS:
+        text = text[:CHAT_SUMMARY_LINE_CHARS] + "…"
+    return f"- {speaker}: {text}"
+
+def build_chat_history(chat_messages, budget: int):
+    """
+    Histórico do chat dentro de um orçamento de tokens.
+    As mensagens recentes vão inteiras (relatórios de predição viram a versão de uma linha);
+    as anteriores são compactadas em um resumo, das mais novas para as mais antigas,
+    até CHAT_SUMMARY_TOKEN_BUDGET ou o orçamento acabar.
+    """
+    if budget <= 0 or not chat_messages:
+        return []
+    
+    recent, older = chat_messages[-CHAT_RECENT_MESSAGES:], chat_messages[:-CHAT_RECENT_MESSAGES]
+    history = []
+    remaining = budget
+    for message in reversed(recent):
+        content = message.get("summary") or message["content"]
+        content = _truncate_to_tokens(content, min(remaining - 4, budget // 2))
+        cost = count_tokens(content) + 4
+        if cost > remaining:
+            break
+        history.insert(0, {"role": message["role"], "content": content})
+        remaining -= cost
+    
+    header = "Resumo da conversa anterior:"
+    lines = []
+    remaining = min(remaining, CHAT_SUMMARY_TOKEN_BUDGET) - count_tokens(header) - 4
+    for message in reversed(older):
+        line = _history_line(message)
+        cost = count_tokens(line) + 1
+        if cost > remaining:
+            break
+        lines.insert(0, line)
+        remaining -= cost
+    if lines:
+        history.insert(0, {"role": "system", "content": header + "\n" + "\n".join(lines)})
+    
+    return history
+
+# Instruções fixas do consultor. Ficam sempre no início das mensagens, byte a byte iguais,
+# para o cache de prefixo de prompt da OpenAI; tudo que muda (histórico, contexto, pergunta) vem depois.
+CONSULTANT_SYSTEM_PROMPT = """Você é um consultor especialista em crowdfunding do Kickstarter com 10 anos de experiência.
+
+REGRA CRÍTICA: Você NUNCA deve inventar taxas de sucesso ou probabilidades.
+Se o usuário pedir uma predição, você DEVE usar a função de predição real que retorna a probabilidade exata do modelo.
+NUNCA diga coisas como "aproximadamente 75%" ou invente números.
+
+Você tem acesso a:
+- Um modelo preditivo treinado com 300,000+ projetos (AUC-ROC: 0.733)
+- Dados estatísticos sobre taxas de sucesso por categoria
+- Base de dados de usuários com histórico de projetos
+- Capacidade de fazer predições REAIS quando o usuário fornecer dados do projeto
+
+IMPORTANTE: Quando fizer uma predição, SEMPRE:
+1. Use os dados REAIS retornados pela API
+2. Mostre a taxa EXATA de sucesso
+3. Considere o histórico do usuário se disponível
+4. Seja direto e objetivo
+
+Se o usuário quiser fazer uma predição, extraia os dados e faça a chamada real para o modelo.
 
-Tente novamente! Estou aqui para ajudar 😊
-"""
+Logo antes da pergunta pode vir uma mensagem "Contexto atual" em JSON com o projeto ("projeto"),
+o resultado da predição ("predicao") e o perfil do usuário ("usuario"). Use essas informações
+para personalizar suas recomendações."""
 
-def normalize_category(category: str) -> str:
-    """Normaliza categoria para formato válido"""
-    # Primeiro tenta match direto
-    if category in VALID_CATEGORIES:
-        return category
+def build_context_message(context=None):
+    """
+    Contexto da sessão (projeto, predição e usuário) em uma mensagem de JSON compacto,
+    com chaves ordenadas: os mesmos dados geram sempre o mesmo texto. None se não houver contexto.
+    """
+    payload = {}
+    if context:
+        payload["projeto"] = {
+            "nome": context.get('name'),
+            "categoria": context.get('main_category'),
+            "meta_usd": context.get('usd_goal_real'),
+            "pais": context.get('country'),
+            "duracao_dias": context.get('campaign_days')
+        }
+        payload["predicao"] = st.session_state.prediction_result
     
-    # Tenta mapear do português
-    category_lower = category.lower().strip()
-    if category_lower in CATEGORY_MAPPING:
-        return CATEGORY_MAPPING[category_lower]
+    user_data = st.session_state.user_data
+    if st.session_state.user_email and user_data:
+        payload["usuario"] = {
+            "nome": user_data['nome'],
+            "cargo": user_data['cargo'],
+            "experiencia_anos": user_data['experiencia_anos'],
+            "projetos_anteriores": user_data['projetos_historico'],
+            "taxa_sucesso_pessoal": round(user_data['taxa_sucesso_pessoal'], 2),
+            "categorias_experiencia": user_data['categorias_experiencia']
+        }
     
-    # Tenta match parcial
-    for key, value in CATEGORY_MAPPING.items():
-        if key in category_lower or category_lower in key:
-            return value
+    if not payload:
+        return None
+    content = "Contexto atual: " + json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return {"role": "system", "content": content}
+
+def build_consultant_messages(user_message, context=None, include_history=True):
+    """
+    Monta as mensagens do consultor com o contexto da sessão (roda na thread do script).
+    Ordem: instruções fixas, histórico do chat, contexto atual e a pergunta - do mais estável
+    para o mais variável, para que o prefixo aproveitado pelo cache da OpenAI seja o maior possível.
+    Sem o histórico do chat, as mensagens dependem só do prompt e do perfil do usuário.
+    """
+    prefix = [{"role": "system", "content": CONSULTANT_SYSTEM_PROMPT}]
+    context_message = build_context_message(context)
+    tail = ([context_message] if context_message else []) + [{"role": "user", "content": user_message}]
     
-    # Se não encontrar, retorna Technology como padrão
-    return "Technology"
+    # Adicionar histórico de conversa dentro do orçamento de tokens
+    history = []
+    if include_history:
+        chat_messages = st.session_state.chat_messages
+        # A mensagem atual já foi adicionada ao chat pela interface
+        if chat_messages and chat_messages[-1]["role"] == "user" and chat_messages[-1]["content"] == user_message:
+            chat_messages = chat_messages[:-1]
+        budget = CHAT_INPUT_TOKEN_BUDGET - count_message_tokens(prefix + tail)
+        history = build_chat_history(chat_messages, budget)
+    
+    return prefix + history + tail
 
-def extract_with_spacy(message: str) -> Optional[Dict[str, Any]]:
+def ask_consultant(user_message, context=None, stream=False):
     """
-    Extrai informações do projeto usando spaCy e regex.
-    Retorna None se não conseguir extrair informações suficientes.
+    Pergunta direta ao consultor (OpenAI), sem o roteamento de predição do chat.
+    Com stream=True retorna um gerador com os pedaços da resposta.
+    Sem resposta dentro de LLM_DEADLINES_S["chat"], vale a resposta offline do chat.
     """
-    if not SPACY_AVAILABLE or not st.session_state.use_spacy:
-        return None
+    if not OPENAI_AVAILABLE:
+        return "⚠️ OpenAI não está configurado. Configure OPENAI_API_KEY no arquivo .env para usar esta funcionalidade."
+    
+    messages = build_consultant_messages(user_message, context)
+    st.session_state.last_prompt_tokens = count_message_tokens(messages)
+    deadline = llm_deadline("chat")
+    fallback = lambda: get_offline_chat_response(user_message)
     
+    # Chamado na thread do script (o chat consome o stream ali mesmo)
+    def remember_usage(usage):
+        st.session_state.last_llm_usage = usage
+    
+    if stream:
+        return _stream_completion(messages, deadline=deadline, fallback=fallback, on_usage=remember_usage)
     try:
-        # Converter para lowercase para facilitar matching
-        message_lower = message.lower()
-        
-        # Padrões regex para cada campo - CORRIGIDOS
-        patterns = {
-            'nome': [
-                r'nome:\s*([^\n,]+?)(?=\s+categoria:|$)',
-                r'projeto:\s*([^\n,]+?)(?=\s+categoria:|$)',
-                r'título:\s*([^\n,]+?)(?=\s+categoria:|$)',
-                r'nome\s+(?:é|e)\s+([^\n,]+?)(?=\s+categoria:|$)'
-            ],
-            'categoria': [
-                r'categoria:\s*([^\n,]+?)(?=\s+meta:|$)',
-                r'tipo:\s*([^\n,]+?)(?=\s+meta:|$)',
-                r'category:\s*([^\n,]+?)(?=\s+meta:|$)'
-            ],
-            'meta': [
-                # Padrões mais específicos para capturar valores monetários completos
-                r'meta:\s*\$?\s*([\d,]+(?:\.\d{2})?)',
-                r'objetivo:\s*\$?\s*([\d,]+(?:\.\d{2})?)',
-                r'goal:\s*\$?\s*([\d,]+(?:\.\d{2})?)',
-                r'\$\s*([\d,]+(?:\.\d{2})?)'
-            ],
-            'pais': [
-                r'país:\s*([A-Za-z]{2})',
-                r'pais:\s*([A-Za-z]{2})',
-                r'country:\s*([A-Za-z]{2})',
-                r'local:\s*([A-Za-z]{2})'
-            ],
-            'inicio': [
-                r'início:\s*(\d{4}-\d{2}-\d{2})',
-                r'inicio:\s*(\d{4}-\d{2}-\d{2})',
-                r'começa:\s*(\d{4}-\d{2}-\d{2})',
-                r'lançamento:\s*(\d{4}-\d{2}-\d{2})',
-                r'start:\s*(\d{4}-\d{2}-\d{2})'
-            ],
-            'fim': [
-                r'fim:\s*(\d{4}-\d{2}-\d{2})',
-                r'término:\s*(\d{4}-\d{2}-\d{2})',
-                r'termino:\s*(\d{4}-\d{2}-\d{2})',
-                r'deadline:\s*(\d{4}-\d{2}-\d{2})',
-                r'end:\s*(\d{4}-\d{2}-\d{2})'
-            ]
-        }
-        
-        # Debug: imprimir a mensagem recebida
-        print(f"Mensagem recebida: {message}")
-        
-        # Extrair dados usando regex
-        extracted_data = {}
-        
-        for field, pattern_list in patterns.items():
-            for pattern in pattern_list:
-                match = re.search(pattern, message, re.IGNORECASE)
-                if match:
-                    extracted_data[field] = match.group(1).strip()
-                    print(f"Extraído {field}: {extracted_data[field]}")
-                    break
-        
-        # Validar se temos dados mínimos
-        if not all(key in extracted_data for key in ['nome', 'categoria', 'meta']):
-            print(f"Dados incompletos. Extraídos: {extracted_data}")
-            return None
-        
-        # Converter e validar dados
+        return _complete(messages, deadline, on_usage=remember_usage)
+    except LLM_DEGRADED_ERRORS as e:
+        return offline_fallback(fallback, e)
+
+def ask_ai_tool(prompt, stream=False, refresh=False, use="analysis", fallback=None):
+    """
+    Ferramentas da aba Análise AI: mesmo consultor, sem o histórico do chat,
+    com as respostas guardadas no cache persistente.
+    fallback() é a resposta offline da ferramenta: usada sem OpenAI configurada
+    ou quando a chamada passa do prazo de LLM_DEADLINES_S[use].
+    """
+    if not OPENAI_AVAILABLE:
+        if fallback is not None:
+            return fallback()
+        return "⚠️ OpenAI não está configurado. Configure OPENAI_API_KEY no arquivo .env para usar esta funcionalidade."
+    
+    messages = build_consultant_messages(prompt, include_history=False)
+    deadline = llm_deadline(use)
+    if not stream:
         try:
-            # Limpar e converter meta - CORREÇÃO PRINCIPAL
-            meta_str = extracted_data['meta'].replace(',', '')
-            # Não remover o ponto se for decimal
-            if '.' in meta_str and len(meta_str.split('.')[-1]) == 2:
-                # É um valor decimal (ex: 10000.00)
-                meta = float(meta_str)
-            else:
-                # É um valor inteiro (ex: 10000 ou 10,000)
-                meta_str = meta_str.replace('.', '')
-                meta = float(meta_str)
-            
-            print(f"Meta convertida: {meta}")
-            
-            # Normalizar categoria
-            categoria = normalize_category(extracted_data['categoria'])
-            
-            # Preparar dados finais
-            project_data = {
-                "name": extracted_data['nome'],
-                "main_category": categoria,
-                "country": extracted_data.get('pais', 'US').upper(),
-                "usd_goal_real": meta,
-                "launched": extracted_data.get('inicio', datetime.now().strftime("%Y-%m-%d")),
-                "deadline": extracted_data.get('fim', (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d"))
-            }
-            
-            # Validar datas
-            launched_date = datetime.strptime(project_data['launched'], "%Y-%m-%d")
-            deadline_date = datetime.strptime(project_data['deadline'], "%Y-%m-%d")
-            
-            if deadline_date <= launched_date:
-                # Ajustar deadline se inválido
-                project_data['deadline'] = (launched_date + timedelta(days=30)).strftime("%Y-%m-%d")
-            
-            print(f"Dados finais: {project_data}")
-            return project_data
-            
-        except Exception as e:
-            print(f"Erro na conversão: {e}")
-            return None
-            
-    except Exception as e:
-        print(f"Erro geral: {e}")
-        return None
+            return _cached_complete(messages, refresh=refresh, deadline=deadline)
+        except LLM_DEGRADED_ERRORS as e:
+            return offline_fallback(fallback, e)
+    
+    cache = get_llm_cache()
+    key = llm_cache_key(messages)
+    if not refresh:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    return _stream_completion(
+        messages,
+        on_complete=lambda text: cache.put(key, CONSULTANT_MODEL, text),
+        deadline=deadline,
+        fallback=fallback
+    )
 
-# Funções do Chatbot
-def make_prediction_from_chat(project_info):
-    """Faz predição através do chat"""
-    try:
-        # Preparar dados para API
-        project_data = {
-            "name": project_info.get('name', 'My Kickstarter Project'),
-            "main_category": project_info.get('category', 'Technology'),
-            "country": project_info.get('country', 'US'),
-            "usd_goal_real": float(project_info.get('goal', 10000)),
-            "launched": project_info.get('launched', datetime.now().strftime("%Y-%m-%d")),
-            "deadline": project_info.get('deadline', (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d"))
-        }
-        
-        # Fazer requisição para API
-        response = requests.post(f"{API_URL}/predict", json=project_data)
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result
+def render_ai_response(response, spinner_text="Gerando resposta...", boxed=True):
+    """Mostra uma resposta da AI; geradores são renderizados conforme os tokens chegam"""
+    if isinstance(response, str):
+        if boxed:
+            st.info(response)
         else:
-            return {"error": f"API error: {response.status_code}"}
-    except Exception as e:
-        return {"error": str(e)}
+            st.markdown(response, unsafe_allow_html=True)
+        return response
+    
+    # O spinner fica até o primeiro token chegar
+    with st.spinner(spinner_text):
+        first_chunk = next(response, "")
+    with st.container(border=boxed):
+        return st.write_stream(itertools.chain([first_chunk], response))
+
+def get_offline_chat_response(user_message):
+    """Respostas predefinidas do chat (sem OpenAI ou quando ela não responde a tempo)"""
+    message_lower = user_message.lower()
+    
+    # Verificar se é primeira mensagem/saudação
+    if any(word in message_lower for word in ['oi', 'olá', 'hello', 'hi', 'início', 'começ', 'ajud']):
+        return get_initial_chat_message()
+    elif 'categoria' in message_lower or 'categories' in message_lower:
+        categories = load_categories()
+        return f"""
+**Categorias disponíveis no Kickstarter:**
+
+{chr(10).join(f"- {cat} ({info['avg_success']} sucesso)" for cat, info in categories.items())}
+
+As categorias com maior taxa de sucesso são Dance, Theater e Comics!
+"""
+    else:
+        return """
+Desculpe, não entendi sua pergunta. 
 
+**Posso ajudar com:**
+- Prever sucesso do seu projeto
+- Listar categorias disponíveis
+- Dar dicas para melhorar suas chances
 
+Para fazer uma predição, envie os dados do projeto no formato estruturado.
+"""
 
-def get_chat_response(user_message, context=None):
-    """Gera resposta do chatbot usando OpenAI ou respostas predefinidas"""
+def get_chat_response(user_message, context=None, stream=False):
+    """
+    Gera resposta do chatbot usando OpenAI ou respostas predefinidas.
+    Com stream=True, respostas da OpenAI voltam como gerador de pedaços de texto.
+    """
     try:
         # Verificar se o usuário quer fazer uma predição
         prediction_keywords = ['predict', 'prever', 'chance', 'probabilidade', 'analisar projeto', 'analyze', 'analise']
@@ -967,7 +3164,7 @@ def get_chat_response(user_message, context=None):
             project_info = extract_project_info_from_message(user_message)
             
             if project_info:
-                # CORREÇÃO: Os dados já vêm padronizados do extract_with_spacy
+                # CORREÇÃO: Os dados já vêm padronizados do pipeline de extração
                 # Apenas garantir que os campos estejam corretos
                 project_data_for_api = {
                     "name": project_info.get('name', 'My Project'),
@@ -978,64 +3175,67 @@ def get_chat_response(user_message, context=None):
                     "deadline": project_info.get('deadline', (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d"))
                 }
                 
-                # Fazer predição real com a API diretamente
+                # Fazer predição real (API ou modelo local, conforme configurado)
                 try:
-                    response = requests.post(f"{API_URL}/predict", json=project_data_for_api)
+                    prediction_result = predict_project(project_data_for_api)
+                except PredictionAPIError as e:
+                    return f"❌ Erro ao fazer predição: API retornou status {e.status_code}"
+                except Exception as e:
+                    return f"❌ Erro ao fazer predição: {str(e)}\n\nPor favor, use o formulário na aba '🔮 Predictor' para análise precisa."
+                
+                # Salvar no contexto com dados padronizados
+                st.session_state.project_data = project_data_for_api
+                st.session_state.prediction_result = prediction_result
+                # O relatório abaixo entra no histórico do chat só como esta linha
+                st.session_state.pending_chat_summary = summarize_prediction_report(project_data_for_api, prediction_result)
+                
+                # Criar resposta formatada
+                duration_days = (pd.to_datetime(project_data_for_api['deadline']) - pd.to_datetime(project_data_for_api['launched'])).days
+                
+                # Carregar categorias para mostrar taxa média
+                categories = load_categories()
+                
+                # Emoji baseado na probabilidade
+                if prediction_result['success_probability'] >= 0.6:
+                    emoji_result = "🟢"
+                    status_msg = "ALTA CHANCE DE SUCESSO!"
+                elif prediction_result['success_probability'] >= 0.5:
+                    emoji_result = "🟡"
+                    status_msg = "CHANCE MODERADA"
+                elif prediction_result['success_probability'] >= 0.3:
+                    emoji_result = "🟠"
+                    status_msg = "CHANCE BAIXA - PRECISA MELHORAR"
+                else:
+                    emoji_result = "🔴"
+                    status_msg = "ALTO RISCO DE FRACASSO!"
+                
+                # Adicionar análise personalizada baseada no usuário
+                user_analysis = ""
+                if st.session_state.user_email and st.session_state.user_email != "default":
+                    user_data = st.session_state.user_data
                     
-                    if response.status_code == 200:
-                        prediction_result = response.json()
-                        
-                        # Salvar no contexto com dados padronizados
-                        st.session_state.project_data = project_data_for_api
-                        st.session_state.prediction_result = prediction_result
-                        
-                        # Criar resposta formatada
-                        duration_days = (pd.to_datetime(project_data_for_api['deadline']) - pd.to_datetime(project_data_for_api['launched'])).days
-                        
-                        # Carregar categorias para mostrar taxa média
-                        categories = load_categories()
-                        
-                        # Emoji baseado na probabilidade
-                        if prediction_result['success_probability'] >= 0.6:
-                            emoji_result = "🟢"
-                            status_msg = "ALTA CHANCE DE SUCESSO!"
-                        elif prediction_result['success_probability'] >= 0.5:
-                            emoji_result = "🟡"
-                            status_msg = "CHANCE MODERADA"
-                        elif prediction_result['success_probability'] >= 0.3:
-                            emoji_result = "🟠"
-                            status_msg = "CHANCE BAIXA - PRECISA MELHORAR"
+                    # Comparar com histórico pessoal
+                    if user_data['taxa_sucesso_pessoal'] > 0:
+                        diff = prediction_result['success_probability'] - user_data['taxa_sucesso_pessoal']
+                        if diff > 0:
+                            user_analysis += f"\n\n📊 **Análise Personalizada para {user_data['nome']}:**\n"
+                            user_analysis += f"✅ Este projeto tem {diff*100:.1f}% mais chance que sua média histórica ({user_data['taxa_sucesso_pessoal']:.0%})!"
                         else:
-                            emoji_result = "🔴"
-                            status_msg = "ALTO RISCO DE FRACASSO!"
-                        
-                        # Adicionar análise personalizada baseada no usuário
-                        user_analysis = ""
-                        if st.session_state.user_email and st.session_state.user_email != "default":
-                            user_data = st.session_state.user_data
-                            
-                            # Comparar com histórico pessoal
-                            if user_data['taxa_sucesso_pessoal'] > 0:
-                                diff = prediction_result['success_probability'] - user_data['taxa_sucesso_pessoal']
-                                if diff > 0:
-                                    user_analysis += f"\n\n📊 **Análise Personalizada para {user_data['nome']}:**\n"
-                                    user_analysis += f"✅ Este projeto tem {diff*100:.1f}% mais chance que sua média histórica ({user_data['taxa_sucesso_pessoal']:.0%})!"
-                                else:
-                                    user_analysis += f"\n\n📊 **Análise Personalizada para {user_data['nome']}:**\n"
-                                    user_analysis += f"⚠️ Este projeto está {abs(diff)*100:.1f}% abaixo da sua média histórica ({user_data['taxa_sucesso_pessoal']:.0%})"
-                            
-                            # Verificar experiência na categoria
-                            if project_data_for_api['main_category'] in user_data['categorias_experiencia']:
-                                user_analysis += f"\n✅ Você tem experiência em {project_data_for_api['main_category']}. Isso é um diferencial!"
-                            else:
-                                user_analysis += f"\n💡 Primeira vez em {project_data_for_api['main_category']}? Considere buscar mentoria nesta área."
-                        
-                        # Adicionar método de extração
-                        extraction_info = ""
-                        if st.session_state.extraction_method:
-                            extraction_info = f"\n\n<p class='extraction-method'>📝 Dados extraídos via: {st.session_state.extraction_method}</p>"
-                        
-                        return f"""
+                            user_analysis += f"\n\n📊 **Análise Personalizada para {user_data['nome']}:**\n"
+                            user_analysis += f"⚠️ Este projeto está {abs(diff)*100:.1f}% abaixo da sua média histórica ({user_data['taxa_sucesso_pessoal']:.0%})"
+                    
+                    # Verificar experiência na categoria
+                    if project_data_for_api['main_category'] in user_data['categorias_experiencia']:
+                        user_analysis += f"\n✅ Você tem experiência em {project_data_for_api['main_category']}. Isso é um diferencial!"
+                    else:
+                        user_analysis += f"\n💡 Primeira vez em {project_data_for_api['main_category']}? Considere buscar mentoria nesta área."
+                
+                # Adicionar método de extração
+                extraction_info = ""
+                if st.session_state.extraction_method:
+                    extraction_info = f"\n\n<p class='extraction-method'>📝 Dados extraídos via: {st.session_state.extraction_method}</p>"
+                
+                return f"""
 {emoji_result} **{status_msg}**
 
 🎯 **Análise do Projeto: {project_data_for_api['name']}**
@@ -1068,132 +3268,39 @@ Quer que eu:
 - 🎁 Monte estrutura de recompensas?
 {extraction_info}
 """
-                    else:
-                        return f"❌ Erro ao fazer predição: API retornou status {response.status_code}"
-                        
-                except Exception as e:
-                    return f"❌ Erro ao fazer predição: {str(e)}\n\nPor favor, use o formulário na aba '🔮 Predictor' para análise precisa."
             else:
                 return get_error_response()
         
         # Se não for predição ou não tiver OpenAI, usar respostas padrão
         if not OPENAI_AVAILABLE:
-            # Respostas predefinidas para casos sem OpenAI
-            message_lower = user_message.lower()
-            
-            # Verificar se é primeira mensagem/saudação
-            if any(word in message_lower for word in ['oi', 'olá', 'hello', 'hi', 'início', 'começ', 'ajud']):
-                return get_initial_chat_message()
-            elif 'categoria' in message_lower or 'categories' in message_lower:
-                categories = load_categories()
-                return f"""
-**Categorias disponíveis no Kickstarter:**
-
-{chr(10).join(f"- {cat} ({info['avg_success']} sucesso)" for cat, info in categories.items())}
-
-As categorias com maior taxa de sucesso são Dance, Theater e Comics!
-"""
-            else:
-                return """
-Desculpe, não entendi sua pergunta. 
-
-**Posso ajudar com:**
-- Prever sucesso do seu projeto
-- Listar categorias disponíveis
-- Dar dicas para melhorar suas chances
-
-Para fazer uma predição, envie os dados do projeto no formato estruturado.
-"""
+            return get_offline_chat_response(user_message)
         
         # Se tiver OpenAI, usar para respostas gerais
-        system_message = """Você é um consultor especialista em crowdfunding do Kickstarter com 10 anos de experiência.
-        
-        REGRA CRÍTICA: Você NUNCA deve inventar taxas de sucesso ou probabilidades. 
-        Se o usuário pedir uma predição, você DEVE usar a função de predição real que retorna a probabilidade exata do modelo.
-        NUNCA diga coisas como "aproximadamente 75%" ou invente números.
-        
-        Você tem acesso a:
-        - Um modelo preditivo treinado com 300,000+ projetos (AUC-ROC: 0.733)
-        - Dados estatísticos sobre taxas de sucesso por categoria
-        - Base de dados de usuários com histórico de projetos
-        - Capacidade de fazer predições REAIS quando o usuário fornecer dados do projeto
-        
-        IMPORTANTE: Quando fizer uma predição, SEMPRE:
-        1. Use os dados REAIS retornados pela API
-        2. Mostre a taxa EXATA de sucesso
-        3. Considere o histórico do usuário se disponível
-        4. Seja direto e objetivo
-        
-        Se o usuário quiser fazer uma predição, extraia os dados e faça a chamada real para o modelo."""
-        
-        messages = [{"role": "system", "content": system_message}]
-        
-        # Adicionar contexto se disponível
-        if context:
-            context_message = f"""
-            Contexto atual do projeto:
-            - Nome: {context.get('name', 'Não definido')}
-            - Categoria: {context.get('main_category', 'Não definida')}
-            - Meta: ${context.get('usd_goal_real', 0):,.2f}
-            - País: {context.get('country', 'Não definido')}
-            - Duração: {context.get('campaign_days', 'Não definida')} dias
-            
-            Resultados da predição (se disponível):
-            {json.dumps(st.session_state.prediction_result, indent=2) if st.session_state.prediction_result else 'Nenhuma predição feita ainda'}
-            """
-            messages.append({"role": "system", "content": context_message})
-        
-        # Adicionar informações do usuário se disponível
-        if st.session_state.user_email and st.session_state.user_data:
-            user_context = f"""
-            Informações do usuário atual:
-            - Nome: {st.session_state.user_data['nome']}
-            - Cargo: {st.session_state.user_data['cargo']}
-            - Experiência: {st.session_state.user_data['experiencia_anos']} anos
-            - Projetos anteriores: {st.session_state.user_data['projetos_historico']}
-            - Taxa de sucesso pessoal: {st.session_state.user_data['taxa_sucesso_pessoal']:.0%}
-            - Experiência em categorias: {', '.join(st.session_state.user_data['categorias_experiencia'])}
-            
-            Use essas informações para personalizar suas recomendações.
-            """
-            messages.append({"role": "system", "content": user_context})
-        
-        # Adicionar histórico de conversa
-        for msg in st.session_state.chat_messages[-10:]:  # Últimas 10 mensagens
-            messages.append({"role": msg["role"], "content": msg["content"]})
-        
-        # Adicionar mensagem atual
-        messages.append({"role": "user", "content": user_message})
-        
-        # Fazer chamada para OpenAI
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=1000
-        )
-        
-        return response.choices[0].message.content
+        return ask_consultant(user_message, context, stream=stream)
         
     except Exception as e:
         return f"Desculpe, houve um erro ao processar sua mensagem: {str(e)}"
 
-def analyze_project_with_ai(project_data, prediction_result):
-    """Análise detalhada do projeto usando AI"""
-    if not OPENAI_AVAILABLE:
-        return "⚠️ OpenAI não está configurado. Configure OPENAI_API_KEY no arquivo .env para usar esta funcionalidade."
-    
+def _profile_user_data(user_data):
+    """Perfil usado nos prompts; o usuário padrão não personaliza nada"""
+    if user_data and user_data != USERS_DATABASE["default"]:
+        return user_data
+    return None
+
+def build_analysis_prompt(project_data, prediction_result, user_data):
+    """Prompt da análise completa do projeto"""
     user_context = ""
-    if st.session_state.user_data and st.session_state.user_data != USERS_DATABASE["default"]:
+    profile = _profile_user_data(user_data)
+    if profile:
         user_context = f"""
         Considere também o perfil do usuário:
-        - {st.session_state.user_data['nome']} ({st.session_state.user_data['cargo']})
-        - {st.session_state.user_data['experiencia_anos']} anos de experiência
-        - Taxa de sucesso histórica: {st.session_state.user_data['taxa_sucesso_pessoal']:.0%}
-        - Experiência em: {', '.join(st.session_state.user_data['categorias_experiencia'])}
+        - {profile['nome']} ({profile['cargo']})
+        - {profile['experiencia_anos']} anos de experiência
+        - Taxa de sucesso histórica: {profile['taxa_sucesso_pessoal']:.0%}
+        - Experiência em: {', '.join(profile['categorias_experiencia'])}
         """
     
-    prompt = f"""
+    return f"""
     Analise este projeto Kickstarter e forneça insights detalhados:
     
     Dados do Projeto:
@@ -1212,32 +3319,10 @@ def analyze_project_with_ai(project_data, prediction_result):
     
     Seja específico e prático.
     """
-    
-    return get_chat_response(prompt)
-
-def generate_title_suggestions(current_title, category):
-    """Gera sugestões de títulos melhores"""
-    if not OPENAI_AVAILABLE:
-        return """
-**Sugestões de títulos baseadas em padrões de sucesso:**
-
-1. **[Adjetivo] + [Produto] + [Benefício]**
-   - Ex: "Revolutionary Solar Charger for Travelers"
-   
-2. **[Problema] + [Solução] + [Diferencial]**
-   - Ex: "Never Lose Keys Again - Smart Bluetooth Tracker"
-   
-3. **[Público] + [Necessidade] + [Inovação]**
-   - Ex: "Gamers Ultimate Wireless Controller Experience"
 
-**Dicas:**
-- Use 4-7 palavras
-- Seja específico sobre o que faz
-- Inclua um diferencial claro
-- Evite jargões técnicos
-"""
-    
-    prompt = f"""
+def build_title_prompt(current_title, category):
+    """Prompt das sugestões de título"""
+    return f"""
     O título atual do projeto é: "{current_title}"
     Categoria: {category}
     
@@ -1249,14 +3334,148 @@ def generate_title_suggestions(current_title, category):
     
     Para cada sugestão, explique brevemente por que é melhor.
     """
+
+def build_goal_prompt(project_data, user_data):
+    """Prompt da análise da meta"""
+    user_context = ""
+    profile = _profile_user_data(user_data)
+    if profile:
+        user_context = f"Considerando que {profile['nome']} tem histórico de {profile['projetos_historico']} projetos com taxa de sucesso de {profile['taxa_sucesso_pessoal']:.0%}, "
+    
+    return f"""
+    {user_context}analise se a meta de ${project_data['usd_goal_real']:,.2f} 
+    é adequada para um projeto de {project_data['main_category']} 
+    no {project_data['country']}.
+    
+    Compare com projetos similares bem-sucedidos e sugira ajustes se necessário.
+    """
+
+def build_strategy_prompt(project_data, prediction_result, user_data):
+    """Prompt do plano de 30 dias"""
+    user_context = ""
+    profile = _profile_user_data(user_data)
+    if profile:
+        user_context = f"""
+        Considere o perfil do usuário:
+        - {profile['nome']} tem {profile['experiencia_anos']} anos de experiência
+        - Taxa de sucesso histórica: {profile['taxa_sucesso_pessoal']:.0%}
+        - Já trabalhou com: {', '.join(profile['categorias_experiencia'])}
+        """
+    
+    return f"""
+    Crie um plano estratégico de 30 dias para maximizar o sucesso desta campanha:
+    
+    Projeto: {project_data['name']}
+    Categoria: {project_data['main_category']}
+    Meta: ${project_data['usd_goal_real']:,.2f}
+    Probabilidade atual: {prediction_result['success_probability']:.1%}
+    
+    {user_context}
+    
+    Inclua:
+    1. Cronograma detalhado (pré-lançamento, lançamento, meio, final)
+    2. Metas de arrecadação por semana
+    3. Estratégias de marketing específicas
+    4. Momentos-chave para atualizações
+    5. Táticas para manter momentum
+    
+    Seja prático e específico, considerando a experiência do usuário.
+    """
+
+def build_rewards_prompt(project_data, user_data):
+    """Prompt da estrutura de recompensas"""
+    user_context = ""
+    profile = _profile_user_data(user_data)
+    if profile:
+        user_context = f"Considerando a experiência de {profile['nome']} em {', '.join(profile['categorias_experiencia'])}, "
+    
+    return f"""
+    {user_context}crie uma estrutura de recompensas para este projeto:
+    {json.dumps(project_data, indent=2)}
+    
+    Inclua:
+    1. Early bird (25% desconto)
+    2. Níveis regulares (pelo menos 5)
+    3. Recompensa premium
+    4. Preços e o que cada nível recebe
     
-    return get_chat_response(prompt)
+    Seja criativo e específico para a categoria {project_data['main_category']}.
+    """
+
+def offline_project_analysis(project_data, prediction_result):
+    """Análise offline: o resultado do modelo e as recomendações que vieram com ele"""
+    duration = (pd.to_datetime(project_data['deadline']) - pd.to_datetime(project_data['launched'])).days
+    probability = prediction_result['success_probability']
+    threshold = prediction_result['threshold_used']
+    return f"""
+**Análise de "{project_data['name']}" ({project_data['main_category']}):**
+
+- Probabilidade de sucesso: **{probability:.1%}** (threshold {threshold:.1%}) → {prediction_result['prediction']}
+- Meta de ${project_data['usd_goal_real']:,.0f} em {duration} dias (${project_data['usd_goal_real'] / max(duration, 1):,.0f} por dia)
+
+**Recomendações do modelo:**
+{chr(10).join(f"- {rec}" for rec in prediction_result.get('recommendations', []))}
+
+{'✅ O projeto está acima do threshold: foque em divulgação e execução.' if probability >= threshold else '⚠️ Abaixo do threshold: revise meta e duração com o simulador "E se...?" da aba Predictor.'}
+"""
+
+def offline_goal_analysis(project_data):
+    """Análise offline da meta, pelas taxas de sucesso por faixa de meta do dashboard"""
+    goal = float(project_data['usd_goal_real'])
+    duration = (pd.to_datetime(project_data['deadline']) - pd.to_datetime(project_data['launched'])).days
+    index = int(np.searchsorted(GOAL_RANGE_LIMITS, goal, side='right'))
+    return f"""
+**Meta de ${goal:,.0f} em {duration} dias** (${goal / max(duration, 1):,.0f} por dia)
+
+- Faixa {GOAL_RANGES[index]}: taxa histórica de sucesso de **{SUCCESS_BY_GOAL[index]}%**
+- Metas abaixo de $10k têm as maiores taxas (38-45%); acima de $50k a taxa cai para {SUCCESS_BY_GOAL[-1]}%
+
+**Dicas:**
+- Calcule o mínimo para entregar as recompensas e use esse valor como meta
+- Metas menores batem 100% mais cedo e atraem apoiadores pelo efeito manada
+- Use stretch goals para o que passar do mínimo
+"""
+
+def offline_reward_structure(project_data):
+    """Estrutura offline de recompensas, com o número de apoiadores para bater a meta"""
+    goal = float(project_data['usd_goal_real'])
+    return f"""
+**Estrutura de recompensas sugerida para {project_data['main_category']}:**
+
+1. **$5-10 - Apoio simbólico:** agradecimento e nome nos créditos
+2. **$25 - Early bird:** produto principal com desconto, quantidade limitada
+3. **$50-75 - Recompensa principal:** produto completo (costuma ser a mais escolhida)
+4. **$150 - Edição especial:** produto + extras exclusivos
+5. **$500+ - Experiência:** participação no projeto ou encontro com os criadores
+
+Com ticket médio de $50, a meta de ${goal:,.0f} precisa de cerca de **{goal / 50:,.0f} apoiadores**.
+"""
+
+def offline_title_suggestions():
+    """Sugestões offline de títulos, por padrões de sucesso"""
+    return """
+**Sugestões de títulos baseadas em padrões de sucesso:**
+
+1. **[Adjetivo] + [Produto] + [Benefício]**
+   - Ex: "Revolutionary Solar Charger for Travelers"
+   
+2. **[Problema] + [Solução] + [Diferencial]**
+   - Ex: "Never Lose Keys Again - Smart Bluetooth Tracker"
+   
+3. **[Público] + [Necessidade] + [Inovação]**
+   - Ex: "Gamers Ultimate Wireless Controller Experience"
 
-def optimize_campaign_strategy(project_data, prediction_result):
-    """Gera estratégia otimizada de campanha"""
-    if not OPENAI_AVAILABLE:
-        duration = (pd.to_datetime(project_data['deadline']) - pd.to_datetime(project_data['launched'])).days
-        return f"""
+**Dicas:**
+- Use 4-7 palavras
+- Seja específico sobre o que faz
+- Inclua um diferencial claro
+- Evite jargões técnicos
+"""
+
+def offline_campaign_strategy(project_data):
+    """Estratégia offline de campanha, pela duração do projeto"""
+    duration = (pd.to_datetime(project_data['deadline']) - pd.to_datetime(project_data['launched'])).days
+    return f"""
 **Estratégia de Campanha para {duration} dias:**
 
 **🚀 Pré-Lançamento (7 dias antes):**
@@ -1289,128 +3508,282 @@ def optimize_campaign_strategy(project_data, prediction_result):
 - Origem do tráfego
 - Engajamento nas atualizações
 """
+
+def analyze_project_with_ai(project_data, prediction_result, stream=False, refresh=False):
+    """Análise detalhada do projeto usando AI"""
+    prompt = build_analysis_prompt(project_data, prediction_result, st.session_state.user_data)
+    return ask_ai_tool(
+        prompt, stream=stream, refresh=refresh, use="analysis",
+        fallback=lambda: offline_project_analysis(project_data, prediction_result)
+    )
+
+def generate_title_suggestions(current_title, category, stream=False, refresh=False):
+    """Gera sugestões de títulos melhores"""
+    return ask_ai_tool(
+        build_title_prompt(current_title, category), stream=stream, refresh=refresh, use="titles",
+        fallback=offline_title_suggestions
+    )
+
+def analyze_goal_with_ai(project_data, stream=False, refresh=False):
+    """Analisa se a meta é adequada"""
+    prompt = build_goal_prompt(project_data, st.session_state.user_data)
+    return ask_ai_tool(
+        prompt, stream=stream, refresh=refresh, use="goal",
+        fallback=lambda: offline_goal_analysis(project_data)
+    )
+
+def optimize_campaign_strategy(project_data, prediction_result, stream=False, refresh=False):
+    """Gera estratégia otimizada de campanha"""
+    prompt = build_strategy_prompt(project_data, prediction_result, st.session_state.user_data)
+    return ask_ai_tool(
+        prompt, stream=stream, refresh=refresh, use="strategy",
+        fallback=lambda: offline_campaign_strategy(project_data)
+    )
+
+def suggest_reward_structure(project_data, stream=False, refresh=False):
+    """Sugere a estrutura de recompensas"""
+    prompt = build_rewards_prompt(project_data, st.session_state.user_data)
+    return ask_ai_tool(
+        prompt, stream=stream, refresh=refresh, use="rewards",
+        fallback=lambda: offline_reward_structure(project_data)
+    )
+
+# Seções do relatório completo da aba Análise AI
+AI_REPORT_SECTIONS = [
+    ("analysis", "🔍 Análise Completa"),
+    ("titles", "📝 Títulos"),
+    ("goal", "💰 Meta"),
+    ("strategy", "📅 Plano de 30 Dias"),
+    ("rewards", "🎁 Recompensas")
+]
+
+LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "5"))
+
+@st.cache_resource(show_spinner=False)
+def get_llm_executor() -> ThreadPoolExecutor:
+    """Threads compartilhadas pelas chamadas concorrentes à OpenAI"""
+    return ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix="llm")
+
+def _timed_complete(messages, refresh=False, deadline=None):
+    """_cached_complete com o tempo da chamada, para o resumo do relatório"""
+    start = time.perf_counter()
+    return _cached_complete(messages, refresh=refresh, deadline=deadline), time.perf_counter() - start
+
+def generate_ai_report(project_data, prediction_result, on_result=None, refresh=False):
+    """
+    Gera todas as seções da análise AI ao mesmo tempo.
+    on_result(seção, texto, segundos) é chamado na thread do script conforme cada uma termina.
+    Retorna ({seção: texto}, segundos somados das chamadas).
+    """
+    user_data = st.session_state.user_data
+    results = {}
+    total_call_seconds = 0.0
     
-    user_context = ""
-    if st.session_state.user_data and st.session_state.user_data != USERS_DATABASE["default"]:
-        user_context = f"""
-        Considere o perfil do usuário:
-        - {st.session_state.user_data['nome']} tem {st.session_state.user_data['experiencia_anos']} anos de experiência
-        - Taxa de sucesso histórica: {st.session_state.user_data['taxa_sucesso_pessoal']:.0%}
-        - Já trabalhou com: {', '.join(st.session_state.user_data['categorias_experiencia'])}
-        """
-    
-    prompt = f"""
-    Crie um plano estratégico de 30 dias para maximizar o sucesso desta campanha:
-    
-    Projeto: {project_data['name']}
-    Categoria: {project_data['main_category']}
-    Meta: ${project_data['usd_goal_real']:,.2f}
-    Probabilidade atual: {prediction_result['success_probability']:.1%}
+    # Respostas offline de cada seção: sem OpenAI, ou para quem passar do prazo
+    offline = {
+        "analysis": lambda: offline_project_analysis(project_data, prediction_result),
+        "titles": offline_title_suggestions,
+        "goal": lambda: offline_goal_analysis(project_data),
+        "strategy": lambda: offline_campaign_strategy(project_data),
+        "rewards": lambda: offline_reward_structure(project_data)
+    }
     
-    {user_context}
+    if not OPENAI_AVAILABLE:
+        for section, fallback in offline.items():
+            results[section] = fallback()
+            if on_result:
+                on_result(section, results[section], 0.0)
+        return results, total_call_seconds
     
-    Inclua:
-    1. Cronograma detalhado (pré-lançamento, lançamento, meio, final)
-    2. Metas de arrecadação por semana
-    3. Estratégias de marketing específicas
-    4. Momentos-chave para atualizações
-    5. Táticas para manter momentum
+    prompts = {
+        "analysis": build_analysis_prompt(project_data, prediction_result, user_data),
+        "titles": build_title_prompt(project_data['name'], project_data['main_category']),
+        "goal": build_goal_prompt(project_data, user_data),
+        "strategy": build_strategy_prompt(project_data, prediction_result, user_data),
+        "rewards": build_rewards_prompt(project_data, user_data)
+    }
     
-    Seja prático e específico, considerando a experiência do usuário.
-    """
+    # As mensagens são montadas aqui: as threads não acessam o session_state
+    executor = get_llm_executor()
+    futures = {
+        executor.submit(
+            _timed_complete, build_consultant_messages(prompt, include_history=False), refresh, llm_deadline(section)
+        ): section
+        for section, prompt in prompts.items()
+    }
+    for future in as_completed(futures):
+        section = futures[future]
+        try:
+            text, elapsed = future.result()
+            total_call_seconds += elapsed
+        except LLM_DEGRADED_ERRORS as e:
+            text, elapsed = offline_fallback(offline[section], e), None
+        except Exception as e:
+            text, elapsed = f"Desculpe, houve um erro ao processar sua mensagem: {str(e)}", None
+        results[section] = text
+        if on_result:
+            on_result(section, text, elapsed)
     
-    return get_chat_response(prompt)
+    return results, total_call_seconds
 
 # Layout com Chat no Topo
 # Chat fixo na parte superior com layout melhorado
-with st.container():
-    st.markdown('<div class="top-chat-container">', unsafe_allow_html=True)
-    
-    # Header do chat
-    chat_header_col1, chat_header_col2, chat_header_col3 = st.columns([1, 3, 1])
-    with chat_header_col2:
-        #st.markdown("### 💬 AI Assistant")
-        if st.session_state.user_email and st.session_state.user_email != "default":
-            st.caption(f"👤 Conversando com: {st.session_state.user_data['nome']}")
+def rerun_fragment():
+    """Reexecuta só o fragmento atual; numa execução completa do script, reexecuta o app todo"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+@st.fragment
+def render_chat():
+    """Chat do topo como fragmento: enviar ou limpar reexecuta só este trecho"""
+    cpu_start = time.thread_time()
+    
+    with st.container():
+        st.markdown('<div class="top-chat-container">', unsafe_allow_html=True)
         
-        # Mostrar status dos sistemas
-        status_cols = st.columns(3)
-        with status_cols[0]:
-            if SPACY_AVAILABLE:
-                st.success("✅ spaCy")
-            else:
-                st.error("❌ spaCy")
-        with status_cols[1]:
-            if OPENAI_AVAILABLE:
-                st.success("✅ OpenAI")
-            else:
-                st.warning("⚠️ OpenAI")
-        with status_cols[2]:
-            if check_api_health():
-                st.success("✅ API")
-            else:
-                st.error("❌ API")
-    
-    # Container do chat
-    chat_main_col1, chat_main_col2, chat_main_col3 = st.columns([0.5, 4, 0.5])
-    
-    with chat_main_col2:
-        # Área de mensagens expandida
-        chat_area = st.container(height=250)
-        with chat_area:
-            # Se não houver mensagens, mostrar mensagem inicial
-            if len(st.session_state.chat_messages) == 0:
-                initial_msg = get_initial_chat_message()
-                st.markdown(f'<div class="chat-message assistant-message">🤖</div>', 
-                          unsafe_allow_html=True)
-                st.markdown(initial_msg, unsafe_allow_html=True)
-            else:
-                # Mostrar mensagens completas
-                for message in st.session_state.chat_messages[-5:]:  # Últimas 5 mensagens
-                    if message["role"] == "user":
-                        st.markdown(f'<div class="chat-message user-message">👤 {message["content"]}</div>', 
-                                  unsafe_allow_html=True)
+        # Header do chat
+        chat_header_col1, chat_header_col2, chat_header_col3 = st.columns([1, 3, 1])
+        with chat_header_col2:
+            #st.markdown("### 💬 AI Assistant")
+            if st.session_state.user_email and st.session_state.user_email != "default":
+                st.caption(f"👤 Conversando com: {st.session_state.user_data['nome']}")
+            
+            # Mostrar status dos sistemas
+            status_cols = st.columns(3)
+            with status_cols[0]:
+                if SPACY_AVAILABLE:
+                    st.success("✅ spaCy")
+                else:
+                    st.error("❌ spaCy")
+            with status_cols[1]:
+                if OPENAI_AVAILABLE:
+                    st.success("✅ OpenAI")
+                else:
+                    st.warning("⚠️ OpenAI")
+            with status_cols[2]:
+                if get_prediction_mode() == "local":
+                    st.success("✅ Modelo local")
+                else:
+                    api_health = get_api_health_monitor(API_URL).snapshot()
+                    if api_health["online"] is None:
+                        st.info("⏳ API")
+                    elif api_health["online"]:
+                        st.success("✅ API")
                     else:
-                        # Mostrar resposta completa do bot
-                        st.markdown(f'<div class="chat-message assistant-message">🤖</div>', 
-                                  unsafe_allow_html=True)
-                        # Usar markdown para formatar a resposta completa
-                        st.markdown(message["content"], unsafe_allow_html=True)
-        
-        # Área de input
-        input_col1, input_col2, input_col3 = st.columns([10, 1, 1])
+                        st.error("❌ API")
         
-        with input_col1:
-            user_input = st.text_input(
-                "Digite sua pergunta:", 
-                key="top_chat_input", 
-                label_visibility="collapsed", 
-                placeholder="Ex: Analise meu projeto: Nome: power Categoria: Film & Video Meta: $10,000 País: US Início: 2025-07-03 Fim: 2025-08-02"
-            )
+        # Container do chat
+        chat_main_col1, chat_main_col2, chat_main_col3 = st.columns([0.5, 4, 0.5])
         
-        with input_col2:
-            if st.button("📤 Enviar", key="top_send", use_container_width=True):
-                if user_input:
-                    # Adicionar mensagem do usuário
-                    st.session_state.chat_messages.append({"role": "user", "content": user_input})
-                    
-                    # Obter resposta
-                    with st.spinner("Analisando..."):
-                        response = get_chat_response(user_input, st.session_state.project_data)
-                    
-                    # Adicionar resposta
-                    st.session_state.chat_messages.append({"role": "assistant", "content": response})
-                    
-                    # Rerun para mostrar nova mensagem
+        with chat_main_col2:
+            # Área de mensagens expandida
+            chat_area = st.container(height=250)
+            with chat_area:
+                # Se não houver mensagens, mostrar mensagem inicial
+                if len(st.session_state.chat_messages) == 0:
+                    initial_msg = get_initial_chat_message()
+                    st.markdown(f'<div class="chat-message assistant-message">🤖</div>', 
+                              unsafe_allow_html=True)
+                    st.markdown(initial_msg, unsafe_allow_html=True)
+                else:
+                    # Mostrar mensagens completas
+                    for message in st.session_state.chat_messages[-5:]:  # Últimas 5 mensagens
+                        if message["role"] == "user":
+                            st.markdown(f'<div class="chat-message user-message">👤 {message["content"]}</div>', 
+                                      unsafe_allow_html=True)
+                        else:
+                            # Mostrar resposta completa do bot
+                            st.markdown(f'<div class="chat-message assistant-message">🤖</div>', 
+                                      unsafe_allow_html=True)
+                            # Usar markdown para formatar a resposta completa
+                            st.markdown(message["content"], unsafe_allow_html=True)
+            
+            # Área de input
+            input_col1, input_col2, input_col3 = st.columns([10, 1, 1])
+            
+            with input_col1:
+                user_input = st.text_input(
+                    "Digite sua pergunta:", 
+                    key="top_chat_input", 
+                    label_visibility="collapsed", 
+                    placeholder="Ex: Analise meu projeto: Nome: power Categoria: Film & Video Meta: $10,000 País: US Início: 2025-07-03 Fim: 2025-08-02"
+                )
+            
+            with input_col2:
+                send_clicked = st.button("📤 Enviar", key="top_send", use_container_width=True)
+            
+            with input_col3:
+                if st.button("🗑️", key="top_clear", help="Limpar chat", use_container_width=True):
+                    st.session_state.chat_messages = []
+                    st.session_state.extraction_method = None
+                    st.session_state.extraction_trace = []
+                    st.session_state.chat_turn_stats = []
+                    rerun_fragment()
+            
+            if send_clicked and user_input:
+                # Adicionar mensagem do usuário
+                st.session_state.chat_messages.append({"role": "user", "content": user_input})
+                st.session_state.pending_chat_summary = None
+                st.session_state.last_prompt_tokens = None
+                st.session_state.last_llm_usage = None
+                
+                # Obter resposta (predições e respostas offline chegam prontas; a OpenAI chega em pedaços)
+                previous_prediction = st.session_state.prediction_result
+                start = time.perf_counter()
+                with st.spinner("Analisando..."):
+                    response = get_chat_response(user_input, st.session_state.project_data, stream=STREAM_RESPONSES)
+                if not isinstance(response, str):
+                    st.markdown('<div class="chat-message assistant-message">🤖</div>', unsafe_allow_html=True)
+                    response = render_ai_response(response, "Analisando...", boxed=False)
+                
+                # Adicionar resposta (relatórios de predição levam junto a versão resumida para o histórico)
+                assistant_message = {"role": "assistant", "content": response}
+                if st.session_state.pending_chat_summary:
+                    assistant_message["summary"] = st.session_state.pending_chat_summary
+                st.session_state.chat_messages.append(assistant_message)
+                
+                # Tokens de entrada e latência das respostas da OpenAI
+                if st.session_state.last_prompt_tokens:
+                    usage = st.session_state.last_llm_usage or {}
+                    st.session_state.chat_turn_stats.append({
+                        "prompt_tokens": st.session_state.last_prompt_tokens,
+                        "cached_tokens": usage.get("cached_tokens"),
+                        "ttft_ms": usage.get("ttft_ms"),
+                        "latency_ms": (time.perf_counter() - start) * 1000
+                    })
+                    st.session_state.chat_turn_stats = st.session_state.chat_turn_stats[-50:]
+                
+                # Uma nova predição muda as abas e a sidebar: rerun completo; senão só o chat
+                if st.session_state.prediction_result is not previous_prediction:
                     st.rerun()
+                rerun_fragment()
+            
+            if st.session_state.chat_turn_stats:
+                last_turn = st.session_state.chat_turn_stats[-1]
+                cache_info = ""
+                if last_turn.get("cached_tokens") is not None:
+                    cache_info = f" · {last_turn['cached_tokens']:,} em cache na OpenAI"
+                if last_turn.get("ttft_ms") is not None:
+                    cache_info += f" · 1º token em {last_turn['ttft_ms']:,.0f} ms"
+                st.caption(
+                    f"🧮 Último turno: {last_turn['prompt_tokens']:,} tokens de entrada "
+                    f"(limite {CHAT_INPUT_TOKEN_BUDGET:,}){cache_info} · {last_turn['latency_ms']:,.0f} ms"
+                )
+            
+            cpu_stats = st.session_state.run_cpu_ms
+            if "chat" in cpu_stats and "app" in cpu_stats:
+                st.caption(
+                    f"⚙️ CPU por execução: só o chat {cpu_stats['chat']:.0f} ms · "
+                    f"app completo {cpu_stats['app']:.0f} ms"
+                )
         
-        with input_col3:
-            if st.button("🗑️", key="top_clear", help="Limpar chat", use_container_width=True):
-                st.session_state.chat_messages = []
-                st.session_state.extraction_method = None
-                st.rerun()
+        st.markdown('</div>', unsafe_allow_html=True)
     
-    st.markdown('</div>', unsafe_allow_html=True)
+    st.session_state.run_cpu_ms["chat"] = (time.thread_time() - cpu_start) * 1000
+
+render_chat()
 
 st.markdown("---")
 
@@ -1419,7 +3792,7 @@ st.title("🚀 Kickstarter Success Predictor")
 st.markdown("### Descubra as chances de sucesso do seu projeto antes de lançar!")
 
 # Tabs principais
-tab1, tab2, tab3 = st.tabs(["🔮 Predictor", "🤖 Análise AI", "📊 Dashboard"])
+tab1, tab2, tab3, tab4 = st.tabs(["🔮 Predictor", "🤖 Análise AI", "📊 Dashboard", "📦 Predição em Lote"])
 
 with tab1:
     # Layout principal - duas colunas
@@ -1567,8 +3940,8 @@ with tab1:
                 st.markdown("### 4️⃣ Meta Financeira")
                 goal_amount = st.number_input(
                     "Meta em dólares (USD)",
-                    min_value=100,
-                    max_value=1000000,
+                    min_value=GOAL_MIN_USD,
+                    max_value=GOAL_MAX_USD,
                     value=10000,
                     step=500,
                     help="Converta para USD se estiver em outra moeda"
@@ -1649,164 +4022,221 @@ with tab1:
                     # Fazer requisição
                     with st.spinner("Analisando seu projeto..."):
                         try:
-                            response = requests.post(f"{API_URL}/predict", json=project_data)
+                            result = predict_project(project_data)
+                            st.session_state.prediction_result = result
                             
-                            if response.status_code == 200:
-                                result = response.json()
-                                st.session_state.prediction_result = result
-                                
-                                # Extrair resultados
-                                probability = result['success_probability']
-                                prediction = result['prediction']
-                                confidence = result['confidence']
-                                recommendations = result['recommendations']
-                                threshold = result['threshold_used']
-                                
-                                # Criar gauge chart
-                                fig = go.Figure(go.Indicator(
-                                    mode="gauge+number+delta",
-                                    value=probability * 100,
-                                    domain={'x': [0, 1], 'y': [0, 1]},
-                                    title={'text': "Probabilidade de Sucesso"},
-                                    delta={'reference': threshold * 100, 'relative': True},
-                                    gauge={
-                                        'axis': {'range': [None, 100]},
-                                        'bar': {'color': "darkblue"},
-                                        'steps': [
-                                            {'range': [0, 30], 'color': "lightgray"},
-                                            {'range': [30, 70], 'color': "gray"}
-                                        ],
-                                        'threshold': {
-                                            'line': {'color': "red", 'width': 4},
-                                            'thickness': 0.75,
-                                            'value': threshold * 100
-                                        }
+                            # Extrair resultados
+                            probability = result['success_probability']
+                            prediction = result['prediction']
+                            confidence = result['confidence']
+                            recommendations = result['recommendations']
+                            threshold = result['threshold_used']
+                            
+                            # Criar gauge chart
+                            fig = go.Figure(go.Indicator(
+                                mode="gauge+number+delta",
+                                value=probability * 100,
+                                domain={'x': [0, 1], 'y': [0, 1]},
+                                title={'text': "Probabilidade de Sucesso"},
+                                delta={'reference': threshold * 100, 'relative': True},
+                                gauge={
+                                    'axis': {'range': [None, 100]},
+                                    'bar': {'color': "darkblue"},
+                                    'steps': [
+                                        {'range': [0, 30], 'color': "lightgray"},
+                                        {'range': [30, 70], 'color': "gray"}
+                                    ],
+                                    'threshold': {
+                                        'line': {'color': "red", 'width': 4},
+                                        'thickness': 0.75,
+                                        'value': threshold * 100
                                     }
-                                ))
-                                
-                                fig.update_layout(height=300)
-                                st.plotly_chart(fig, use_container_width=True)
-                                
-                                # Métricas principais
-                                metric_col1, metric_col2 = st.columns(2)
-                                
-                                with metric_col1:
-                                    st.metric(
-                                        "Probabilidade",
-                                        f"{probability:.1%}",
-                                        delta=f"{(probability - threshold)*100:.1f}% do threshold"
+                                }
+                            ))
+                            
+                            fig.update_layout(height=300)
+                            st.plotly_chart(fig, use_container_width=True)
+                            
+                            # Simulação "e se?": toda a grade pontuada de uma vez, sem novas chamadas à API
+                            try:
+                                whatif_start = time.perf_counter()
+                                whatif_grid = compute_whatif_grid(
+                                    project_name, selected_category, selected_country,
+                                    project_data["launched"], float(goal_amount)
+                                )
+                                whatif_ms = (time.perf_counter() - whatif_start) * 1000
+                                st.plotly_chart(
+                                    build_whatif_figure(whatif_grid, threshold, float(goal_amount), campaign_days),
+                                    use_container_width=True
+                                )
+                                st.caption(
+                                    f"🔀 {whatif_grid['probabilities'].size} cenários calculados com o modelo local "
+                                    f"em {whatif_ms:.0f} ms · a linha tracejada separa Sucesso de Fracasso"
+                                )
+                            except Exception as e:
+                                st.caption(f"🔀 Simulação meta × duração indisponível: {e}")
+                            
+                            # Menor ajuste de meta/duração que cruza o threshold
+                            if probability < threshold:
+                                st.markdown("### 🎯 Menor ajuste para chegar ao threshold")
+                                try:
+                                    optimizer_start = time.perf_counter()
+                                    optimization = optimize_goal_duration(
+                                        project_name, selected_category, selected_country,
+                                        project_data["launched"], float(goal_amount), campaign_days, threshold
                                     )
+                                    optimizer_ms = (time.perf_counter() - optimizer_start) * 1000
+                                    shown = set()
+                                    for label, suggestion in [
+                                        ("Só a meta", optimization["goal_only"]),
+                                        ("Só a duração", optimization["duration_only"]),
+                                        ("Meta e duração", optimization["combined"])
+                                    ]:
+                                        if suggestion is None:
+                                            continue
+                                        key = (suggestion["usd_goal_real"], suggestion["campaign_days"])
+                                        if key in shown:
+                                            continue
+                                        shown.add(key)
+                                        goal_change = suggestion["usd_goal_real"] / goal_amount - 1
+                                        days_change = suggestion["campaign_days"] - campaign_days
+                                        st.info(
+                                            f"**{label}:** meta ${suggestion['usd_goal_real']:,.0f} ({goal_change:+.0%}) "
+                                            f"em {suggestion['campaign_days']} dias ({days_change:+d}) → "
+                                            f"{suggestion['success_probability']:.1%}"
+                                        )
+                                    if not shown:
+                                        st.warning(
+                                            f"Nenhuma combinação de meta (${GOAL_MIN_USD:,}–${GOAL_MAX_USD:,}) e duração "
+                                            f"(1–{WHATIF_MAX_DAYS} dias) alcança o threshold - revise categoria e título."
+                                        )
+                                    st.caption(
+                                        f"🎯 {optimization['evaluations']} avaliações do modelo local "
+                                        f"em {optimizer_ms:.0f} ms"
+                                    )
+                                except Exception as e:
+                                    st.caption(f"🎯 Otimizador indisponível: {e}")
+                            
+                            # Métricas principais
+                            metric_col1, metric_col2 = st.columns(2)
+                            
+                            with metric_col1:
+                                st.metric(
+                                    "Probabilidade",
+                                    f"{probability:.1%}",
+                                    delta=f"{(probability - threshold)*100:.1f}% do threshold"
+                                )
+                            
+                            with metric_col2:
+                                color = "🟢" if prediction == "Sucesso" else "🔴"
+                                st.metric("Predição", f"{color} {prediction}")
+                            
+                            # Análise personalizada para o usuário
+                            if user_email in USERS_DATABASE:
+                                st.markdown("### 🎯 Análise Personalizada")
                                 
-                                with metric_col2:
-                                    color = "🟢" if prediction == "Sucesso" else "🔴"
-                                    st.metric("Predição", f"{color} {prediction}")
-                                
-                                # Análise personalizada para o usuário
-                                if user_email in USERS_DATABASE:
-                                    st.markdown("### 🎯 Análise Personalizada")
-                                    
-                                    # Comparar com histórico pessoal
-                                    if user_data['taxa_sucesso_pessoal'] > 0:
-                                        if probability > user_data['taxa_sucesso_pessoal']:
-                                            st.success(f"📈 Este projeto tem potencial {(probability - user_data['taxa_sucesso_pessoal'])*100:.1f}% acima da sua média histórica ({user_data['taxa_sucesso_pessoal']:.0%})!")
-                                        else:
-                                            st.warning(f"📉 Este projeto está {(user_data['taxa_sucesso_pessoal'] - probability)*100:.1f}% abaixo da sua média histórica ({user_data['taxa_sucesso_pessoal']:.0%})")
-                                    
-                                    # Verificar experiência na categoria
-                                    if selected_category in user_data['categorias_experiencia']:
-                                        st.info(f"✅ Sua experiência em {selected_category} é um diferencial importante!")
+                                # Comparar com histórico pessoal
+                                if user_data['taxa_sucesso_pessoal'] > 0:
+                                    if probability > user_data['taxa_sucesso_pessoal']:
+                                        st.success(f"📈 Este projeto tem potencial {(probability - user_data['taxa_sucesso_pessoal'])*100:.1f}% acima da sua média histórica ({user_data['taxa_sucesso_pessoal']:.0%})!")
                                     else:
-                                        st.warning(f"⚠️ Primeira vez em {selected_category}? Considere buscar mentoria ou parceiros experientes nesta categoria.")
-                                    
-                                    # Mostrar projetos similares do histórico
-                                    similar_projects = [p for p in user_data.get('projetos_detalhes', []) if p['categoria'] == selected_category]
-                                    if similar_projects:
-                                        st.markdown("#### 📚 Seus projetos anteriores nesta categoria:")
-                                        for proj in similar_projects:
-                                            emoji = "✅" if proj['sucesso'] else "❌"
-                                            st.caption(f"{emoji} {proj['nome']} - Meta: ${proj['meta']:,}")
+                                        st.warning(f"📉 Este projeto está {(user_data['taxa_sucesso_pessoal'] - probability)*100:.1f}% abaixo da sua média histórica ({user_data['taxa_sucesso_pessoal']:.0%})")
                                 
-                                # Recomendações
-                                st.markdown("### 💡 Recomendações Personalizadas")
-                                
-                                for rec in recommendations:
-                                    if "✅" in rec:
-                                        st.success(rec)
-                                    elif "⚠️" in rec:
-                                        st.warning(rec)
-                                    elif "🔴" in rec:
-                                        st.error(rec)
-                                    elif "💡" in rec:
-                                        st.info(rec)
-                                    else:
-                                        st.write(rec)
+                                # Verificar experiência na categoria
+                                if selected_category in user_data['categorias_experiencia']:
+                                    st.info(f"✅ Sua experiência em {selected_category} é um diferencial importante!")
+                                else:
+                                    st.warning(f"⚠️ Primeira vez em {selected_category}? Considere buscar mentoria ou parceiros experientes nesta categoria.")
                                 
-                                # Botões de ação rápida
-                                st.markdown("### 🚀 Ações Rápidas com AI")
+                                # Mostrar projetos similares do histórico
+                                similar_projects = [p for p in user_data.get('projetos_detalhes', []) if p['categoria'] == selected_category]
+                                if similar_projects:
+                                    st.markdown("#### 📚 Seus projetos anteriores nesta categoria:")
+                                    for proj in similar_projects:
+                                        emoji = "✅" if proj['sucesso'] else "❌"
+                                        st.caption(f"{emoji} {proj['nome']} - Meta: ${proj['meta']:,}")
+                            
+                            # Recomendações
+                            st.markdown("### 💡 Recomendações Personalizadas")
+                            
+                            for rec in recommendations:
+                                if "✅" in rec:
+                                    st.success(rec)
+                                elif "⚠️" in rec:
+                                    st.warning(rec)
+                                elif "🔴" in rec:
+                                    st.error(rec)
+                                elif "💡" in rec:
+                                    st.info(rec)
+                                else:
+                                    st.write(rec)
+                            
+                            # Botões de ação rápida
+                            st.markdown("### 🚀 Ações Rápidas com AI")
+                            
+                            col_a1, col_a2 = st.columns(2)
+                            
+                            with col_a1:
+                                if st.button("📝 Melhorar Título", use_container_width=True):
+                                    with st.spinner("Gerando sugestões..."):
+                                        suggestions = generate_title_suggestions(project_name, selected_category)
+                                        st.info(suggestions)
+                            
+                            with col_a2:
+                                if st.button("📋 Gerar Estratégia", use_container_width=True):
+                                    with st.spinner("Criando estratégia..."):
+                                        strategy = optimize_campaign_strategy(project_data, result)
+                                        st.info(strategy)
+                            
+                            # Análise detalhada
+                            with st.expander("📈 Ver Análise Detalhada"):
+                                st.markdown("### Fatores que influenciaram a predição:")
                                 
-                                col_a1, col_a2 = st.columns(2)
+                                # Criar dataframe com os fatores
+                                factors_data = {
+                                    'Fator': [
+                                        f'Categoria ({selected_category})',
+                                        f'Meta (${goal_amount:,})',
+                                        f'Duração ({campaign_days} dias)',
+                                        f'País ({selected_country})',
+                                        f'Título ({len(project_name.split())} palavras)'
+                                    ],
+                                    'Impacto': [
+                                        float(categories[selected_category]['avg_success'].rstrip('%')),
+                                        max(0, 100 - (goal_amount / 500)),  # Simplificado
+                                        100 if 25 <= campaign_days <= 35 else 50,
+                                        80 if selected_country == 'US' else 60,
+                                        80 if 4 <= len(project_name.split()) <= 7 else 50
+                                    ]
+                                }
                                 
-                                with col_a1:
-                                    if st.button("📝 Melhorar Título", use_container_width=True):
-                                        with st.spinner("Gerando sugestões..."):
-                                            suggestions = generate_title_suggestions(project_name, selected_category)
-                                            st.info(suggestions)
+                                df_factors = pd.DataFrame(factors_data)
                                 
-                                with col_a2:
-                                    if st.button("📋 Gerar Estratégia", use_container_width=True):
-                                        with st.spinner("Criando estratégia..."):
-                                            strategy = optimize_campaign_strategy(project_data, result)
-                                            st.info(strategy)
+                                fig_factors = px.bar(
+                                    df_factors, 
+                                    x='Impacto', 
+                                    y='Fator',
+                                    orientation='h',
+                                    title='Impacto de cada fator na predição',
+                                    color='Impacto',
+                                    color_continuous_scale='RdYlGn'
+                                )
                                 
-                                # Análise detalhada
-                                with st.expander("📈 Ver Análise Detalhada"):
-                                    st.markdown("### Fatores que influenciaram a predição:")
-                                    
-                                    # Criar dataframe com os fatores
-                                    factors_data = {
-                                        'Fator': [
-                                            f'Categoria ({selected_category})',
-                                            f'Meta (${goal_amount:,})',
-                                            f'Duração ({campaign_days} dias)',
-                                            f'País ({selected_country})',
-                                            f'Título ({len(project_name.split())} palavras)'
-                                        ],
-                                        'Impacto': [
-                                            float(categories[selected_category]['avg_success'].rstrip('%')),
-                                            max(0, 100 - (goal_amount / 500)),  # Simplificado
-                                            100 if 25 <= campaign_days <= 35 else 50,
-                                            80 if selected_country == 'US' else 60,
-                                            80 if 4 <= len(project_name.split()) <= 7 else 50
-                                        ]
-                                    }
-                                    
-                                    df_factors = pd.DataFrame(factors_data)
-                                    
-                                    fig_factors = px.bar(
-                                        df_factors, 
-                                        x='Impacto', 
-                                        y='Fator',
-                                        orientation='h',
-                                        title='Impacto de cada fator na predição',
-                                        color='Impacto',
-                                        color_continuous_scale='RdYlGn'
-                                    )
-                                    
-                                    st.plotly_chart(fig_factors, use_container_width=True)
-                                    
-                                    # Comparação com projetos similares
-                                    st.markdown("### 📊 Comparação com projetos similares")
-                                    st.info(f"""
-                                    **Categoria {selected_category}:**
-                                    - Taxa de sucesso média: {categories[selected_category]['avg_success']}
-                                    - Sua probabilidade: {probability:.1%}
-                                    - Diferença: {probability*100 - float(categories[selected_category]['avg_success'].rstrip('%')):.1f}%
-                                    """)
-                                    
-                            else:
-                                st.error(f"Erro na API: {response.status_code}")
-                                st.json(response.json())
+                                st.plotly_chart(fig_factors, use_container_width=True)
                                 
+                                # Comparação com projetos similares
+                                st.markdown("### 📊 Comparação com projetos similares")
+                                st.info(f"""
+                                **Categoria {selected_category}:**
+                                - Taxa de sucesso média: {categories[selected_category]['avg_success']}
+                                - Sua probabilidade: {probability:.1%}
+                                - Diferença: {probability*100 - float(categories[selected_category]['avg_success'].rstrip('%')):.1f}%
+                                """)
+                            
+                        except PredictionAPIError as e:
+                            st.error(f"Erro na API: {e.status_code}")
+                            st.json(e.detail)
+                            
                         except requests.exceptions.ConnectionError:
                             st.error("❌ Não foi possível conectar com a API. Verifique se está rodando em http://localhost:8000")
                         except Exception as e:
@@ -1828,26 +4258,13 @@ with tab1:
                 
                 # Gráfico de exemplo - taxas por categoria
                 categories = load_categories()
-                cat_names = list(categories.keys())
-                cat_success_rates = [float(categories[cat]['avg_success'].rstrip('%')) for cat in cat_names]
-                
-                df_categories = pd.DataFrame({
-                    'Categoria': cat_names,
-                    'Taxa de Sucesso (%)': cat_success_rates
-                }).sort_values('Taxa de Sucesso (%)', ascending=True)
-                
-                fig_cats = px.bar(
-                    df_categories,
-                    x='Taxa de Sucesso (%)',
-                    y='Categoria',
-                    orientation='h',
-                    title='Taxa de Sucesso por Categoria (Histórico)',
-                    color='Taxa de Sucesso (%)',
-                    color_continuous_scale='RdYlGn',
-                    range_x=[0, 70]
+                fig_cats = build_category_success_figure(
+                    categories_hash(categories),
+                    categories,
+                    'Taxa de Sucesso por Categoria (Histórico)',
+                    range_x=[0, 70],
+                    height=500
                 )
-                
-                fig_cats.update_layout(height=500)
                 st.plotly_chart(fig_cats, use_container_width=True)
 
 # Tab 2 - Análise AI
@@ -1885,13 +4302,20 @@ with tab2:
             with col_ai2:
                 st.subheader("💡 Análise Inteligente")
                 
+                refresh_ai = st.toggle(
+                    "🔄 Regenerar (ignorar respostas salvas)",
+                    key="llm_refresh",
+                    help="Por padrão, análises já feitas para o mesmo projeto e perfil voltam do cache"
+                )
+                
                 if st.button("🔍 Gerar Análise Completa", use_container_width=True):
-                    with st.spinner("Analisando com AI..."):
-                        analysis = analyze_project_with_ai(
-                            st.session_state.project_data,
-                            st.session_state.prediction_result
-                        )
-                        st.markdown(analysis)
+                    analysis = analyze_project_with_ai(
+                        st.session_state.project_data,
+                        st.session_state.prediction_result,
+                        stream=STREAM_RESPONSES,
+                        refresh=refresh_ai
+                    )
+                    render_ai_response(analysis, "Analisando com AI...", boxed=False)
                 
                 st.markdown("---")
                 
@@ -1902,172 +4326,426 @@ with tab2:
                 
                 with tool_col1:
                     if st.button("📝 Otimizar Título", use_container_width=True):
-                        with st.spinner("Gerando títulos..."):
-                            titles = generate_title_suggestions(
-                                st.session_state.project_data['name'],
-                                st.session_state.project_data['main_category']
-                            )
-                            st.info(titles)
+                        titles = generate_title_suggestions(
+                            st.session_state.project_data['name'],
+                            st.session_state.project_data['main_category'],
+                            stream=STREAM_RESPONSES,
+                            refresh=refresh_ai
+                        )
+                        render_ai_response(titles, "Gerando títulos...")
                     
                     if st.button("💰 Analisar Meta", use_container_width=True):
-                        with st.spinner("Analisando meta..."):
-                            user_context = ""
-                            if st.session_state.user_data and st.session_state.user_data != USERS_DATABASE["default"]:
-                                user_context = f"Considerando que {st.session_state.user_data['nome']} tem histórico de {st.session_state.user_data['projetos_historico']} projetos com taxa de sucesso de {st.session_state.user_data['taxa_sucesso_pessoal']:.0%}, "
-                            
-                            prompt = f"""
-                            {user_context}analise se a meta de ${st.session_state.project_data['usd_goal_real']:,.2f} 
-                            é adequada para um projeto de {st.session_state.project_data['main_category']} 
-                            no {st.session_state.project_data['country']}.
-                            
-                            Compare com projetos similares bem-sucedidos e sugira ajustes se necessário.
-                            """
-                            analysis = get_chat_response(prompt)
-                            st.info(analysis)
+                        analysis = analyze_goal_with_ai(
+                            st.session_state.project_data,
+                            stream=STREAM_RESPONSES,
+                            refresh=refresh_ai
+                        )
+                        render_ai_response(analysis, "Analisando meta...")
                 
                 with tool_col2:
                     if st.button("📅 Plano de 30 Dias", use_container_width=True):
-                        with st.spinner("Criando plano..."):
-                            strategy = optimize_campaign_strategy(
-                                st.session_state.project_data,
-                                st.session_state.prediction_result
-                            )
-                            st.info(strategy)
+                        strategy = optimize_campaign_strategy(
+                            st.session_state.project_data,
+                            st.session_state.prediction_result,
+                            stream=STREAM_RESPONSES,
+                            refresh=refresh_ai
+                        )
+                        render_ai_response(strategy, "Criando plano...")
                     
                     if st.button("🎁 Estrutura de Recompensas", use_container_width=True):
-                        with st.spinner("Criando recompensas..."):
-                            user_context = ""
-                            if st.session_state.user_data and st.session_state.user_data != USERS_DATABASE["default"]:
-                                user_context = f"Considerando a experiência de {st.session_state.user_data['nome']} em {', '.join(st.session_state.user_data['categorias_experiencia'])}, "
-                            
-                            prompt = f"""
-                            {user_context}crie uma estrutura de recompensas para este projeto:
-                            {json.dumps(st.session_state.project_data, indent=2)}
-                            
-                            Inclua:
-                            1. Early bird (25% desconto)
-                            2. Níveis regulares (pelo menos 5)
-                            3. Recompensa premium
-                            4. Preços e o que cada nível recebe
-                            
-                            Seja criativo e específico para a categoria {st.session_state.project_data['main_category']}.
-                            """
-                            rewards = get_chat_response(prompt)
-                            st.info(rewards)
+                        rewards = suggest_reward_structure(
+                            st.session_state.project_data,
+                            stream=STREAM_RESPONSES,
+                            refresh=refresh_ai
+                        )
+                        render_ai_response(rewards, "Criando recompensas...")
+            
+            st.markdown("---")
+            st.subheader("⚡ Relatório Completo")
+            st.caption("Gera a análise e as quatro ferramentas ao mesmo tempo; cada seção aparece assim que fica pronta.")
+            
+            generate_report = st.button("⚡ Gerar Tudo", use_container_width=True)
+            report = st.session_state.get('ai_report')
+            if generate_report or (report and report['project'] == st.session_state.project_data):
+                report_cols = st.columns(2)
+                placeholders = {}
+                for index, (section, title) in enumerate(AI_REPORT_SECTIONS):
+                    with report_cols[index % 2]:
+                        st.markdown(f"#### {title}")
+                        placeholders[section] = st.empty()
+                
+                if generate_report:
+                    for section, _ in AI_REPORT_SECTIONS:
+                        placeholders[section].info("⏳ Gerando...")
+                    
+                    def show_section(section, text, elapsed):
+                        placeholders[section].info(text)
+                    
+                    start = time.perf_counter()
+                    sections, call_seconds = generate_ai_report(
+                        st.session_state.project_data,
+                        st.session_state.prediction_result,
+                        on_result=show_section,
+                        refresh=refresh_ai
+                    )
+                    st.session_state.ai_report = {
+                        "project": copy.deepcopy(st.session_state.project_data),
+                        "sections": sections,
+                        "wall_seconds": time.perf_counter() - start,
+                        "call_seconds": call_seconds
+                    }
+                else:
+                    for section, text in report['sections'].items():
+                        placeholders[section].info(text)
+                
+                report = st.session_state.ai_report
+                if report['call_seconds']:
+                    st.caption(
+                        f"⏱️ Relatório em {report['wall_seconds']:.1f}s "
+                        f"(as {len(report['sections'])} chamadas somam {report['call_seconds']:.1f}s)"
+                    )
+            
+            if OPENAI_AVAILABLE:
+                llm_stats = get_llm_cache().stats()
+                st.caption(
+                    f"🗃️ Cache de respostas AI: {llm_stats['hits']} hits · {llm_stats['misses']} misses · "
+                    f"{llm_stats['size']}/{llm_stats['max_size']} itens "
+                    f"({'disco' if llm_stats['persistent'] else 'só memória'})"
+                )
         else:
             st.info("👈 Primeiro faça uma predição na aba 'Predictor' para usar a análise AI")
 
 # Tab 3 - Dashboard
-with tab3:
-        st.header("📊 Dashboard de Insights")
-        
-        # Estatísticas gerais
-        col_stats1, col_stats2, col_stats3, col_stats4 = st.columns(4)
-        
-        with col_stats1:
-            st.metric("Projetos Analisados", "378,661")
-        with col_stats2:
-            st.metric("Taxa de Sucesso Geral", "35.9%")
-        with col_stats3:
-            st.metric("Meta Média de Sucesso", "$9,426")
-        with col_stats4:
-            st.metric("Duração Média", "33 dias")
-        
-        # Mostrar estatísticas do usuário atual se logado
-        if st.session_state.user_email and st.session_state.user_email in USERS_DATABASE:
-            st.markdown("### 👤 Suas Estatísticas Pessoais")
-            user_stats_col1, user_stats_col2, user_stats_col3, user_stats_col4 = st.columns(4)
-            
-            with user_stats_col1:
-                st.metric("Seus Projetos", st.session_state.user_data['projetos_historico'])
-            with user_stats_col2:
-                st.metric("Sua Taxa de Sucesso", f"{st.session_state.user_data['taxa_sucesso_pessoal']:.0%}")
-            with user_stats_col3:
-                st.metric("Anos de Experiência", st.session_state.user_data['experiencia_anos'])
-            with user_stats_col4:
-                st.metric("Categorias", len(st.session_state.user_data['categorias_experiencia']))
-        
-        # Gráficos de insights
-        categories = load_categories()
-        
-        # Gráfico 1: Taxa de sucesso por categoria
-        cat_names = list(categories.keys())
-        cat_success_rates = [float(categories[cat]['avg_success'].rstrip('%')) for cat in cat_names]
-        
-        df_cat_success = pd.DataFrame({
-            'Categoria': cat_names,
-            'Taxa de Sucesso (%)': cat_success_rates
-        }).sort_values('Taxa de Sucesso (%)', ascending=True)
+@st.fragment
+def render_dashboard():
+    """Aba Dashboard como fragmento independente do resto do app"""
+    st.header("📊 Dashboard de Insights")
+    
+    # Estatísticas gerais
+    col_stats1, col_stats2, col_stats3, col_stats4 = st.columns(4)
+    
+    with col_stats1:
+        st.metric("Projetos Analisados", "378,661")
+    with col_stats2:
+        st.metric("Taxa de Sucesso Geral", "35.9%")
+    with col_stats3:
+        st.metric("Meta Média de Sucesso", "$9,426")
+    with col_stats4:
+        st.metric("Duração Média", "33 dias")
+    
+    # Mostrar estatísticas do usuário atual se logado
+    if st.session_state.user_email and st.session_state.user_email in USERS_DATABASE:
+        st.markdown("### 👤 Suas Estatísticas Pessoais")
+        user_stats_col1, user_stats_col2, user_stats_col3, user_stats_col4 = st.columns(4)
         
-        fig_success = px.bar(
-            df_cat_success,
-            x='Taxa de Sucesso (%)',
-            y='Categoria',
-            orientation='h',
-            title='Taxa de Sucesso por Categoria',
-            color='Taxa de Sucesso (%)',
-            color_continuous_scale='RdYlGn'
+        with user_stats_col1:
+            st.metric("Seus Projetos", st.session_state.user_data['projetos_historico'])
+        with user_stats_col2:
+            st.metric("Sua Taxa de Sucesso", f"{st.session_state.user_data['taxa_sucesso_pessoal']:.0%}")
+        with user_stats_col3:
+            st.metric("Anos de Experiência", st.session_state.user_data['experiencia_anos'])
+        with user_stats_col4:
+            st.metric("Categorias", len(st.session_state.user_data['categorias_experiencia']))
+    
+    # Gráficos de insights
+    categories = load_categories()
+    
+    # Gráfico 1: Taxa de sucesso por categoria
+    fig_success = build_category_success_figure(
+        categories_hash(categories),
+        categories,
+        'Taxa de Sucesso por Categoria'
+    )
+    st.plotly_chart(fig_success, use_container_width=True)
+    
+    # Gráfico 2: Distribuição de metas
+    col_chart1, col_chart2 = st.columns(2)
+    
+    with col_chart1:
+        st.plotly_chart(build_goal_success_figure(), use_container_width=True)
+    
+    with col_chart2:
+        st.plotly_chart(build_duration_success_figure(), use_container_width=True)
+    
+    # Insights principais
+    st.markdown("### 💡 Insights Principais")
+    
+    col_insight1, col_insight2 = st.columns(2)
+    
+    with col_insight1:
+        st.info("""
+        **🎯 Melhores Práticas Identificadas:**
+        - Campanhas de 30 dias têm 42% de sucesso
+        - Metas abaixo de $10k têm 2x mais chance
+        - Lançar na terça aumenta em 20% as chances
+        - Vídeo de qualidade aumenta em 40% a conversão
+        """)
+    
+    with col_insight2:
+        st.warning("""
+        **⚠️ Principais Armadilhas:**
+        - Metas acima de $50k têm apenas 12% de sucesso
+        - Campanhas > 45 dias perdem momentum
+        - Títulos genéricos reduzem em 25% as chances
+        - Falta de atualizações afasta apoiadores
+        """)
+
+with tab3:
+    render_dashboard()
+
+# Tab 4 - Predição em Lote
+with tab4:
+        st.header("📦 Predição em Lote")
+        st.markdown(
+            "Envie um arquivo **CSV** ou **Parquet** com as colunas "
+            "`name`, `main_category`, `country`, `usd_goal_real`, `launched` e `deadline` "
+            "(datas no formato YYYY-MM-DD)."
+        )
+        st.caption(
+            f"O arquivo é pontuado em blocos de {BATCH_CHUNK_ROWS:,} projetos com o modelo local, "
+            "independente do modo de predição configurado. O resultado é gravado em disco bloco a bloco."
         )
         
-        st.plotly_chart(fig_success, use_container_width=True)
-        
-        # Gráfico 2: Distribuição de metas
-        col_chart1, col_chart2 = st.columns(2)
+        uploaded_batch = st.file_uploader(
+            "Arquivo de projetos",
+            type=["csv", "parquet"],
+            key="batch_upload"
+        )
         
-        with col_chart1:
-            # Simulação de dados de distribuição de metas
-            goal_ranges = ['< $1k', '$1k-5k', '$5k-10k', '$10k-25k', '$25k-50k', '> $50k']
-            success_by_goal = [45, 42, 38, 28, 18, 12]
-            
-            fig_goal_success = px.bar(
-                x=goal_ranges,
-                y=success_by_goal,
-                title='Taxa de Sucesso por Faixa de Meta',
-                labels={'x': 'Faixa de Meta', 'y': 'Taxa de Sucesso (%)'},
-                color=success_by_goal,
-                color_continuous_scale='RdYlGn'
-            )
+        if uploaded_batch is not None and st.button("🚀 Pontuar Arquivo", use_container_width=True):
+            # Remover o resultado anterior desta sessão e os arquivos expirados de outras sessões
+            previous = st.session_state.get('batch_output')
+            if previous and os.path.exists(previous['path']):
+                os.remove(previous['path'])
+            st.session_state.batch_output = None
+            cleanup_batch_outputs()
+            output = None
             
-            st.plotly_chart(fig_goal_success, use_container_width=True)
+            try:
+                threshold = float(load_local_model()['optimal_threshold'])
+                total_rows = count_uploaded_rows(uploaded_batch)
+                progress = st.progress(0.0, text="Iniciando...")
+                preview = None
+                scored_rows = 0
+                success_rows = 0
+                invalid_rows = 0
+                start = time.perf_counter()
+                
+                output = tempfile.NamedTemporaryFile(
+                    mode="wb", suffix=".csv.gz", prefix=BATCH_OUTPUT_PREFIX, delete=False
+                )
+                with gzip.open(output, "wt", encoding="utf-8", newline="") as gz:
+                    for chunk in iter_project_chunks(uploaded_batch):
+                        scored = score_projects_chunk(chunk, threshold)
+                        scored.to_csv(gz, index=False, header=scored_rows == 0)
+                        
+                        if preview is None:
+                            preview = scored.head(20)
+                        scored_rows += len(scored)
+                        success_rows += int((scored['prediction'] == "Sucesso").sum())
+                        invalid_rows += int((scored['prediction'] == "Inválido").sum())
+                        progress.progress(
+                            min(scored_rows / total_rows, 1.0),
+                            text=f"{scored_rows:,} de ~{total_rows:,} projetos pontuados"
+                        )
+                output.close()
+                
+                elapsed = time.perf_counter() - start
+                progress.progress(1.0, text=f"✅ {scored_rows:,} projetos pontuados em {elapsed:.1f}s")
+                st.session_state.batch_output = {
+                    "path": output.name,
+                    "file_name": f"{os.path.splitext(uploaded_batch.name)[0]}_pontuado.csv.gz",
+                    "rows": scored_rows,
+                    "success": success_rows,
+                    "invalid": invalid_rows,
+                    "preview": preview
+                }
+            except Exception as e:
+                # Não deixar o arquivo parcial para trás
+                if output is not None:
+                    output.close()
+                    if os.path.exists(output.name):
+                        os.remove(output.name)
+                st.error(f"Erro ao pontuar arquivo: {str(e)}")
         
-        with col_chart2:
-            # Simulação de dados de duração
-            duration_ranges = ['< 20 dias', '20-30 dias', '30-40 dias', '40-50 dias', '> 50 dias']
-            success_by_duration = [25, 42, 38, 28, 15]
+        batch_output = st.session_state.get('batch_output')
+        if batch_output and os.path.exists(batch_output['path']):
+            batch_col1, batch_col2, batch_col3 = st.columns(3)
+            with batch_col1:
+                st.metric("Projetos Pontuados", f"{batch_output['rows']:,}")
+            with batch_col2:
+                valid_rows = max(batch_output['rows'] - batch_output['invalid'], 1)
+                st.metric("Previstos como Sucesso", f"{batch_output['success'] / valid_rows:.1%}")
+            with batch_col3:
+                st.metric("Linhas Inválidas", f"{batch_output['invalid']:,}")
             
-            fig_duration_success = px.bar(
-                x=duration_ranges,
-                y=success_by_duration,
-                title='Taxa de Sucesso por Duração da Campanha',
-                labels={'x': 'Duração', 'y': 'Taxa de Sucesso (%)'},
-                color=success_by_duration,
-                color_continuous_scale='RdYlGn'
-            )
+            if batch_output['preview'] is not None:
+                st.markdown("#### 👀 Prévia do resultado")
+                st.dataframe(batch_output['preview'], use_container_width=True)
             
-            st.plotly_chart(fig_duration_success, use_container_width=True)
+            # O st.download_button lê o arquivo compactado inteiro para a memória a cada
+            # rerun e o mantém no servidor enquanto a sessão estiver aberta; o disco só evita
+            # manter o DataFrame pontuado (bem maior) em memória durante a pontuação.
+            output_mb = os.path.getsize(batch_output['path']) / 1e6
+            st.caption(
+                f"Resultado compactado: {output_mb:.1f} MB (mantido em memória pelo Streamlit para o download; "
+                f"arquivos com mais de {BATCH_OUTPUT_TTL_S / 3600:g}h são removidos)."
+            )
+            with open(batch_output['path'], "rb") as result_file:
+                st.download_button(
+                    "⬇️ Baixar Resultado (CSV compactado)",
+                    data=result_file,
+                    file_name=batch_output['file_name'],
+                    mime="application/gzip",
+                    use_container_width=True
+                )
         
-        # Insights principais
-        st.markdown("### 💡 Insights Principais")
+        st.markdown("---")
+        st.subheader("💬 Extração em lote de mensagens")
+        st.markdown(
+            "Envie um **CSV** com a coluna `message` ou um **TXT** com uma mensagem por linha. "
+            "Os projetos são extraídos localmente com o spaCy (`nlp.pipe`), sem chamadas à OpenAI."
+        )
         
-        col_insight1, col_insight2 = st.columns(2)
+        uploaded_messages = st.file_uploader(
+            "Arquivo de mensagens",
+            type=["csv", "txt"],
+            key="message_batch_upload"
+        )
+        n_process = st.number_input(
+            "Processos do spaCy",
+            min_value=1,
+            max_value=max(os.cpu_count() or 1, 1),
+            value=1,
+            help="Mais de um processo só compensa em arquivos grandes"
+        )
         
-        with col_insight1:
-            st.info("""
-            **🎯 Melhores Práticas Identificadas:**
-            - Campanhas de 30 dias têm 42% de sucesso
-            - Metas abaixo de $10k têm 2x mais chance
-            - Lançar na terça aumenta em 20% as chances
-            - Vídeo de qualidade aumenta em 40% a conversão
-            """)
+        if uploaded_messages is not None and st.button("🔎 Extrair Projetos", use_container_width=True, disabled=not SPACY_AVAILABLE):
+            try:
+                if uploaded_messages.name.lower().endswith(".csv"):
+                    messages = pd.read_csv(uploaded_messages)['message'].fillna("").astype(str).tolist()
+                else:
+                    messages = [
+                        line.strip() for line in uploaded_messages.getvalue().decode("utf-8").splitlines()
+                        if line.strip()
+                    ]
+                
+                with st.spinner(f"Extraindo {len(messages):,} mensagens..."):
+                    start = time.perf_counter()
+                    extracted = extract_projects_batch(messages, n_process=int(n_process))
+                    elapsed = time.perf_counter() - start
+                
+                rows = []
+                for message, result in zip(messages, extracted):
+                    project = result['project'] or {}
+                    rows.append({
+                        "message": message,
+                        "name": project.get('name', result['fields'].get('nome')),
+                        "main_category": project.get('main_category', result['fields'].get('categoria')),
+                        "country": project.get('country', result['fields'].get('pais')),
+                        "usd_goal_real": project.get('usd_goal_real'),
+                        "launched": project.get('launched'),
+                        "deadline": project.get('deadline'),
+                        "complete": result['project'] is not None
+                    })
+                st.session_state.message_batch_output = {
+                    "table": pd.DataFrame(rows),
+                    "elapsed": elapsed,
+                    "file_name": f"{os.path.splitext(uploaded_messages.name)[0]}_projetos.csv"
+                }
+            except KeyError:
+                st.error("O CSV precisa ter a coluna `message`.")
+            except Exception as e:
+                st.error(f"Erro ao extrair mensagens: {str(e)}")
         
-        with col_insight2:
-            st.warning("""
-            **⚠️ Principais Armadilhas:**
-            - Metas acima de $50k têm apenas 12% de sucesso
-            - Campanhas > 45 dias perdem momentum
-            - Títulos genéricos reduzem em 25% as chances
-            - Falta de atualizações afasta apoiadores
-            """)
+        message_output = st.session_state.get('message_batch_output')
+        if message_output:
+            table = message_output['table']
+            msg_col1, msg_col2, msg_col3 = st.columns(3)
+            with msg_col1:
+                st.metric("Mensagens", f"{len(table):,}")
+            with msg_col2:
+                st.metric("Projetos Completos", f"{int(table['complete'].sum()):,}")
+            with msg_col3:
+                throughput = len(table) / message_output['elapsed'] if message_output['elapsed'] else 0
+                st.metric("Mensagens/s", f"{throughput:,.0f}")
+            
+            st.dataframe(table.head(200), use_container_width=True)
+            st.download_button(
+                "⬇️ Baixar Projetos Extraídos (CSV)",
+                data=table.to_csv(index=False).encode("utf-8"),
+                file_name=message_output['file_name'],
+                mime="text/csv",
+                use_container_width=True
+            )
+
+@st.fragment
+def render_api_connection():
+    """Configurador da conexão com a API: testar uma URL reexecuta só este fragmento"""
+    st.markdown("### Conexão com a API")
+    
+    # Pegar URL atual ou usar padrão
+    current_url = st.session_state.get('api_url', API_URL)
+    
+    # Input para URL
+    new_url = st.text_input(
+        "URL da API:",
+        value=current_url,
+        placeholder="https://abc123.ngrok-free.app",
+        help="Cole aqui a URL do ngrok ou use http://localhost:8000"
+    )
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if st.button("Testar", use_container_width=True):
+            # Consulta avulsa: a URL digitada ainda não ganha um monitor em segundo plano
+            with st.spinner("Testando..."):
+                test_result = probe_api_health(new_url)
+            if test_result["online"]:
+                st.success(f"✅ OK! ({test_result['latency_ms']:.0f} ms)")
+                st.session_state.api_url = new_url
+            else:
+                st.error(f"❌ Falhou! ({test_result['error']})")
+    
+    with col2:
+        if st.button("Salvar", use_container_width=True):
+            st.session_state.api_url = new_url
+            st.rerun()
+    
+    st.caption(f"Atual: {current_url}")
+    
+    # Instruções
+    st.markdown("""
+    ---
+    **Como usar:**
+    1. Execute a API local
+    2. Execute ngrok
+    3. Cole a URL aqui
+    """)
+
+@st.fragment(run_every=API_HEALTH_INTERVAL)
+def render_api_status():
+    """Status da API na sidebar, atualizado sozinho a partir do monitor"""
+    if get_prediction_mode() == "local":
+        # Modo local não depende da API: nada de consultar o /health
+        st.success("✅ Modelo local")
+        st.caption("API não usada no modo local")
+        return
+    
+    api_health = get_api_health_monitor(API_URL).snapshot()
+    if api_health["online"] is None:
+        st.info("⏳ Verificando a API...")
+    elif api_health["online"]:
+        st.success("✅ API Online")
+    else:
+        st.error("❌ API Offline - Verifique se está rodando")
+    
+    if api_health["checked_at"]:
+        st.caption(
+            f"Última verificação há {time.time() - api_health['checked_at']:.0f}s"
+            + (f" · {api_health['latency_ms']:.0f} ms" if api_health["online"] else f" · {api_health['error']}")
+        )
 
 # Sidebar com informações
 # Sidebar com informações
@@ -2076,60 +4754,66 @@ with st.sidebar:
     
     # ===== CONFIGURADOR DE API =====
     with st.expander("🔧 Configurar API", expanded=False):
-        st.markdown("### Conexão com a API")
-        
-        # Pegar URL atual ou usar padrão
-        current_url = st.session_state.get('api_url', API_URL)
-        
-        # Input para URL
-        new_url = st.text_input(
-            "URL da API:",
-            value=current_url,
-            placeholder="https://abc123.ngrok-free.app",
-            help="Cole aqui a URL do ngrok ou use http://localhost:8000"
+        st.markdown("### Modo de Predição")
+        st.radio(
+            "Onde rodar o modelo:",
+            options=list(PREDICTION_MODES.keys()),
+            format_func=lambda x: PREDICTION_MODES[x],
+            key="prediction_mode",
+            horizontal=True,
+            help="O modelo local usa o kickstarter_model_v1.pkl carregado em memória, sem chamada HTTP"
         )
         
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            if st.button("Testar", use_container_width=True):
-                try:
-                    import requests
-                    response = requests.get(f"{new_url}/health", timeout=5)
-                    if response.status_code == 200:
-                        st.success("✅ OK!")
-                        st.session_state.api_url = new_url
-                    else:
-                        st.error("❌ Erro!")
-                except:
-                    st.error("❌ Falhou!")
-        
-        with col2:
-            if st.button("Salvar", use_container_width=True):
-                st.session_state.api_url = new_url
-                st.rerun()
-        
-        st.caption(f"Atual: {current_url}")
-        
-        # Instruções
-        st.markdown("""
-        ---
-        **Como usar:**
-        1. Execute a API local
-        2. Execute ngrok
-        3. Cole a URL aqui
-        """)
+        render_api_connection()
     
     st.markdown("---")
     
     # Status da API e sistemas
     st.markdown("### 🔌 Status dos Sistemas")
     
-    api_status = check_api_health()
-    if api_status:
-        st.success("✅ API Online")
-    else:
-        st.error("❌ API Offline - Verifique se está rodando")
+    render_api_status()
+    
+    cache_stats = get_prediction_cache().stats()
+    st.caption(
+        f"🗃️ Cache de predições: {cache_stats['hits']} hits · {cache_stats['misses']} misses · "
+        f"{cache_stats['evictions'] + cache_stats['expirations']} evictions · "
+        f"{cache_stats['size']}/{cache_stats['max_size']} itens"
+    )
+    sidebar_mode = get_prediction_mode()
+    batch_stats = get_prediction_batcher(sidebar_mode, "" if sidebar_mode == "local" else API_URL).stats()
+    if OPENAI_AVAILABLE:
+        limiter_stats = get_openai_limiter().stats()
+        st.caption(
+            f"🚦 OpenAI: {limiter_stats['admitted']} admitidas · {limiter_stats['shed']} recusadas · "
+            f"fila {limiter_stats['queued']}/{OPENAI_QUEUE_SIZE} · "
+            f"{limiter_stats['requests_available']}/{OPENAI_RPM_LIMIT} req e "
+            f"{limiter_stats['tokens_available']:,}/{OPENAI_TPM_LIMIT:,} tokens disponíveis"
+        )
+        usage_stats = get_llm_usage_stats().stats()
+        if usage_stats["calls"]:
+            st.caption(
+                f"🧊 Cache de prompt da OpenAI: {usage_stats['cached_ratio']:.0%} dos "
+                f"{usage_stats['prompt_tokens']:,} tokens de entrada ({usage_stats['calls']} chamadas)"
+            )
+    flight_stats = get_singleflight().stats()
+    if flight_stats["shared"]:
+        st.caption(
+            f"🛬 Chamadas duplicadas evitadas: {flight_stats['shared']} "
+            f"(de {flight_stats['executed'] + flight_stats['shared']} pedidos)"
+        )
+    if batch_stats["requests"]:
+        batch_endpoint = {True: "sim", False: "não", None: "?"}[batch_stats["batch_endpoint"]]
+        st.caption(
+            f"📦 Micro-batching: {batch_stats['requests']} predições em {batch_stats['batches']} lotes "
+            f"(média {batch_stats['avg_batch']:.1f}, máx {batch_stats['largest_batch']}) · "
+            f"{batch_stats['upstream_calls']} chamadas ao modelo/API · p95 {batch_stats['p95_ms']:.0f} ms · "
+            f"lote na API: {batch_endpoint}"
+        )
+    extraction_stats = get_extraction_cache().stats()
+    st.caption(
+        f"🧩 Cache de extrações: {extraction_stats['hits']} hits · {extraction_stats['misses']} misses · "
+        f"{extraction_stats['size']}/{extraction_stats['max_size']} itens"
+    )
     
     # NOVO: Controle do spaCy
     st.markdown("### 🤖 Controle de Extração")
@@ -2144,6 +4828,12 @@ with st.sidebar:
                 st.warning("⚠️ spaCy não instalado")
         else:
             st.info("🔌 spaCy Desativado")
+        
+        spacy_status = get_spacy_status()
+        if spacy_status["loaded"]:
+            st.caption(f"Pipeline {spacy_status['model']} carregado em {spacy_status['load_ms']:.0f} ms (uma vez por processo)")
+        elif SPACY_AVAILABLE:
+            st.caption("Pipeline carregado sob demanda na primeira extração")
     
     with col_spacy2:
         if st.button("🔄", help="Alternar spaCy", use_container_width=True):
@@ -2154,7 +4844,7 @@ with st.sidebar:
     
     # Explicação do modo atual
     if st.session_state.use_spacy:
-        st.caption("**Modo Híbrido:** spaCy → OpenAI")
+        st.caption("**Modo Híbrido:** chave/valor → regex → spaCy → OpenAI")
         st.caption("Extração local e gratuita primeiro")
     else:
         st.caption("**Modo OpenAI:** Apenas OpenAI")
@@ -2187,12 +4877,15 @@ with st.sidebar:
         if st.session_state.use_spacy:
             st.markdown("""
             **Modo Híbrido Ativo:**
-            1. **spaCy** (primário)
-               - Gratuito e local
-               - Patterns regex
-            2. **OpenAI** (fallback)
-               - Se spaCy falhar
+            1. **Parser chave/valor** (formato recomendado)
+               - Microssegundos, uma única varredura
+            2. **Regex** e **spaCy** (locais)
+               - Gratuitos, texto livre
+            3. **OpenAI** (fallback)
+               - Se as camadas locais falharem
                - Mais flexível
+            
+            Para na primeira camada que encontrar nome, categoria e meta.
             """)
         else:
             st.markdown("""
@@ -2205,13 +4898,19 @@ with st.sidebar:
         
         st.markdown("""
         **Predições:**
-        - Sempre via API real
+        - Via API real ou modelo local (mesmo artefato)
         - Nunca inventa números
         """)
     
     if st.session_state.extraction_method:
         st.info(f"Última extração: {st.session_state.extraction_method}")
     
+    if st.session_state.extraction_trace:
+        st.caption("Camadas: " + " → ".join(
+            f"{step['tier']} {step['ms']:.1f} ms" + (" ✓" if step['complete'] else f" ({step['status']})" if step['status'] != "ok" else "")
+            for step in st.session_state.extraction_trace
+        ))
+    
     st.markdown("---")
     
     st.markdown("""
@@ -2286,7 +4985,7 @@ with st.expander("🔧 Informações Técnicas do Sistema"):
         ### 🤖 Sistema Híbrido:
         - **spaCy**: Extração local com regex
         - **OpenAI**: Fallback inteligente
-        - **API**: prediçoes na API
+        - **API**: prediçoes na API ou no modelo local
         
         """)
     
@@ -2306,6 +5005,21 @@ with st.expander("🔧 Informações Técnicas do Sistema"):
         - **Análise personalizada**
         - **Sempre usa API real**
         """)
+    
+    st.markdown("### ⏱️ Benchmark do normalizador de mensagens")
+    if st.button("Rodar benchmark", key="bench_preprocess"):
+        # Simula uma mensagem longa colada no chat
+        long_message = " ".join([
+            "Analise meu projeto: Nome: power Categoria: tecnologia Meta: 10 mil dolares",
+            "País: brasil Início: 2025-07-03 Fim: 2025-08-02.",
+            "Também tenho um projeto de música e arte, talvez jogos ou quadrinhos nos EUA."
+        ] * 60)
+        bench = benchmark_preprocess_message(long_message)
+        st.caption(
+            f"{bench['chars']:,} caracteres: sequencial {bench['sequential_ms']:.2f} ms → "
+            f"passada única {bench['single_pass_ms']:.2f} ms ({bench['speedup']:.1f}x mais rápido) · "
+            f"saída idêntica: {'sim' if bench['same_output'] else 'não'}"
+        )
 
 # Instruções de instalação
 with st.expander("📦 Configuração do Sistema Híbrido"):
@@ -2330,6 +5044,18 @@ with st.expander("📦 Configuração do Sistema Híbrido"):
     ```
     OPENAI_API_KEY=sua_chave_aqui
     KICKSTARTER_API_URL=http://localhost:8000
+    KICKSTARTER_PREDICTION_MODE=remote  # ou local (usa kickstarter_model_v1.pkl)
+    KICKSTARTER_MODEL_PATH=kickstarter_model_v1.pkl
+    KICKSTARTER_STREAM_RESPONSES=1  # 0 espera a resposta completa da OpenAI
+    KICKSTARTER_API_HEALTH_INTERVAL=15  # segundos entre verificações de saúde da API
+    KICKSTARTER_PREDICTION_BATCH_WINDOW_MS=5  # janela para juntar predições simultâneas em um lote
+    LLM_CACHE_PATH=.llm_cache.sqlite3  # respostas salvas das ferramentas AI
+    CHAT_INPUT_TOKEN_BUDGET=3000  # limite de tokens de entrada por mensagem do chat
+    EXTRACTION_LLM_MODEL=gpt-4o-mini  # extração via OpenAI (structured outputs)
+    OPENAI_POOL_SIZE=20  # conexões mantidas abertas com a OpenAI (HTTP/2 se o pacote h2 estiver instalado)
+    OPENAI_RPM_LIMIT=60  # requisições/min à OpenAI (por processo)
+    OPENAI_TPM_LIMIT=60000  # tokens/min à OpenAI (prompt + max_tokens)
+    OPENAI_DEADLINE_CHAT_S=20  # prazo do chat (também _ANALYSIS_S, _TITLES_S, _GOAL_S, _STRATEGY_S, _REWARDS_S)
     ```
     
     ### Como funciona:
@@ -2351,3 +5077,6 @@ if st.session_state.user_email and st.session_state.user_email in USERS_DATABASE
 # Mostrar método de extração se disponível
 if st.session_state.extraction_method:
     st.toast(f"📝 Última extração: {st.session_state.extraction_method}", icon="ℹ️")
+
+# CPU desta execução completa do script
+st.session_state.run_cpu_ms["app"] = (time.thread_time() - SCRIPT_CPU_START) * 1000